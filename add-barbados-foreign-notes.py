@@ -3,11 +3,18 @@
 Add Foreign Access Notes for Barbados
 ======================================
 This script adds detailed foreign access notes for Barbados (BB).
+
+The notes are declared in patches/barbados-foreign-notes.json.
 """
 
-import json
+import sys
 from pathlib import Path
-from datetime import datetime
+
+from backup_store import BackupStore
+from pipeline_metrics import DEFAULT_METRICS_FILENAME, enable_from_argv
+from property_taxes_patch import apply_patch_files
+
+PATCH_FILE = Path(__file__).parent / 'patches' / 'barbados-foreign-notes.json'
 
 def add_barbados_notes(property_taxes_file, backup_file):
     """
@@ -16,73 +23,26 @@ def add_barbados_notes(property_taxes_file, backup_file):
     Args:
         property_taxes_file: Path to property-taxes.json
         backup_file: Path to backup file
-    """
-    print("=" * 70)
-    print("ADDING FOREIGN ACCESS NOTES FOR BARBADOS")
-    print("=" * 70)
-    print(f"Property taxes file: {property_taxes_file}")
-    print(f"Backup file:         {backup_file}")
-    print()
-
-    # Read property taxes file
-    print("📖 Reading property-taxes.json...")
-    with open(property_taxes_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    # Create backup
-    print("💾 Creating backup...")
-    with open(backup_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"✅ Backup saved")
-    print()
-
-    # Find Barbados
-    barbados = None
-    for country in data['countries']:
-        if country['countryCode'] == 'BB':
-            barbados = country
-            break
-
-    if not barbados:
-        print("❌ Error: Barbados (BB) not found in data")
-        return
 
-    print(f"📝 Current foreign access notes for Barbados:")
-    print(f"   FR: '{barbados['foreignAccessNotes']['fr']}'")
-    print(f"   EN: '{barbados['foreignAccessNotes']['en']}'")
-    print()
-
-    # Add notes
-    barbados['foreignAccessNotes'] = {
-        'fr': "Les étrangers doivent obtenir une approbation de contrôle des changes de la Banque Centrale de la Barbade et payer une taxe de licence foncière pour non-barbadiens. Procédure relativement simple mais requiert autorisation préalable.",
-        'en': "Foreigners must obtain exchange control approval from the Central Bank of Barbados and pay a non-Barbadian land license fee. Procedure is relatively straightforward but requires prior authorization."
-    }
-
-    print("✏️  Updated foreign access notes:")
-    print(f"   FR: {barbados['foreignAccessNotes']['fr']}")
-    print(f"   EN: {barbados['foreignAccessNotes']['en']}")
-    print()
-
-    # Write updated file
-    print("💾 Writing updated property-taxes.json...")
-    with open(property_taxes_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-    print()
-    print("=" * 70)
-    print("✅ BARBADOS FOREIGN ACCESS NOTES ADDED")
-    print("=" * 70)
-    print()
+    Returns:
+        dict: Statistics of apply_patch_files()
+    """
+    return apply_patch_files([PATCH_FILE], property_taxes_file, backup_file, script=Path(__file__).stem)
 
 
 if __name__ == '__main__':
     script_dir = Path(__file__).parent
 
     property_taxes_file = script_dir / '../pickandtip-api/data/topics/property-taxes.json'
-    backup_file = script_dir / f'../pickandtip-api/data/topics/property-taxes.backup-barbados-notes-{datetime.now().strftime("%Y%m%d-%H%M%S")}.json'
+    backup_file = BackupStore(script_dir / '../pickandtip-api/data/topics/backups', label='barbados-notes')
 
     if not property_taxes_file.exists():
         print(f"❌ Error: Property taxes file not found: {property_taxes_file}")
-        exit(1)
+        sys.exit(1)
+
+    enable_from_argv(sys.argv, property_taxes_file.parent / DEFAULT_METRICS_FILENAME)
+
+    stats = add_barbados_notes(property_taxes_file, backup_file)
 
-    add_barbados_notes(property_taxes_file, backup_file)
+    # Exit with appropriate code
+    sys.exit(0 if not stats['errors'] and not stats['conflicts'] else 1)
@@ -4,117 +4,249 @@ Apply Manual Review Changes
 ============================
 This script applies the manual categorizations from the review file
 to the property-taxes.json file.
+
+The review is applied as one transaction:
+1. every item (.json or .jsonl, see review_io.py) is checked against the
+   current notes of its country and turned into a list of writes
+2. an item whose notes changed since the review was generated (its
+   baseNotesHash no longer matches, or its text is not in the notes any
+   more) is a conflict: nothing is applied, unless --skip-conflicts.
+   Items already applied by an earlier run are skipped.
+3. all the writes are applied and property-taxes.json is written once,
+   atomically
+
+With --dry-run nothing is written: the writes are shown as a compact
+unified diff, and --dry-run=file also saves them as a patch file
+(property_taxes_patch.py format, guarded by a test of the base notes) that
+apply-patches.py can apply later.
+
+Usage: python apply-manual-review.py [review_file] [property_taxes_file] [backup_file]
+       [--dry-run[=patch_file]] [--skip-conflicts]
 """
 
+import difflib
 import json
 import sys
-from datetime import datetime
 from pathlib import Path
 
-def apply_manual_review(review_file, property_taxes_file, backup_file):
+from backup_store import BackupStore
+from pipeline_metrics import RunMetrics, DEFAULT_METRICS_FILENAME, enable_from_argv
+from property_taxes_dataset import PropertyTaxesDataset
+from property_taxes_io import write_backup
+from review_io import iter_review, notes_fingerprint
+
+FIELDS = ['propertyTaxNotes', 'transferTaxNotes', 'countryGeneralNotes']
+
+
+def check_item(review_item, base_notes, notes):
+    """
+    Check that a review item still applies to the notes of its country.
+
+    Args:
+        review_item: Review item
+        base_notes: Notes of the country in property-taxes.json
+        notes: Notes left by the items of the same country already planned
+
+    Returns:
+        Conflict message, or None
+    """
+    expected = review_item.get('baseNotesHash')
+    if expected and notes_fingerprint(base_notes) != expected:
+        return "notes changed since the review was generated"
+    if review_item['currentNotes'] not in notes:
+        return "reviewed text not found in the current notes"
+    return None
+
+
+def plan_review(dataset, review_items, stats, metrics):
+    """
+    Turn the review items into the writes to apply, without changing the dataset.
+
+    Args:
+        dataset: PropertyTaxesDataset
+        review_items: Iterable of review items
+        stats: Statistics (updated)
+        metrics: RunMetrics (one lap per item)
+
+    Returns:
+        list of (countryCode, field, lang, old value, new value), only the
+        writes that change something, in review order
+    """
+    planned = {}
+
+    for review_item in review_items:
+        metrics.lap()
+        stats['total_items'] += 1
+        country_code = review_item['countryCode']
+        lang = review_item['lang'].lower()
+
+        try:
+            # Find the country in property taxes data
+            country = dataset.get(country_code)
+
+            if not country:
+                stats['errors'].append(f"{country_code}: Country not found in property-taxes.json")
+                continue
+
+            # Check if user filled in any categorization
+            values = {field: review_item.get(field, '').strip() for field in FIELDS}
+            values = {field: value for field, value in values.items() if value}
+            if not values:
+                stats['skipped_empty'] += 1
+                continue
+
+            base_notes = country['notes'].get(lang, '')
+            notes = planned.get((country_code, 'notes', lang), base_notes)
+            if review_item['currentNotes'] not in notes and all(
+                    (country.get(field) or {}).get(lang) == value for field, value in values.items()):
+                # Applied by an earlier run
+                stats['already_applied'] += 1
+                continue
+
+            conflict = check_item(review_item, base_notes, notes)
+            if conflict:
+                stats['conflicts'].append(f"{country_code} ({lang}): {conflict}")
+                continue
+
+            for field, value in values.items():
+                planned[(country_code, field, lang)] = value
+                stats[f'applied_{field}'] += 1
+
+            # Remove the text that was categorized from the notes field
+            planned[(country_code, 'notes', lang)] = notes.replace(review_item['currentNotes'], '').strip()
+
+        except Exception as e:
+            error_msg = f"{country_code} ({lang}): {str(e)}"
+            stats['errors'].append(error_msg)
+            print(f"  ❌ Error: {error_msg}")
+
+    writes = []
+    for (country_code, field, lang), value in planned.items():
+        old = (dataset.get(country_code).get(field) or {}).get(lang)
+        if old != value:
+            writes.append((country_code, field, lang, old, value))
+    return writes
+
+
+def format_diff(writes):
+    """Compact unified diff of the writes (one hunk per changed field)."""
+    lines = []
+    for country_code, field, lang, old, new in writes:
+        path = f"{country_code}/{field}/{lang}"
+        lines.extend(difflib.unified_diff((old or '').splitlines(), new.splitlines(),
+                                          f"a/{path}", f"b/{path}", n=0, lineterm=''))
+    return lines
+
+
+def writes_to_patch(dataset, writes, description):
+    """
+    Patch file (property_taxes_patch.py format) of the writes.
+
+    Each country patch first tests the notes the writes were planned
+    against, so it is skipped if they changed in the meantime.
+    """
+    patches = {}
+    for country_code, field, lang, old, new in writes:
+        if country_code not in patches:
+            patches[country_code] = {'countryCode': country_code, 'ops': []}
+            tested = {lang for code, _, lang, _, _ in writes if code == country_code}
+            for tested_lang in sorted(tested):
+                patches[country_code]['ops'].append({
+                    'op': 'test',
+                    'path': f"/notes/{tested_lang}",
+                    'value': dataset.get(country_code)['notes'].get(tested_lang),
+                })
+        patches[country_code]['ops'].append({'op': 'add', 'path': f"/{field}/{lang}", 'value': new})
+
+    return {'description': description, 'patches': list(patches.values())}
+
+
+def apply_manual_review(review_file, property_taxes_file, backup_file, dry_run=False, patch_file=None,
+                        skip_conflicts=False):
     """
     Apply manual review changes to property-taxes.json.
 
     Args:
-        review_file: Path to completed manual review JSON
+        review_file: Path to completed manual review JSON / JSONL
         property_taxes_file: Path to property-taxes.json
         backup_file: Path to backup file
+        dry_run: Only show the changes (nothing is written)
+        patch_file: With dry_run, also save the changes as a patch file
+        skip_conflicts: Apply the items without conflict instead of nothing
+
+    Returns:
+        dict: Statistics
     """
     print("=" * 70)
-    print("APPLYING MANUAL REVIEW CHANGES")
+    print("APPLYING MANUAL REVIEW CHANGES" + (" (DRY RUN)" if dry_run else ""))
     print("=" * 70)
     print(f"Review file:         {review_file}")
     print(f"Property taxes file: {property_taxes_file}")
     print(f"Backup file:         {backup_file}")
     print()
 
-    # Read review file
-    print("📖 Reading review file...")
-    with open(review_file, 'r', encoding='utf-8') as f:
-        review_data = json.load(f)
-
     # Read property taxes file
+    metrics = RunMetrics(Path(__file__).stem)
+    metrics.phase('read')
     print("📖 Reading property-taxes.json...")
-    with open(property_taxes_file, 'r', encoding='utf-8') as f:
-        property_taxes_data = json.load(f)
-
-    # Create backup
-    print("💾 Creating backup...")
-    with open(backup_file, 'w', encoding='utf-8') as f:
-        json.dump(property_taxes_data, f, ensure_ascii=False, indent=2)
-    print(f"✅ Backup saved to: {backup_file}")
-    print()
+    dataset = PropertyTaxesDataset.load(property_taxes_file)
 
-    # Apply changes
-    print("🔄 Applying manual categorizations...")
+    # Check every item before changing anything
+    metrics.phase('transform')
+    print("🔎 Checking review items against the current notes...")
 
     stats = {
-        'total_items': len(review_data),
+        'total_items': 0,
         'applied_propertyTaxNotes': 0,
         'applied_transferTaxNotes': 0,
         'applied_countryGeneralNotes': 0,
         'skipped_empty': 0,
+        'already_applied': 0,
+        'writes': 0,
+        'conflicts': [],
         'errors': []
     }
 
-    for review_item in review_data:
-        country_code = review_item['countryCode']
-        lang = review_item['lang'].lower()
+    writes = plan_review(dataset, iter_review(review_file), stats, metrics)
+    stats['writes'] = len(writes)
 
-        try:
-            # Find the country in property taxes data
-            country = next((c for c in property_taxes_data['countries'] if c['countryCode'] == country_code), None)
-
-            if not country:
-                stats['errors'].append(f"{country_code}: Country not found in property-taxes.json")
-                continue
+    aborted = bool(stats['conflicts']) and not skip_conflicts
+    if stats['conflicts']:
+        print(f"{'❌' if aborted else '⚠️ '} {len(stats['conflicts'])} item(s) in conflict with the current notes"
+              + (", nothing applied:" if aborted else ", skipped:"))
+        for conflict in stats['conflicts']:
+            print(f"  - {conflict}")
 
-            # Check if user filled in any categorization
-            has_changes = False
-
-            # Apply propertyTaxNotes
-            if review_item.get('propertyTaxNotes', '').strip():
-                if 'propertyTaxNotes' not in country:
-                    country['propertyTaxNotes'] = {}
-                country['propertyTaxNotes'][lang] = review_item['propertyTaxNotes'].strip()
-                stats['applied_propertyTaxNotes'] += 1
-                has_changes = True
-
-            # Apply transferTaxNotes
-            if review_item.get('transferTaxNotes', '').strip():
-                if 'transferTaxNotes' not in country:
-                    country['transferTaxNotes'] = {}
-                country['transferTaxNotes'][lang] = review_item['transferTaxNotes'].strip()
-                stats['applied_transferTaxNotes'] += 1
-                has_changes = True
-
-            # Apply countryGeneralNotes
-            if review_item.get('countryGeneralNotes', '').strip():
-                if 'countryGeneralNotes' not in country:
-                    country['countryGeneralNotes'] = {}
-                country['countryGeneralNotes'][lang] = review_item['countryGeneralNotes'].strip()
-                stats['applied_countryGeneralNotes'] += 1
-                has_changes = True
-
-            # If changes were made, remove the standalone note from notes field
-            if has_changes:
-                current_notes = country['notes'].get(lang, '')
-                # Remove the text that was categorized
-                remaining_text = current_notes.replace(review_item['currentNotes'], '').strip()
-                country['notes'][lang] = remaining_text
-            else:
-                stats['skipped_empty'] += 1
+    if dry_run:
+        print()
+        print(f"📝 {len(writes)} write(s) planned, nothing written")
+        for line in format_diff(writes):
+            print(line)
+        if patch_file:
+            with open(patch_file, 'w', encoding='utf-8') as f:
+                json.dump(writes_to_patch(dataset, writes, f"Manual review {Path(review_file).name}"),
+                          f, ensure_ascii=False, indent=2)
+            print(f"💾 Patch file saved to: {patch_file}")
+            print(f"   Apply it with: python3 apply-patches.py {patch_file}")
+    elif writes and not aborted:
+        # Create backup
+        metrics.phase('backup')
+        print("💾 Creating backup...")
+        print(f"✅ Backup saved to: {write_backup(backup_file, data=dataset.data)}")
 
-        except Exception as e:
-            error_msg = f"{country_code} ({lang}): {str(e)}"
-            stats['errors'].append(error_msg)
-            print(f"  ❌ Error: {error_msg}")
+        metrics.phase('transform')
+        print("🔄 Applying manual categorizations...")
+        for country_code, field, lang, old, new in writes:
+            dataset.set_note(country_code, field, lang, new)
 
-    # Write updated property taxes file
+    # Write updated property taxes file (all the writes at once)
+    metrics.phase('write')
     print()
-    print("💾 Writing updated property-taxes.json...")
-    with open(property_taxes_file, 'w', encoding='utf-8') as f:
-        json.dump(property_taxes_data, f, ensure_ascii=False, indent=2)
+    if dataset.save():
+        print("💾 Updated property-taxes.json written")
+    else:
+        print("✅ No country changed, property-taxes.json left untouched")
+    stats['metrics'] = metrics.finish(countries=len(dataset), items=stats['total_items'], writes=len(writes))
 
     # Print statistics
     print()
@@ -126,6 +258,9 @@ def apply_manual_review(review_file, property_taxes_file, backup_file):
     print(f"Applied to transferTaxNotes:  {stats['applied_transferTaxNotes']}")
     print(f"Applied to countryGeneralNotes: {stats['applied_countryGeneralNotes']}")
     print(f"Skipped (empty):              {stats['skipped_empty']}")
+    print(f"Already applied:              {stats['already_applied']}")
+    print(f"Writes (changed fields):      {stats['writes']}")
+    print(f"Conflicts:                    {len(stats['conflicts'])}")
     print(f"Errors:                       {len(stats['errors'])}")
 
     if stats['errors']:
@@ -136,12 +271,21 @@ def apply_manual_review(review_file, property_taxes_file, backup_file):
 
     print()
     print("=" * 70)
-    print("✅ MANUAL REVIEW APPLIED")
+    if dry_run:
+        print("✅ DRY RUN COMPLETED")
+    elif aborted:
+        print("❌ MANUAL REVIEW NOT APPLIED (CONFLICTS)")
+    else:
+        print("✅ MANUAL REVIEW APPLIED")
     print("=" * 70)
     print()
     print("Next steps:")
-    print("1. Test the interface to verify the changes")
-    print("2. Proceed with STEP 3 migration (foreignAccessNotes)")
+    if aborted:
+        print("1. Regenerate the review file for the conflicting countries")
+        print("2. Or apply the other items with --skip-conflicts")
+    else:
+        print("1. Test the interface to verify the changes")
+        print("2. Proceed with STEP 3 migration (foreignAccessNotes)")
     print()
 
     return stats
@@ -153,15 +297,17 @@ if __name__ == '__main__':
     # Default paths
     review_file = script_dir / 'property-taxes-manual-review.json'
     property_taxes_file = script_dir / '../pickandtip-api/data/topics/property-taxes.json'
-    backup_file = script_dir / f'../pickandtip-api/data/topics/property-taxes.backup-manual-review-{datetime.now().strftime("%Y%m%d-%H%M%S")}.json'
+    backup_file = BackupStore(script_dir / '../pickandtip-api/data/topics/backups', label='manual-review')
 
     # Allow override via command line
-    if len(sys.argv) > 1:
-        review_file = Path(sys.argv[1])
-    if len(sys.argv) > 2:
-        property_taxes_file = Path(sys.argv[2])
-    if len(sys.argv) > 3:
-        backup_file = Path(sys.argv[3])
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = dict(arg[2:].split('=', 1) for arg in sys.argv[1:] if arg.startswith('--') and '=' in arg)
+    if len(args) > 0:
+        review_file = Path(args[0])
+    if len(args) > 1:
+        property_taxes_file = Path(args[1])
+    if len(args) > 2:
+        backup_file = Path(args[2])
 
     # Validate files exist
     if not review_file.exists():
@@ -178,8 +324,13 @@ if __name__ == '__main__':
         print(f"❌ Error: Property taxes file not found: {property_taxes_file}")
         sys.exit(1)
 
+    enable_from_argv(sys.argv, property_taxes_file.parent / DEFAULT_METRICS_FILENAME)
+
     # Run application
-    stats = apply_manual_review(review_file, property_taxes_file, backup_file)
+    stats = apply_manual_review(review_file, property_taxes_file, backup_file,
+                                dry_run='--dry-run' in sys.argv or 'dry-run' in options,
+                                patch_file=options.get('dry-run'),
+                                skip_conflicts='--skip-conflicts' in sys.argv)
 
     # Exit with appropriate code
-    sys.exit(0 if len(stats['errors']) == 0 else 1)
+    sys.exit(0 if not stats['errors'] and not stats['conflicts'] else 1)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Apply Patch Files
+=================
+This script applies declarative patch files (see property_taxes_patch.py)
+to property-taxes.json in one batched pass: one read, one backup and one
+write whatever the number of patches.
+
+Without patch files on the command line, every patch file of patches/ is
+applied (in file name order).
+
+Usage: python apply-patches.py [patch_file ...] [--data=property-taxes.json] [--metrics[=file]]
+"""
+
+import sys
+from pathlib import Path
+
+from backup_store import BackupStore
+from pipeline_metrics import DEFAULT_METRICS_FILENAME, enable_from_argv
+from property_taxes_patch import apply_patch_files
+
+
+if __name__ == '__main__':
+    script_dir = Path(__file__).parent
+
+    # Default paths
+    patch_files = sorted((script_dir / 'patches').glob('*.json'))
+    property_taxes_file = script_dir / '../pickandtip-api/data/topics/property-taxes.json'
+    backup_file = BackupStore(script_dir / '../pickandtip-api/data/topics/backups', label='patches')
+
+    # Allow override via command line
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if args:
+        patch_files = [Path(arg) for arg in args]
+    for arg in sys.argv[1:]:
+        if arg.startswith('--data='):
+            property_taxes_file = Path(arg.split('=', 1)[1])
+
+    if not property_taxes_file.exists():
+        print(f"❌ Error: Property taxes file not found: {property_taxes_file}")
+        sys.exit(1)
+
+    enable_from_argv(sys.argv, property_taxes_file.parent / DEFAULT_METRICS_FILENAME)
+
+    stats = apply_patch_files(patch_files, property_taxes_file, backup_file)
+
+    # Exit with appropriate code
+    sys.exit(0 if not stats['errors'] and not stats['conflicts'] else 1)
@@ -4,36 +4,44 @@ Auto-Fill Review File
 =====================
 This script automatically categorizes standalone notes into the appropriate fields
 using keyword analysis and pattern matching.
-"""
 
-import json
-import re
-from pathlib import Path
+Results are cached in property-taxes-categorize-cache.json (see
+categorize_cache.py), so unchanged notes are not categorized again on the
+next run; --no-cache categorizes every item.
 
-def smart_categorize(text, lang):
-    """
-    Intelligently categorize text into propertyTaxNotes, transferTaxNotes, or countryGeneralNotes.
+With --classifier[=model] the notes of the languages where the trained
+classifier of notes_classifier.py beat the keyword rules on held-out items
+are categorized by it when it is confident; the other notes keep the
+keyword rules. On the current reviewed file the classifier beats the rules
+in no language, so --classifier changes nothing (see notes_classifier.py).
 
-    Args:
-        text: The text to categorize
-        lang: Language code ('FR' or 'EN')
+Items are read, categorized and written REVIEW_CHUNK_SIZE at a time. With
+.jsonl review files (see review_io.py) memory stays constant whatever the
+size of the review, and --resume continues an interrupted run after the
+last line written to the output file.
 
-    Returns:
-        dict with keys: propertyTaxNotes, transferTaxNotes, countryGeneralNotes
-    """
-    result = {
-        'propertyTaxNotes': '',
-        'transferTaxNotes': '',
-        'countryGeneralNotes': ''
-    }
+Usage: python auto-fill-review.py [review_file] [output_file] [--workers=N]
+       [--no-cache] [--classifier[=model]] [--resume]
+"""
+
+import re
+import sys
+from itertools import islice
+from pathlib import Path
 
-    if lang.upper() == 'FR':
-        # French patterns
+from categorize_cache import CategorizeCache, CACHE_FILENAME, content_version
+from pipeline_metrics import RunMetrics, DEFAULT_METRICS_FILENAME, enable_from_argv
+from review_io import ReviewWriter, committed_items, is_jsonl, iter_review
+from worker_pool import map_batches, parse_workers
 
-        # Split by sentences (roughly)
-        sentences = re.split(r'(?<=[.!?])\s+|\.\s+(?=[A-Z])', text)
+# Review items categorized (and held in memory) at a time
+REVIEW_CHUNK_SIZE = 10000
 
-        property_tax_keywords = [
+# Keyword patterns of each category, per language (any language other than
+# FR uses the EN patterns)
+CATEGORY_KEYWORDS = {
+    'FR': {
+        'property': [
             r'taxe foncière', r'property tax', r'\brates\b', r'impuesto predial',
             r'\bimu\b', r'\bibi\b', r'grundsteuer', r'kotei shisan', r'précompte',
             r'taxe.*annuelle', r'taxe d\'habitation', r'council tax', r'local property tax',
@@ -41,42 +49,119 @@ def smart_categorize(text, lang):
             r'assessment rate', r'quit rent', r'contribución inmobiliaria',
             r'impuesto inmobiliario', r'predial', r'contribuição', r'land rates',
             r'property rate'
-        ]
-
-        transfer_tax_keywords = [
+        ],
+        'transfer': [
             r'droits? de mutation', r'droits? de transfert', r'transfer tax',
             r'stamp duty', r'frais.*achat', r'frais totaux', r'grunderwerbsteuer',
             r'à l\'achat', r'acquisition', r'émoluments notaire', r'frais notari',
             r'débours', r'\btva\b', r'plus-value', r'capital gains',
             r'transaction', r'enregistrement', r'registration', r'\bitp\b'
-        ]
-
-        general_keywords = [
+        ],
+        'general': [
             r'varie par', r'selon', r'canton', r'état', r'province',
             r'municipalité', r'land\b', r'réforme', r'nouveau', r'récent',
             r'paradis fiscal', r'exonéré', r'aucun', r'pas de'
-        ]
-
-    else:  # EN
-        sentences = re.split(r'(?<=[.!?])\s+|\.\s+(?=[A-Z])', text)
-
-        property_tax_keywords = [
+        ],
+    },
+    'EN': {
+        'property': [
             r'property tax', r'\brates\b', r'annual.*tax', r'land tax',
             r'council tax', r'local tax', r'municipal tax', r'assessment',
             r'quit rent', r'house tax', r'real property tax'
-        ]
-
-        transfer_tax_keywords = [
+        ],
+        'transfer': [
             r'transfer tax', r'stamp duty', r'transaction.*fee', r'purchase.*tax',
             r'registration.*fee', r'capital gains', r'notary.*fee',
             r'transfer duty', r'acquisition.*tax'
-        ]
-
-        general_keywords = [
+        ],
+        'general': [
             r'varies by', r'depending on', r'canton', r'state', r'province',
             r'municipality', r'reform', r'new', r'recent', r'tax haven',
             r'exempt', r'no tax', r'none'
-        ]
+        ],
+    },
+}
+
+# Split by sentences (roughly)
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+|\.\s+(?=[A-Z])')
+
+# Pattern: "... property tax info. Transfer tax: ..."
+TRANSFER_SPLIT = re.compile(r'(.+?)\.\s*(Droits? de (?:mutation|transfert)|Transfer (?:tax|duty|Duty)|Stamp duty|Grunderwerbsteuer|à l\'achat)[:\s](.+)', re.IGNORECASE)
+
+
+# Cached categorizations are invalidated when the keywords or split patterns change
+CATEGORIZE_VERSION = content_version(CATEGORY_KEYWORDS, SENTENCE_SPLIT.pattern, TRANSFER_SPLIT.pattern)
+
+# Characters str.lower() does not fold the way re.IGNORECASE does: İ (lowered
+# to two characters), ı and ſ (matched by 'i' and 's')
+IGNORECASE_EXCEPTIONS = re.compile('[\u0130\u0131\u017f]')
+
+
+def compile_keyword_matchers(keywords, flags=0):
+    """
+    Compile the keyword lists of a language, one pattern per category.
+
+    Each category becomes a single alternation (kw1|kw2|...): one search()
+    finds a match iff one of the keyword searches would, without going
+    through the keywords one by one.
+
+    Args:
+        keywords: {category: [regex, ...]} (keywords are written in lowercase)
+        flags: re flags
+
+    Returns:
+        dict: {category: compiled pattern}
+    """
+    return {category: re.compile('|'.join(f'(?:{kw})' for kw in category_keywords), flags)
+            for category, category_keywords in keywords.items()}
+
+
+# {lang: (case-sensitive matchers, re.IGNORECASE matchers)}
+KEYWORD_MATCHERS = {lang: (compile_keyword_matchers(keywords), compile_keyword_matchers(keywords, re.IGNORECASE))
+                    for lang, keywords in CATEGORY_KEYWORDS.items()}
+
+
+def keyword_matchers(text, lang):
+    """
+    Pick the keyword matchers of a text.
+
+    Searching the lower-cased text with case-sensitive patterns gives the
+    same matches as re.IGNORECASE, several times faster, except for the
+    characters of IGNORECASE_EXCEPTIONS.
+
+    Args:
+        text: The text to categorize
+        lang: Language code ('FR' or 'EN')
+
+    Returns:
+        (matchers, fold): {category: pattern} and the function to apply to
+        the text (or any part of it) before searching it
+    """
+    sensitive, ignorecase = KEYWORD_MATCHERS['FR' if lang.upper() == 'FR' else 'EN']
+    if IGNORECASE_EXCEPTIONS.search(text):
+        return ignorecase, str
+    return sensitive, str.lower
+
+
+def smart_categorize(text, lang):
+    """
+    Intelligently categorize text into propertyTaxNotes, transferTaxNotes, or countryGeneralNotes.
+
+    Args:
+        text: The text to categorize
+        lang: Language code ('FR' or 'EN')
+
+    Returns:
+        dict with keys: propertyTaxNotes, transferTaxNotes, countryGeneralNotes
+    """
+    result = {
+        'propertyTaxNotes': '',
+        'transferTaxNotes': '',
+        'countryGeneralNotes': ''
+    }
+
+    matchers, fold = keyword_matchers(text, lang)
+    sentences = SENTENCE_SPLIT.split(text)
 
     # Analyze each sentence
     property_parts = []
@@ -89,9 +174,9 @@ def smart_categorize(text, lang):
             continue
 
         # Check what category this sentence belongs to
-        is_property = any(re.search(kw, sentence, re.IGNORECASE) for kw in property_tax_keywords)
-        is_transfer = any(re.search(kw, sentence, re.IGNORECASE) for kw in transfer_tax_keywords)
-        is_general = any(re.search(kw, sentence, re.IGNORECASE) for kw in general_keywords)
+        folded = fold(sentence)
+        is_property = matchers['property'].search(folded) is not None
+        is_transfer = matchers['transfer'].search(folded) is not None
 
         # Categorize based on matches
         if is_property and not is_transfer:
@@ -102,15 +187,14 @@ def smart_categorize(text, lang):
             # Contains both - try to split more carefully
             # Look for specific patterns that separate property tax from transfer tax
 
-            # Pattern: "... property tax info. Transfer tax: ..."
-            split_match = re.search(r'(.+?)\.\s*(Droits? de (?:mutation|transfert)|Transfer (?:tax|duty|Duty)|Stamp duty|Grunderwerbsteuer|à l\'achat)[:\s](.+)', sentence, re.IGNORECASE)
+            split_match = TRANSFER_SPLIT.search(sentence)
             if split_match:
                 property_parts.append(split_match.group(1).strip())
                 transfer_parts.append(split_match.group(2).strip() + ' ' + split_match.group(3).strip())
             else:
                 # Can't split clearly - put in general for manual review
                 general_parts.append(sentence)
-        elif is_general:
+        elif matchers['general'].search(folded):
             general_parts.append(sentence)
         else:
             # No clear categorization - put in general
@@ -128,11 +212,10 @@ def smart_categorize(text, lang):
 
     # If everything went to general but text clearly mentions one topic, reassign
     if result['countryGeneralNotes'] and not result['propertyTaxNotes'] and not result['transferTaxNotes']:
-        text_lower = text.lower()
-
         # Check if it's clearly about one topic
-        has_property = any(re.search(kw, text, re.IGNORECASE) for kw in property_tax_keywords)
-        has_transfer = any(re.search(kw, text, re.IGNORECASE) for kw in transfer_tax_keywords)
+        folded = fold(text)
+        has_property = matchers['property'].search(folded) is not None
+        has_transfer = matchers['transfer'].search(folded) is not None
 
         if has_property and not has_transfer:
             result['propertyTaxNotes'] = result['countryGeneralNotes']
@@ -144,75 +227,211 @@ def smart_categorize(text, lang):
     return result
 
 
-def auto_fill_review(review_file, output_file):
+# Confidence of the keyword rules in the category of one sentence. The
+# values only order the cases (rank-review-queue.py), they are not measured
+# accuracies.
+RULE_CONFIDENCE = {
+    'single': 1.0,      # property or transfer keywords only
+    'split': 0.75,      # both, split on a transfer tax header
+    'general': 0.75,    # general keywords only
+    'unmatched': 0.25,  # no keyword, defaults to general
+    'ambiguous': 0.0,   # both, left in general for manual review
+}
+
+
+def categorize_confidence(text, lang):
+    """
+    Confidence of smart_categorize in its categorization of a text.
+
+    Args:
+        text: The text to categorize
+        lang: Language code ('FR' or 'EN')
+
+    Returns:
+        float: Lowest RULE_CONFIDENCE of its sentences (1.0 for an empty text)
+    """
+    matchers, fold = keyword_matchers(text, lang)
+    confidence = 1.0
+
+    for sentence in SENTENCE_SPLIT.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+
+        folded = fold(sentence)
+        is_property = matchers['property'].search(folded) is not None
+        is_transfer = matchers['transfer'].search(folded) is not None
+
+        if is_property != is_transfer:
+            case = 'single'
+        elif is_property:
+            case = 'split' if TRANSFER_SPLIT.search(sentence) else 'ambiguous'
+        elif matchers['general'].search(folded):
+            case = 'general'
+        else:
+            case = 'unmatched'
+        confidence = min(confidence, RULE_CONFIDENCE[case])
+
+    return confidence
+
+
+def categorize_batch(items, stats):
+    """Worker side of auto_fill_review(workers=N): categorize a batch of (text, lang)."""
+    return [smart_categorize(text, lang) for text, lang in items], stats
+
+
+def categorize_items(items, workers=1, cache=None, classifier=None):
+    """
+    Categorize review texts, cached results first.
+
+    With a cache each distinct text missing from it is categorized once,
+    without one every item is.
+
+    Args:
+        items: List of (text, lang)
+        workers: Number of worker processes (1 = sequential)
+        cache: CategorizeCache of previous results (None = categorize everything)
+        classifier: LanguageClassifiers used before the keyword rules
+
+    Returns:
+        (results, categorized): categorization of every item, in item
+        order, and number of texts categorized
+    """
+    keys = [cache.key(text, lang) for text, lang in items] if cache else list(range(len(items)))
+    results = {key: cache.get(key) for key in dict.fromkeys(keys)} if cache else {}
+    missing = {}
+    for key, item in zip(keys, items):
+        if results.get(key) is None:
+            missing.setdefault(key, item)
+
+    # Smart categorization (results come back in item order)
+    if classifier:
+        # All the sentences of a language in one batch, the keyword rules where the classifier is not used
+        missing_items = list(missing.values())
+        predicted = classifier.categorize_batch([text for text, lang in missing_items],
+                                                [lang for text, lang in missing_items])
+        categorized_missing = (categorized if categorized is not None else smart_categorize(text, lang)
+                               for categorized, (text, lang) in zip(predicted, missing_items))
+    elif workers > 1:
+        categorized_missing = (categorized for batch in map_batches(categorize_batch, list(missing.values()), {}, workers)
+                               for categorized in batch)
+    else:
+        categorized_missing = (smart_categorize(text, lang) for text, lang in missing.values())
+
+    categorized_items = []
+    for key in keys:
+        categorized = results.get(key)
+        if categorized is None:
+            categorized = results[key] = next(categorized_missing)
+            if cache:
+                cache.put(key, categorized)
+        categorized_items.append(categorized)
+
+    return categorized_items, len(missing)
+
+
+def auto_fill_review(review_file, output_file, workers=1, cache=None, classifier=None, resume=False):
     """
     Auto-fill the review file with smart categorization.
 
     Args:
-        review_file: Input review file
-        output_file: Output filled review file
+        review_file: Input review file (.json or .jsonl)
+        output_file: Output filled review file (.json or .jsonl)
+        workers: Number of worker processes (1 = sequential)
+        cache: CategorizeCache of previous results (None = categorize everything)
+        classifier: LanguageClassifiers used before the keyword rules (the
+            items it categorizes also get its confidence; cache and workers
+            are not used)
+        resume: Keep the items already in the (.jsonl) output file and
+            continue after them
+
+    Returns:
+        dict: Statistics
     """
     print("=" * 70)
     print("AUTO-FILLING REVIEW FILE")
     print("=" * 70)
     print(f"Input:  {review_file}")
     print(f"Output: {output_file}")
+    if cache:
+        print(f"Cache:  {cache}")
     print()
 
-    # Read review file
+    metrics = RunMetrics(Path(__file__).stem)
+    metrics.phase('read')
+    skipped = committed_items(output_file) if resume else 0
+    if skipped:
+        print(f"⏩ Resuming after the {skipped} items already in the output file")
     print("📖 Reading review file...")
-    with open(review_file, 'r', encoding='utf-8') as f:
-        review_data = json.load(f)
-
-    print(f"🤖 Auto-categorizing {len(review_data)} items...")
-
-    for item in review_data:
-        current_notes = item['currentNotes']
-        lang = item['lang']
-
-        # Smart categorization
-        categorized = smart_categorize(current_notes, lang)
-
-        # Update item
-        item['propertyTaxNotes'] = categorized['propertyTaxNotes']
-        item['transferTaxNotes'] = categorized['transferTaxNotes']
-        item['countryGeneralNotes'] = categorized['countryGeneralNotes']
-
-    # Write output
-    print(f"💾 Writing auto-filled review file...")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(review_data, f, ensure_ascii=False, indent=2)
+    review_items = iter_review(review_file, skip=skipped)
 
-    # Statistics
     stats = {
-        'total': len(review_data),
+        'total': 0,
+        'resumed_after': skipped,
         'property_only': 0,
         'transfer_only': 0,
         'general_only': 0,
         'mixed': 0
     }
-
-    for item in review_data:
-        has_property = bool(item['propertyTaxNotes'])
-        has_transfer = bool(item['transferTaxNotes'])
-        has_general = bool(item['countryGeneralNotes'])
-
-        count = sum([has_property, has_transfer, has_general])
-
-        if count > 1:
-            stats['mixed'] += 1
-        elif has_property:
-            stats['property_only'] += 1
-        elif has_transfer:
-            stats['transfer_only'] += 1
-        elif has_general:
-            stats['general_only'] += 1
+    examples = []
+    categorized_count = 0
+
+    metrics.phase('transform')
+    print(f"🤖 Auto-categorizing items..." + (f" ({workers} workers)" if workers > 1 else ""))
+
+    # A .jsonl output is written in place: its complete lines are what --resume continues from
+    with ReviewWriter(output_file, append=resume, atomic=not is_jsonl(output_file)) as writer:
+        while True:
+            chunk = list(islice(review_items, REVIEW_CHUNK_SIZE))
+            if not chunk:
+                break
+
+            results, categorized = categorize_items([(item['currentNotes'], item['lang']) for item in chunk],
+                                                    workers=workers, cache=cache, classifier=classifier)
+            categorized_count += categorized
+
+            for item, categorized in zip(chunk, results):
+                metrics.lap()
+
+                # Update item
+                item['propertyTaxNotes'] = categorized['propertyTaxNotes']
+                item['transferTaxNotes'] = categorized['transferTaxNotes']
+                item['countryGeneralNotes'] = categorized['countryGeneralNotes']
+                if 'confidence' in categorized:
+                    item['confidence'] = categorized['confidence']
+                writer.write(item)
+
+                # Statistics
+                count = sum([bool(item['propertyTaxNotes']), bool(item['transferTaxNotes']),
+                             bool(item['countryGeneralNotes'])])
+
+                stats['total'] += 1
+                if count > 1:
+                    stats['mixed'] += 1
+                elif item['propertyTaxNotes']:
+                    stats['property_only'] += 1
+                elif item['transferTaxNotes']:
+                    stats['transfer_only'] += 1
+                elif item['countryGeneralNotes']:
+                    stats['general_only'] += 1
+
+                if len(examples) < 3:
+                    examples.append(item)
+
+    metrics.phase('write')
+    print(f"💾 Auto-filled review file written ({stats['total']} items)")
+    if cache:
+        cache.save()
+        print(f"   Cache: {cache.hits} hits, {categorized_count} texts categorized")
+    stats['metrics'] = metrics.finish(items=stats['total'], categorized=categorized_count)
 
     print()
     print("=" * 70)
     print("AUTO-FILL STATISTICS")
     print("=" * 70)
     print(f"Total items:              {stats['total']}")
+    if skipped:
+        print(f"Resumed after:            {skipped}")
     print(f"Property tax only:        {stats['property_only']}")
     print(f"Transfer tax only:        {stats['transfer_only']}")
     print(f"General only:             {stats['general_only']}")
@@ -223,7 +442,7 @@ def auto_fill_review(review_file, output_file):
     print("=" * 70)
     print("EXAMPLES:")
     print("=" * 70)
-    for i, item in enumerate(review_data[:3]):
+    for i, item in enumerate(examples):
         print(f"\n{i+1}. {item['countryCode']} ({item['lang']})")
         print(f"   Original: {item['currentNotes'][:80]}...")
         if item['propertyTaxNotes']:
@@ -243,6 +462,8 @@ def auto_fill_review(review_file, output_file):
     print("2. Run: python3 apply-manual-review.py")
     print()
 
+    return stats
+
 
 if __name__ == '__main__':
     script_dir = Path(__file__).parent
@@ -250,11 +471,45 @@ if __name__ == '__main__':
     review_file = script_dir / 'property-taxes-manual-review.json'
     output_file = script_dir / 'property-taxes-manual-review-filled.json'
 
+    # Allow override via command line
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if len(args) > 0:
+        review_file = Path(args[0])
+    if len(args) > 1:
+        output_file = Path(args[1])
+
     if not review_file.exists():
         print(f"❌ Error: Review file not found: {review_file}")
         exit(1)
 
-    auto_fill_review(review_file, output_file)
+    resume = '--resume' in sys.argv
+    if resume and not is_jsonl(output_file):
+        print(f"❌ Error: --resume needs a .jsonl output file: {output_file}")
+        exit(1)
+
+    enable_from_argv(sys.argv, script_dir / DEFAULT_METRICS_FILENAME)
+
+    cache = None
+    classifier = None
+    model_arg = next((arg for arg in sys.argv if arg == '--classifier' or arg.startswith('--classifier=')), None)
+    if model_arg:
+        # NumPy is only needed for the classifier
+        from notes_classifier import LanguageClassifiers, MODEL_FILENAME
+
+        model_file = Path(model_arg.split('=', 1)[1]) if '=' in model_arg else script_dir / MODEL_FILENAME
+        if not model_file.exists():
+            print(f"❌ Error: Classifier model not found: {model_file}")
+            print("Train it first: python3 notes_classifier.py")
+            exit(1)
+        classifier = LanguageClassifiers.load(model_file)
+        if not classifier.languages:
+            print("⚠️  The classifier did not beat the keyword rules in any language: --classifier is inactive,"
+                  " the output is the one of the rules")
+    elif '--no-cache' not in sys.argv:
+        cache = CategorizeCache(script_dir / CACHE_FILENAME, CATEGORIZE_VERSION)
+
+    auto_fill_review(review_file, output_file, workers=parse_workers(sys.argv), cache=cache, classifier=classifier,
+                     resume=resume)
 
     print(f"✅ Auto-filled file saved: {output_file}")
     print()
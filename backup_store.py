@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Backup Store for property-taxes.json
+====================================
+Content-addressed, compressed backups taken by the migration scripts in place
+of a full pretty-printed property-taxes.backup-<step>-<timestamp>.json copy.
+
+Layout of a store directory:
+
+- objects/ab/cdef...   zlib-compressed JSON of one country record (or of the
+                       top-level fields), named by the sha256 of its content
+- snapshots/<id>.json  snapshot manifest: per-country deltas (countryCode →
+                       object hash) against the parent snapshot
+- HEAD                 id of the latest snapshot
+
+A snapshot only writes the records that changed since the previous one, so
+backup I/O and disk usage scale with the size of the change. Every
+MAX_CHAIN snapshots a full manifest (base) is written so that restore never
+replays a long chain of deltas.
+
+Objects, manifests and HEAD are written to a temporary file renamed into
+place, so an interrupted snapshot never leaves a truncated object that a
+later snapshot would take for the stored record.
+
+Usage:
+    python backup_store.py list [store_dir]
+    python backup_store.py restore <id> <output_file> [store_dir]
+    python backup_store.py compact [--keep=N] [store_dir]
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+from property_taxes_io import StreamWriter, canonical_json, country_key
+
+MAX_CHAIN = 16
+DEFAULT_KEEP = 20
+
+
+class BackupStore:
+    """
+    Snapshot / restore / compact property-taxes.json backups.
+
+    Args:
+        directory: Store directory (created on first snapshot)
+        label: Default label of the snapshots (e.g. 'step1')
+    """
+
+    def __init__(self, directory, label=''):
+        self.directory = Path(directory)
+        self.label = label
+        self._states = {}
+
+    def __str__(self):
+        return str(self.directory)
+
+    # ------------------------------------------
+    # Objects and manifests
+    # ------------------------------------------
+
+    def _object_path(self, digest):
+        return self.directory / 'objects' / digest[:2] / digest[2:]
+
+    @staticmethod
+    def _write_atomic(path, content):
+        """Write bytes to path through a temporary file in the same directory."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=f'.{path.name}.', suffix='.tmp', dir=path.parent)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def _put(self, content, digest):
+        path = self._object_path(digest)
+        # An existing object is complete: objects only appear by rename
+        if not path.exists():
+            self._write_atomic(path, zlib.compress(content))
+        return digest
+
+    def _get(self, digest):
+        with open(self._object_path(digest), 'rb') as f:
+            return json.loads(zlib.decompress(f.read()).decode('utf-8'))
+
+    def _manifest(self, snapshot_id):
+        with open(self.directory / 'snapshots' / f'{snapshot_id}.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest):
+        path = self.directory / 'snapshots' / f"{manifest['id']}.json"
+        self._write_atomic(path, json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    def head(self):
+        """Id of the latest snapshot, or None for an empty store."""
+        head_file = self.directory / 'HEAD'
+        if not head_file.exists():
+            return None
+        return head_file.read_text().strip() or None
+
+    def _chain(self, snapshot_id):
+        """Manifests from snapshot_id back to its base (newest first)."""
+        chain = []
+        while snapshot_id:
+            manifest = self._manifest(snapshot_id)
+            chain.append(manifest)
+            if manifest['base']:
+                break
+            snapshot_id = manifest['parent']
+        return chain
+
+    def _state(self, snapshot_id):
+        """Resolve a snapshot into (meta_hash, {key: object_hash} in document order)."""
+        if snapshot_id not in self._states:
+            chain = self._chain(snapshot_id)
+            countries = {}
+            for manifest in reversed(chain):
+                if manifest['order'] is not None:
+                    countries = {key: countries.get(key) for key in manifest['order']}
+                countries.update(manifest['countries'])
+            self._states[snapshot_id] = (chain[0]['meta'], countries, len(chain))
+        return self._states[snapshot_id]
+
+    # ------------------------------------------
+    # Snapshot
+    # ------------------------------------------
+
+    def snapshot(self, events, label=None):
+        """
+        Store a snapshot of a document.
+
+        Args:
+            events: iter_document(input_file) or iter_data(data)
+            label: Snapshot label (defaults to the store label)
+
+        Returns:
+            Snapshot id (the parent id when nothing changed)
+        """
+        parent = self.head()
+        parent_meta, parent_countries, depth = self._state(parent) if parent else (None, {}, 0)
+        base = parent is None or depth >= MAX_CHAIN
+
+        fields = {}
+        keys = []
+        order = []
+        changed = {}
+        seen = {}
+
+        for event, key, value in events:
+            if event == 'field':
+                fields[key] = value
+                keys.append(key)
+            elif event == 'countries':
+                keys.append('countries')
+            else:
+                record_key = country_key(value, seen)
+                order.append(record_key)
+
+                content = canonical_json(value)
+                digest = hashlib.sha256(content).hexdigest()
+                # Unchanged records are neither written nor listed
+                if base or parent_countries.get(record_key) != digest:
+                    changed[record_key] = self._put(content, digest)
+
+        content = canonical_json({'keys': keys, 'fields': fields})
+        meta = self._put(content, hashlib.sha256(content).hexdigest())
+        order_changed = order != list(parent_countries)
+
+        if not base and not changed and not order_changed and meta == parent_meta:
+            return parent
+
+        manifest = {
+            'parent': parent,
+            'base': base,
+            'meta': meta,
+            'order': order if base or order_changed else None,
+            'countries': changed,
+        }
+        manifest['id'] = hashlib.sha256(canonical_json(manifest)).hexdigest()[:12]
+        manifest['label'] = label if label is not None else self.label
+        manifest['created'] = datetime.now().isoformat(timespec='seconds')
+
+        self._write_manifest(manifest)
+        self._write_atomic(self.directory / 'HEAD', manifest['id'].encode('utf-8'))
+        return manifest['id']
+
+    # ------------------------------------------
+    # Restore
+    # ------------------------------------------
+
+    def restore(self, snapshot_id, output_file):
+        """
+        Rebuild the document of a snapshot, one country record at a time.
+
+        Args:
+            snapshot_id: Snapshot id (or unique prefix)
+            output_file: Path of the restored JSON file
+
+        Returns:
+            Number of country records restored
+        """
+        snapshot_id = self.resolve_id(snapshot_id)
+        meta_hash, countries, _ = self._state(snapshot_id)
+        meta = self._get(meta_hash)
+
+        count = 0
+        with open(output_file, 'w', encoding='utf-8') as f:
+            writer = StreamWriter(f)
+            for key in meta['keys']:
+                if key != 'countries':
+                    writer.field(key, meta['fields'][key])
+                    continue
+                writer.begin_countries()
+                for digest in countries.values():
+                    writer.country(self._get(digest))
+                    count += 1
+            writer.close()
+
+        return count
+
+    def resolve_id(self, prefix):
+        matches = [path.stem for path in (self.directory / 'snapshots').glob(f'{prefix}*.json')]
+        if len(matches) != 1:
+            raise KeyError(f"{'Unknown' if not matches else 'Ambiguous'} snapshot id: {prefix}")
+        return matches[0]
+
+    def snapshots(self):
+        """Manifests of the HEAD chain, newest first."""
+        manifests = []
+        snapshot_id = self.head()
+        while snapshot_id and (self.directory / 'snapshots' / f'{snapshot_id}.json').exists():
+            manifest = self._manifest(snapshot_id)
+            manifests.append(manifest)
+            snapshot_id = manifest['parent']
+        return manifests
+
+    # ------------------------------------------
+    # Retention / compaction
+    # ------------------------------------------
+
+    def compact(self, keep=DEFAULT_KEEP):
+        """
+        Keep the newest snapshots only and delete unreferenced objects.
+
+        The oldest kept snapshot is rewritten as a base when its parent goes.
+
+        Args:
+            keep: Number of snapshots to keep (at least 1: HEAD is always kept)
+
+        Returns:
+            dict: removed snapshot and object counts
+
+        Raises:
+            ValueError: if keep is below 1
+        """
+        if keep < 1:
+            raise ValueError(f"keep must be at least 1 (got {keep}): HEAD would point to a deleted snapshot")
+
+        manifests = self.snapshots()
+        kept, dropped = manifests[:keep], manifests[keep:]
+
+        if kept and dropped and not kept[-1]['base']:
+            oldest = kept[-1]
+            meta_hash, countries, _ = self._state(oldest['id'])
+            oldest.update({'base': True, 'parent': None, 'meta': meta_hash,
+                           'order': list(countries), 'countries': countries})
+            self._write_manifest(oldest)
+        elif kept and dropped:
+            kept[-1]['parent'] = None
+            self._write_manifest(kept[-1])
+
+        for manifest in dropped:
+            os.remove(self.directory / 'snapshots' / f"{manifest['id']}.json")
+
+        # Everything that is not listed by a kept snapshot goes
+        referenced = set()
+        for manifest in kept:
+            referenced.add(manifest['meta'])
+            referenced.update(manifest['countries'].values())
+
+        removed_objects = 0
+        for path in (self.directory / 'objects').glob('*/*'):
+            if path.parent.name + path.name not in referenced:
+                path.unlink()
+                removed_objects += 1
+
+        self._states.clear()
+        return {'snapshots_removed': len(dropped), 'objects_removed': removed_objects}
+
+
+def main():
+    script_dir = Path(__file__).parent
+    store_dir = script_dir / '../pickandtip-api/data/topics/backups'
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    keep = next((int(arg.split('=', 1)[1]) for arg in sys.argv if arg.startswith('--keep=')), DEFAULT_KEEP)
+    command = args[0] if args else 'list'
+
+    if command == 'list':
+        store = BackupStore(args[1] if len(args) > 1 else store_dir)
+        print("=" * 70)
+        print(f"BACKUP SNAPSHOTS ({store.directory})")
+        print("=" * 70)
+        for manifest in store.snapshots():
+            kind = 'base' if manifest['base'] else f"+{len(manifest['countries'])}"
+            print(f"  {manifest['id']}  {manifest['created']}  {manifest['label']:<20} {kind}")
+
+    elif command == 'restore' and len(args) >= 3:
+        store = BackupStore(args[3] if len(args) > 3 else store_dir)
+        count = store.restore(args[1], args[2])
+        print(f"✅ Restored {args[1]} ({count} countries) to: {args[2]}")
+
+    elif command == 'compact':
+        store = BackupStore(args[1] if len(args) > 1 else store_dir)
+        if keep < 1:
+            print(f"❌ Error: --keep must be at least 1 (got {keep})")
+            sys.exit(1)
+        result = store.compact(keep)
+        print(f"✅ Compacted: {result['snapshots_removed']} snapshots and {result['objects_removed']} objects removed")
+
+    else:
+        print("Usage: python backup_store.py list [store_dir]")
+        print("       python backup_store.py restore <id> <output_file> [store_dir]")
+        print("       python backup_store.py compact [--keep=N] [store_dir]")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Micro-Benchmark: Notes Tokenizer vs Regex Search+Sub
+=====================================================
+Times the tokenizer-based extract_* functions of the migration scripts
+against the previous implementations (re.search followed by re.sub with the
+same lazy DOTALL pattern), on long and adversarial notes strings.
+
+For each case the outputs of both implementations are compared, so the
+benchmark also acts as an equivalence check. The tokenizer also ends the
+step 0/1/2 sections at the singular "Accès étranger:" header (step 3
+already accepted it): for the cases of SINGULAR_CASES the previous patterns
+are compared with that header accepted too (singular_pattern()), so the
+new cut points are checked as well.
+
+Usage: python benchmark-notes-tokenizer.py [repeat]
+"""
+
+import importlib.util
+import re
+import sys
+import timeit
+from pathlib import Path
+
+script_dir = Path(__file__).parent
+
+
+def load_script(filename):
+    """Import a hyphenated script as a module."""
+    spec = importlib.util.spec_from_file_location(filename.replace('-', '_')[:-3], script_dir / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# ==========================================
+# PREVIOUS IMPLEMENTATIONS (search + sub)
+# ==========================================
+
+LEGACY_PATTERNS = {
+    'property': {
+        'fr': r'Taxe foncière annuelle:\s*(.*?)(?=\s*(?:Taxe de transfert:|Accès étrangers:|$))',
+        'en': r'Annual property tax:\s*(.*?)(?=\s*(?:Transfer tax:|Foreign access:|$))',
+    },
+    'transfer': {
+        'fr': r'Taxe de transfert:\s*(.*?)(?=\s*(?:Accès étrangers:|$))',
+        'en': r'Transfer tax:\s*(.*?)(?=\s*(?:Foreign access:|$))',
+    },
+    'foreign': {
+        'fr': r'Accès étrangers?:\s*(.+)',
+        'en': r'Foreign access:\s*(.+)',
+    },
+}
+
+
+# Cases whose notes use the singular "Accès étranger:" header
+SINGULAR_CASES = ('singular', 'singular-property', 'singular-general')
+
+
+def singular_pattern(pattern):
+    """Previous pattern, ending at the singular FR foreign access header too."""
+    return pattern.replace('Accès étrangers:', 'Accès étrangers?:')
+
+
+def legacy_extract(kind, notes_text, lang, require_content, singular=False):
+    pattern = LEGACY_PATTERNS[kind][lang]
+    if singular:
+        pattern = singular_pattern(pattern)
+    match = re.search(pattern, notes_text, re.DOTALL | re.IGNORECASE)
+    if match:
+        section = match.group(1).strip()
+        # Same pattern without the capture group, as in the original scripts
+        remaining = re.sub(re.sub(r'\((\.\*\?|\.\+)\)', r'\1', pattern), '', notes_text,
+                           count=1, flags=re.DOTALL | re.IGNORECASE).strip()
+        if section or not require_content:
+            return section, remaining
+    return '', notes_text
+
+
+def legacy_extract_general(notes_text, lang, singular=False):
+    pattern = {
+        'fr': r'(Taxe foncière annuelle:|Taxe de transfert:|Accès étrangers:)',
+        'en': r'(Annual property tax:|Transfer tax:|Foreign access:)',
+    }[lang]
+    if singular:
+        pattern = singular_pattern(pattern)
+    match = re.search(pattern, notes_text, re.IGNORECASE)
+    if match:
+        general = notes_text[:match.start()].strip()
+        # The original FR branch sliced a single character here; the fixed
+        # slice is used so that both implementations can be compared.
+        remaining = notes_text[match.start():].strip()
+        if general:
+            return general, remaining
+    return '', notes_text
+
+
+# ==========================================
+# BENCHMARK CASES
+# ==========================================
+
+def build_cases():
+    sentence_fr = "Taux variable selon la municipalité, entre 0.1% et 0.8% de la valeur cadastrale. "
+    sentence_en = "Rate varies by municipality, between 0.1% and 0.8% of cadastral value. "
+
+    return {
+        'realistic': {
+            'fr': ("Territoire autonome. " * 3 + "Taxe foncière annuelle: " + sentence_fr * 4
+                   + "Taxe de transfert: " + sentence_fr * 3 + "Accès étrangers: Pleine propriété."),
+            'en': ("Autonomous territory. " * 3 + "Annual property tax: " + sentence_en * 4
+                   + "Transfer tax: " + sentence_en * 3 + "Foreign access: Full ownership."),
+        },
+        'long': {
+            'fr': ("Territoire autonome. " * 200 + "Taxe foncière annuelle: " + sentence_fr * 500
+                   + "Taxe de transfert: " + sentence_fr * 500 + "Accès étrangers: " + sentence_fr * 200),
+            'en': ("Autonomous territory. " * 200 + "Annual property tax: " + sentence_en * 500
+                   + "Transfer tax: " + sentence_en * 500 + "Foreign access: " + sentence_en * 200),
+        },
+        # Long whitespace runs: the lazy body retries the \s* lookahead at
+        # every position of every run.
+        'whitespace': {
+            'fr': "Taxe foncière annuelle: " + ("0.5%" + " " * 400) * 200 + "Taxe de transfert: " + ("2%" + " " * 400) * 200,
+            'en': "Annual property tax: " + ("0.5%" + " " * 400) * 200 + "Transfer tax: " + ("2%" + " " * 400) * 200,
+        },
+        # Near-miss headers: every one starts a lookahead attempt that fails late.
+        'near-miss': {
+            'fr': "Taxe foncière annuelle: " + "Taxe de transfert due. Accès étrangers limité. " * 2000,
+            'en': "Annual property tax: " + "Transfer tax due. Foreign access limited. " * 2000,
+        },
+        # Singular FR header: ends the general text and the property /
+        # transfer sections like the plural one (see SINGULAR_CASES).
+        'singular': {
+            'fr': ("Territoire autonome. " * 3 + "Taxe foncière annuelle: " + sentence_fr * 4
+                   + "Taxe de transfert: " + sentence_fr * 3 + "Accès étranger: Pleine propriété."),
+            'en': ("Autonomous territory. " * 3 + "Annual property tax: " + sentence_en * 4
+                   + "Transfer tax: " + sentence_en * 3 + "Foreign access: Full ownership."),
+        },
+        'singular-property': {
+            'fr': "Territoire autonome. " * 3 + "Taxe foncière annuelle: " + sentence_fr * 4 + "Accès étranger: Libre.",
+            'en': "Autonomous territory. " * 3 + "Annual property tax: " + sentence_en * 4 + "Foreign access: Free.",
+        },
+        'singular-general': {
+            'fr': "Territoire autonome. " * 3 + "Accès étranger: Libre. " + "Taxe de transfert: " + sentence_fr * 3,
+            'en': "Autonomous territory. " * 3 + "Foreign access: Free. " + "Transfer tax: " + sentence_en * 3,
+        },
+    }
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    step0 = load_script('migrate-property-tax-notes-step0.py')
+    step1 = load_script('migrate-property-tax-notes-step1.py')
+    step2 = load_script('migrate-property-tax-notes-step2.py')
+    step3 = load_script('migrate-property-tax-notes-step3.py')
+
+    functions = {
+        'general': (lambda t, l, s: legacy_extract_general(t, l, s), step0.extract_country_general_notes),
+        'property': (lambda t, l, s: legacy_extract('property', t, l, False, s), step1.extract_property_tax_notes),
+        'transfer': (lambda t, l, s: legacy_extract('transfer', t, l, True, s), step2.extract_transfer_tax_notes),
+        'foreign': (lambda t, l, s: legacy_extract('foreign', t, l, True, s), step3.extract_foreign_access_notes),
+    }
+
+    print("=" * 85)
+    print("NOTES TOKENIZER MICRO-BENCHMARK")
+    print("=" * 85)
+    print(f"{'case':<19}{'lang':<6}{'function':<10}{'chars':>9}{'legacy ms':>12}{'tokenizer ms':>14}{'speedup':>9}  same")
+    print("-" * 85)
+
+    mismatches = 0
+    for case_name, texts in build_cases().items():
+        singular = case_name in SINGULAR_CASES
+        for lang, text in texts.items():
+            for name, (legacy, tokenized) in functions.items():
+                number = max(1, 2000 // max(1, len(text) // 100))
+                legacy_time = min(timeit.repeat(lambda: legacy(text, lang, singular), number=number,
+                                                repeat=repeat)) / number
+                new_time = min(timeit.repeat(lambda: tokenized(text, lang), number=number, repeat=repeat)) / number
+                same = legacy(text, lang, singular) == tokenized(text, lang)
+                mismatches += not same
+                print(f"{case_name:<19}{lang:<6}{name:<10}{len(text):>9}{legacy_time * 1000:>12.3f}"
+                      f"{new_time * 1000:>14.3f}{legacy_time / new_time:>8.1f}x  {'✅' if same else '❌'}")
+
+    print("-" * 85)
+    print(f"Output mismatches: {mismatches}")
+    return mismatches
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() == 0 else 1)
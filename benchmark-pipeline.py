@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite: Property Taxes Data Pipeline
+=============================================
+Times and memory-profiles every stage of the notes pipeline on synthetic
+datasets (synthetic_dataset.py) of the requested sizes:
+
+- migrations: step0 → step3, country warnings, single-pass migrate_notes
+- generate_review_file, smart_categorize (every review item), auto_fill_review
+  (without cache, then with a warm categorization cache)
+- apply_manual_review
+
+Each stage is timed --repeat times (the fastest wall / CPU time is kept),
+then run once more under tracemalloc for the peak memory (skipped with
+--no-memory, tracemalloc slows Python down).
+
+The results are written to a JSON file. With --baseline=<previous results>
+every stage slower than the baseline by more than REGRESSION_THRESHOLD is
+reported and the script exits with 1.
+
+Usage: python benchmark-pipeline.py [count ...] [--output=file] [--baseline=file] [--seed=N] [--repeat=N] [--no-memory]
+"""
+
+import contextlib
+import importlib.util
+import io
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import migrate_notes
+from categorize_cache import CategorizeCache
+from synthetic_dataset import DEFAULT_SEED, load_samples, write_dataset
+
+script_dir = Path(__file__).parent
+
+DEFAULT_COUNTS = [1000]
+DEFAULT_REPEAT = 3
+REGRESSION_THRESHOLD = 0.2
+
+
+def load_script(filename):
+    """Import a hyphenated script as a module."""
+    spec = importlib.util.spec_from_file_location(filename.replace('-', '_')[:-3], script_dir / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(run, setup=None, memory=True, repeat=DEFAULT_REPEAT):
+    """
+    Run a stage with its output silenced.
+
+    Args:
+        run: Function running the stage
+        setup: Function called before every run (not measured)
+        memory: Also measure the peak memory (one more run under tracemalloc)
+        repeat: Number of timed runs (the fastest one is kept)
+
+    Returns:
+        dict: wallSeconds, cpuSeconds, peakMemoryBytes (None without memory)
+    """
+    wall = cpu = float('inf')
+    peak = None
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            if setup:
+                setup()
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            run()
+            wall = min(wall, time.perf_counter() - wall_start)
+            cpu = min(cpu, time.process_time() - cpu_start)
+
+        if memory:
+            if setup:
+                setup()
+            tracemalloc.start()
+            try:
+                run()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+    return {'wallSeconds': round(wall, 4), 'cpuSeconds': round(cpu, 4), 'peakMemoryBytes': peak}
+
+
+def build_stages(work_dir, dataset_file):
+    """
+    List the stages to measure on one dataset.
+
+    Returns:
+        list of (name, run, setup, records) where records counts the items the
+        stage processes (None: every country of the dataset)
+    """
+    step0 = load_script('migrate-property-tax-notes-step0.py')
+    step1 = load_script('migrate-property-tax-notes-step1.py')
+    step2 = load_script('migrate-property-tax-notes-step2.py')
+    step3 = load_script('migrate-property-tax-notes-step3.py')
+    warnings = load_script('migrate-country-warnings.py')
+    generate = load_script('generate-review-file.py')
+    auto_fill = load_script('auto-fill-review.py')
+    apply = load_script('apply-manual-review.py')
+
+    output_file = work_dir / 'output.json'
+    backup_file = work_dir / 'backup.json'
+    review_file = work_dir / 'review.json'
+    filled_file = work_dir / 'review-filled.json'
+    apply_file = work_dir / 'apply.json'
+    cache_file = work_dir / 'categorize-cache.json'
+
+    def review_items():
+        with open(review_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def categorize_all():
+        for item in review_items():
+            auto_fill.smart_categorize(item['currentNotes'], item['lang'])
+
+    def migration(function):
+        return lambda: function(dataset_file, output_file, backup_file)
+
+    return [
+        ('migrate_property_taxes_step0', migration(step0.migrate_property_taxes_step0), None, None),
+        ('migrate_property_taxes_step1', migration(step1.migrate_property_taxes_step1), None, None),
+        ('migrate_property_taxes_step2', migration(step2.migrate_property_taxes_step2), None, None),
+        ('migrate_property_taxes_step3', migration(step3.migrate_property_taxes_step3), None, None),
+        ('migrate_country_warnings', migration(warnings.migrate_country_warnings), None, None),
+        ('migrate_notes', migration(migrate_notes.migrate_notes), None, None),
+        ('generate_review_file', lambda: generate.generate_review_file(dataset_file, review_file), None, None),
+        ('smart_categorize', categorize_all, None, lambda: len(review_items())),
+        ('auto_fill_review', lambda: auto_fill.auto_fill_review(review_file, filled_file), None,
+         lambda: len(review_items())),
+        # The first timed run fills the cache, the fastest one is a warm run
+        ('auto_fill_review_cached', lambda: auto_fill.auto_fill_review(
+            review_file, filled_file, cache=CategorizeCache(cache_file, auto_fill.CATEGORIZE_VERSION)), None,
+         lambda: len(review_items())),
+        ('apply_manual_review', lambda: apply.apply_manual_review(filled_file, apply_file, backup_file),
+         lambda: shutil.copyfile(dataset_file, apply_file), lambda: len(review_items())),
+    ]
+
+
+def run_benchmarks(count, samples, seed, memory, repeat):
+    """
+    Generate a dataset of count countries and measure every stage on it.
+
+    Returns:
+        list of result dicts
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix='benchmark-pipeline-') as work_dir:
+        work_dir = Path(work_dir)
+        dataset_file = work_dir / 'property-taxes.json'
+
+        print(f"🔄 Generating {count} countries...")
+        write_dataset(dataset_file, count, samples, seed)
+
+        for name, run, setup, records in build_stages(work_dir, dataset_file):
+            result = measure(run, setup, memory, repeat)
+            result.update({'name': name, 'countries': count, 'records': records() if records else count})
+            result['recordsPerSecond'] = round(result['records'] / result['wallSeconds'], 1) if result['wallSeconds'] else None
+            results.append(result)
+
+            peak = f"{result['peakMemoryBytes'] / 1e6:>9.1f}" if result['peakMemoryBytes'] is not None else f"{'-':>9}"
+            print(f"  {name:<30}{result['records']:>9}{result['wallSeconds']:>10.3f}{result['cpuSeconds']:>10.3f}{peak}")
+
+    return results
+
+
+def find_regressions(results, baseline_file):
+    """
+    Compare wall times with a previous results file.
+
+    Returns:
+        list of (name, countries, baseline_seconds, seconds)
+    """
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    previous = {(r['name'], r['countries']): r['wallSeconds'] for r in baseline['results']}
+    regressions = []
+    for result in results:
+        before = previous.get((result['name'], result['countries']))
+        if before and result['wallSeconds'] > before * (1 + REGRESSION_THRESHOLD):
+            regressions.append((result['name'], result['countries'], before, result['wallSeconds']))
+    return regressions
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = dict(arg[2:].split('=', 1) for arg in sys.argv[1:] if arg.startswith('--') and '=' in arg)
+    counts = [int(arg) for arg in args] or DEFAULT_COUNTS
+    seed = int(options.get('seed', DEFAULT_SEED))
+    output_file = Path(options.get('output', script_dir / 'benchmark-results.json'))
+    repeat = int(options.get('repeat', DEFAULT_REPEAT))
+    memory = '--no-memory' not in sys.argv
+
+    samples = load_samples(script_dir / 'property-taxes-manual-review-filled.json')
+
+    print("=" * 70)
+    print("PIPELINE BENCHMARK")
+    print("=" * 70)
+    print(f"  {'stage':<30}{'records':>9}{'wall s':>10}{'cpu s':>10}{'peak MB':>9}")
+
+    results = []
+    for count in counts:
+        results.extend(run_benchmarks(count, samples, seed, memory, repeat))
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'repeat': repeat,
+        'results': results,
+    }
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print()
+    print(f"💾 Results saved to: {output_file}")
+
+    if 'baseline' in options:
+        regressions = find_regressions(results, options['baseline'])
+        print()
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) over {REGRESSION_THRESHOLD:.0%}:")
+            for name, count, before, after in regressions:
+                print(f"  - {name} ({count} countries): {before:.3f}s → {after:.3f}s")
+            return 1
+        print(f"✅ No regression over {REGRESSION_THRESHOLD:.0%} against {options['baseline']}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,113 +2,70 @@
 """
 Calculate vacation rental profitability for all destinations
 Based on research data from agent tasks
+
+The research data is read from profitability_data.json (schema checked by
+profitability_inputs.py, --data=file to use another file). The results are
+recomputed incrementally: the hash of the inputs of every city is kept in
+profitability_results.manifest.json (next to the results), and only the
+cities whose inputs changed, or that are not in the results yet, are
+recomputed and merged into the existing profitability_results.json (--full
+recomputes everything). The results file keeps the order of the data file;
+an export stage then adds the derived fields read by the hotspots view
+(averages, revenue bucket, ranks, see export_hotspot_metrics()).
+
+Usage: python calculate_profitability.py [--data=file] [--output=file] [--full]
+           profitability of the 50 / 100 / 200 m² units of every city
+       python calculate_profitability.py [--currencies=EUR,GBP] [--fx=fx_rates.json] [--fx-date=YYYY-MM-DD]
+           same, with the amounts of every city also in the display
+           currencies (profitability_fx.py)
+       python calculate_profitability.py --grid[=start:stop:step] [--interpolation=pchip|linear]
+           profitability of every city at every surface of the range
+           (default 20:300:5), computed by profitability_engine.py
+       python calculate_profitability.py --simulate[=draws] [--workers=N] [--seed=N]
+                                         [--distributions=file] [--surfaces=50,100,200]
+           Monte Carlo P10 / P50 / P90 yields and probability of a negative
+           net return (profitability_simulation.py)
+       python calculate_profitability.py --financing [--ltv=0,0.5,0.7,0.8] [--rate=0.04,0.06,0.08]
+                                         [--term=15,20,25] [--surfaces=50,100,200]
+           leveraged scenario cube: cash-on-cash, DSCR, payback period
+           (profitability_financing.py)
+       python calculate_profitability.py --taxes[=property-taxes.json] [--holding-years=10]
+                                         [--surfaces=50,100,200]
+           net-after-tax profitability, with the property and transfer taxes
+           of the country of each city (profitability_taxes.py)
+       python calculate_profitability.py --portfolio[=start:stop:step] [--max-per-city=1]
+                                         [--max-per-country=N] [--top=5] [--surfaces=50,100,200]
+           top-k portfolios of units maximizing the net income of every
+           budget of the sweep (default 100000:2000000:100000,
+           profitability_portfolio.py)
+       python calculate_profitability.py --seasonal [--profiles=file] [--surfaces=50,100,200]
+           annual gross / net revenue, yield and worst-month cash flow with
+           the seasonal profile of each city (profitability_seasonal.py;
+           --profiles reads the profiles of a separate file, e.g. the
+           illustrative profitability_seasonal.example.json)
+
+Every mode takes --data=file and --output=file. The figures of the cities
+given in another currency than USD are converted with the rates of
+fx_rates.json (profitability_fx.py) before any computation.
 """
 
 import json
+import sys
+import time
+from pathlib import Path
 
-# Research data compiled from agent tasks
-profitability_data = {
-    "CUN": {  # Cancún
-        "pricePerSqm": 1800,
-        "expenseRatio": 0.61,
-        "monthlyRevenue": {"50": 1000, "100": 2000, "200": 3500}
-    },
-    "IST": {  # Istanbul
-        "pricePerSqm": 2850,
-        "expenseRatio": 0.40,
-        "monthlyRevenue": {"50": 1000, "100": 1600, "200": 2600}
-    },
-    "DXB": {  # Dubai
-        "pricePerSqm": 5500,
-        "expenseRatio": 0.40,
-        "monthlyRevenue": {"50": 1815, "100": 3970, "200": 6250}
-    },
-    "LIS": {  # Lisbon
-        "pricePerSqm": 4850,
-        "expenseRatio": 0.50,
-        "monthlyRevenue": {"50": 1750, "100": 3000, "200": 4750}
-    },
-    "PDC": {  # Playa del Carmen
-        "pricePerSqm": 4000,
-        "expenseRatio": 0.45,
-        "monthlyRevenue": {"50": 1350, "100": 2400, "200": 4250}
-    },
-    "OPO": {  # Porto
-        "pricePerSqm": 4610,
-        "expenseRatio": 0.50,
-        "monthlyRevenue": {"50": 1200, "100": 2150, "200": 3500}
-    },
-    "ROM": {  # Rome
-        "pricePerSqm": 4200,
-        "expenseRatio": 0.625,
-        "monthlyRevenue": {"50": 2800, "100": 3850, "200": 5750}
-    },
-    "ATH": {  # Athens
-        "pricePerSqm": 3600,
-        "expenseRatio": 0.645,
-        "monthlyRevenue": {"50": 1800, "100": 2500, "200": 3600}
-    },
-    "MIA": {  # Miami
-        "pricePerSqm": 10000,
-        "expenseRatio": 0.59,
-        "monthlyRevenue": {"50": 3150, "100": 4600, "200": 7500}
-    },
-    "TUL": {  # Tulum
-        "pricePerSqm": 2685,
-        "expenseRatio": 0.665,
-        "monthlyRevenue": {"50": 1400, "100": 2650, "200": 7000}
-    },
-    "UBU": {  # Bali (Ubud)
-        "pricePerSqm": 825,
-        "expenseRatio": 0.62,
-        "monthlyRevenue": {"50": 550, "100": 1150, "200": 2250}
-    },
-    "JTR": {  # Santorini
-        "pricePerSqm": 7625,
-        "expenseRatio": 0.50,
-        "monthlyRevenue": {"50": 3450, "100": 6250, "200": 12500}
-    },
-    "PRG": {  # Prague
-        "pricePerSqm": 5450,
-        "expenseRatio": 0.40,
-        "monthlyRevenue": {"50": 2200, "100": 4000, "200": 7000}
-    },
-    "BUD": {  # Budapest
-        "pricePerSqm": 4400,
-        "expenseRatio": 0.575,
-        "monthlyRevenue": {"50": 1400, "100": 2600, "200": 4750}
-    },
-    "RAK": {  # Marrakech
-        "pricePerSqm": 1675,
-        "expenseRatio": 0.50,
-        "monthlyRevenue": {"50": 1500, "100": 2800, "200": 5500}
-    },
-    "CNX": {  # Chiang Mai
-        "pricePerSqm": 2445,
-        "expenseRatio": 0.30,
-        "monthlyRevenue": {"50": 775, "100": 1400, "200": 2850}
-    },
-    "KRK": {  # Krakow
-        "pricePerSqm": 4400,
-        "expenseRatio": 0.60,
-        "monthlyRevenue": {"50": 1200, "100": 1800, "200": 2850}
-    },
-    "SPU": {  # Split
-        "pricePerSqm": 3750,
-        "expenseRatio": 0.50,
-        "monthlyRevenue": {"50": 1850, "100": 2600, "200": 4000}
-    },
-    "FAO": {  # Algarve (Albufeira)
-        "pricePerSqm": 4150,
-        "expenseRatio": 0.55,
-        "monthlyRevenue": {"50": 2200, "100": 3100, "200": 4850}
-    },
-    "VLC": {  # Valencia
-        "pricePerSqm": 3630,
-        "expenseRatio": 0.60,
-        "monthlyRevenue": {"50": 1800, "100": 2500, "200": 4000}
-    }
-}
+from migration_manifest import MigrationManifest
+from profitability_inputs import DATA_FILENAME, DEFAULT_CURRENCY, PROFILE_FIELDS, load_profitability_data, \
+    load_seasonal_profiles
+from property_taxes_io import record_hash
+
+RESULTS_FILENAME = 'profitability_results.json'
+# Revenue filter of the hotspots view, on the average monthly revenue (USD)
+HIGH_REVENUE = 2000
+LOW_REVENUE = 1000
+# Columns ranked by the export stage (1 = highest value), the ones the
+# hotspots view sorts by (RANKED_SORT_COLUMNS of vacation-rental-hotspots.js)
+RANKED_COLUMNS = ('averageProfitability', 'averageMonthlyRevenue', 'pricePerSqm', 'netMargin')
 
 def calculate_profitability(price_per_sqm, monthly_revenue, surface, expense_ratio):
     """
@@ -131,43 +88,173 @@ def calculate_profitability(price_per_sqm, monthly_revenue, surface, expense_rat
 
     return round(profitability, 1)
 
-def main():
-    results = {}
+def city_profitability(data):
+    """
+    Profitability of the units of one city, as stored in profitability_results.json.
 
-    for city_code, data in profitability_data.items():
-        price_per_sqm = data["pricePerSqm"]
-        expense_ratio = data["expenseRatio"]
-
-        # Calculate for each size
-        profitability_by_size = {}
-        for size in ["50", "100", "200"]:
-            monthly_rev = data["monthlyRevenue"][size]
-            prof = calculate_profitability(
-                price_per_sqm,
-                monthly_rev,
-                int(size),
-                expense_ratio
-            )
-            profitability_by_size[f"{size}m2"] = {
-                "profitability": prof,
-                "monthlyRevenue": monthly_rev,
-                "propertyPrice": price_per_sqm * int(size)
-            }
-
-        results[city_code] = {
-            "pricePerSqm": price_per_sqm,
-            "expenseRatio": round(expense_ratio * 100, 1),
-            "netMargin": round((1 - expense_ratio) * 100, 1),
-            "profitabilityBySize": profitability_by_size
+    Args:
+        data: Research data of the city (pricePerSqm, expenseRatio, monthlyRevenue)
+
+    Returns:
+        dict: {pricePerSqm, expenseRatio, netMargin, profitabilityBySize}
+    """
+    price_per_sqm = data["pricePerSqm"]
+    expense_ratio = data["expenseRatio"]
+
+    # Calculate for each size
+    profitability_by_size = {}
+    for size in sorted(data["monthlyRevenue"], key=int):
+        monthly_rev = data["monthlyRevenue"][size]
+        prof = calculate_profitability(
+            price_per_sqm,
+            monthly_rev,
+            int(size),
+            expense_ratio
+        )
+        profitability_by_size[f"{size}m2"] = {
+            "profitability": prof,
+            "monthlyRevenue": monthly_rev,
+            "propertyPrice": price_per_sqm * int(size)
         }
 
+    return {
+        "pricePerSqm": price_per_sqm,
+        "expenseRatio": round(expense_ratio * 100, 1),
+        "netMargin": round((1 - expense_ratio) * 100, 1),
+        "profitabilityBySize": profitability_by_size
+    }
+
+def revenue_bucket(average_revenue):
+    """Revenue filter bucket of the hotspots view: 'high', 'medium' or 'low'."""
+    if average_revenue > HIGH_REVENUE:
+        return 'high'
+    if average_revenue >= LOW_REVENUE:
+        return 'medium'
+    return 'low'
+
+def export_hotspot_metrics(results):
+    """
+    Export stage: add the derived fields the hotspots view reads, so the
+    browser does not recompute them on every render / keystroke.
+
+    Every city gets averageProfitability and averageMonthlyRevenue (over
+    its surfaces), revenueBucket (revenue filter) and ranks (position of
+    the city in each of RANKED_COLUMNS, 1 = highest, ties share a rank).
+    The ranks depend on all the cities, so the stage runs on the merged
+    results on every run.
+
+    Args:
+        results: {city code: result of city_profitability()} (updated)
+    """
+    for result in results.values():
+        sizes = list(result['profitabilityBySize'].values())
+        average_revenue = sum(size['monthlyRevenue'] for size in sizes) / len(sizes)
+        result['averageProfitability'] = round(sum(size['profitability'] for size in sizes) / len(sizes), 1)
+        result['averageMonthlyRevenue'] = round(average_revenue, 1)
+        result['revenueBucket'] = revenue_bucket(average_revenue)
+
+    for result in results.values():
+        result['ranks'] = {}
+    for column in RANKED_COLUMNS:
+        values = sorted((result[column] for result in results.values()), reverse=True)
+        first = {}
+        for position, value in enumerate(values, start=1):
+            first.setdefault(value, position)
+        for result in results.values():
+            result['ranks'][column] = first[result[column]]
+
+def manifest_path(output_file):
+    """Manifest of the input hashes of a results file (next to it)."""
+    return Path(output_file).with_name(f"{Path(output_file).stem}.manifest.json")
+
+def city_inputs(data, currencies=(), rate_date=None, fx_table=None):
+    """Everything the result of a city depends on (hashed by the manifest)."""
+    # The display currencies and their rates are inputs too: the rate values,
+    # not only their date, so a corrected rate recomputes the cities
+    if not currencies:
+        return data
+    return {**data, 'displayCurrencies': list(currencies), 'rateDate': rate_date,
+            'displayRates': fx_table.factors(rate_date, currencies).tolist()}
+
+def pending_cities(profitability_data, output_file, currencies=(), rate_date=None, fx_table=None):
+    """
+    Number of cities a run would recompute, from the results file and the
+    manifest on disk.
+    """
+    output_file = Path(output_file)
+    if not output_file.exists():
+        return len(profitability_data)
+    with open(output_file, 'r', encoding='utf-8') as f:
+        results = json.load(f)
+    manifest = MigrationManifest(manifest_path(output_file), 'inputs')
+    return sum(1 for city_code, data in profitability_data.items()
+               if city_code not in results
+               or manifest.previous.get(city_code) != record_hash(city_inputs(data, currencies, rate_date, fx_table)))
+
+def main(profitability_data, output_file, full=False, fx_table=None, rate_date=None, currencies=()):
+    """
+    Recompute the cities whose inputs changed and merge them into the results.
+
+    Args:
+        profitability_data: Research data in the base currency (see
+            profitability_fx.normalize_inputs())
+        output_file: profitability_results.json (read, then updated)
+        full: Recompute every city, whatever the manifest says
+        fx_table: FxTable of the display currencies
+        rate_date: Date of the rates of the display currencies
+        currencies: Display currencies (amounts of each city also given in
+            these currencies, under displayCurrencies)
+
+    Returns:
+        dict: {cities, recomputed, unchanged, removed, pending}; pending is
+        the number of cities the next run would recompute (0 when the
+        results and the manifest are in sync)
+    """
+    output_file = Path(output_file)
+    manifest = MigrationManifest(manifest_path(output_file), 'inputs')
+
+    previous = {}
+    if output_file.exists() and not full:
+        with open(output_file, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+
+    results = {}
+    recomputed = []
+    for city_code, data in profitability_data.items():
+        inputs = city_inputs(data, currencies, rate_date, fx_table)
+        if city_code in previous and manifest.is_current(city_code, record_hash(inputs)):
+            results[city_code] = previous[city_code]
+            continue
+        results[city_code] = city_profitability(data)
+        manifest.update(city_code, inputs)
+        recomputed.append(city_code)
+
+    if currencies and recomputed:
+        # NumPy is only needed for the display currencies
+        from profitability_fx import display_currencies
+
+        display = display_currencies({city_code: results[city_code] for city_code in recomputed},
+                                     fx_table, rate_date, currencies)
+        for city_code, amounts in display.items():
+            results[city_code]['displayCurrencies'] = amounts
+
+    removed = [city_code for city_code in previous if city_code not in results]
+    export_hotspot_metrics(results)
+    stats = {
+        'cities': len(results),
+        'recomputed': len(recomputed),
+        'unchanged': len(results) - len(recomputed),
+        'removed': len(removed),
+    }
+
     # Print results
     print("=" * 80)
     print("VACATION RENTAL NET PROFITABILITY ANALYSIS")
     print("=" * 80)
     print()
 
-    for city_code, result in sorted(results.items()):
+    for city_code in sorted(recomputed):
+        result = results[city_code]
         print(f"\n{city_code}:")
         print(f"  Price/m²: ${result['pricePerSqm']:,}")
         print(f"  Expense Ratio: {result['expenseRatio']}%")
@@ -176,13 +263,371 @@ def main():
         for size, data in result['profitabilityBySize'].items():
             print(f"    {size}: {data['profitability']}% (${data['monthlyRevenue']}/mo, ${data['propertyPrice']:,} property)")
 
-    # Save to JSON
-    with open('/Users/chancebet/Proj/pickandtip/siteapp/profitability_results.json', 'w') as f:
+    print()
+    print(f"Recomputed: {stats['recomputed']}  Unchanged: {stats['unchanged']}  Removed: {stats['removed']}")
+
+    # Save to JSON (untouched when nothing changed), then the hashes of the
+    # inputs it was computed from, even when the results did not change
+    # (e.g. first run on the committed results, without manifest)
+    if results != previous or not output_file.exists():
+        with open(output_file, 'w') as f:
+            json.dump(results, f, indent=2)
+        saved = f"Results saved to {output_file}"
+    else:
+        saved = f"No city changed, {output_file} left untouched"
+    if manifest.hashes != manifest.previous or not manifest.path.exists():
+        manifest.save()
+
+    # Second-run check: the next run must find every city current
+    stats['pending'] = pending_cities(profitability_data, output_file, currencies, rate_date, fx_table)
+    if stats['pending']:
+        print(f"⚠️  {stats['pending']} city(ies) would be recomputed again by the next run")
+
+    print("\n" + "=" * 80)
+    print(saved)
+    print("=" * 80)
+    return stats
+
+def write_grid(profitability_data, surfaces, method, output_file):
+    """
+    Compute the profitability grid of every city x surface and save it.
+
+    Args:
+        profitability_data: Research data (see profitability_inputs.py)
+        surfaces: (start, stop, step) of the surfaces, in m²
+        method: Revenue interpolation between the known surfaces ('pchip' or 'linear')
+        output_file: Output JSON file
+    """
+    # NumPy is only needed for the grid
+    from profitability_engine import profitability_grid, surface_range
+
+    grid = profitability_grid(profitability_data, surface_range(*surfaces), method)
+
+    print("=" * 80)
+    print("VACATION RENTAL PROFITABILITY GRID")
+    print("=" * 80)
+    print(f"Surfaces: {grid['surfaces'][0]}-{grid['surfaces'][-1]} m² ({len(grid['surfaces'])} points, {method})")
+    print(f"Cities:   {len(grid['cities'])}")
+    print()
+
+    for city_code, city in sorted(grid['cities'].items()):
+        best = max(range(len(grid['surfaces'])), key=lambda i: city['profitability'][i])
+        print(f"  {city_code}: best {city['profitability'][best]}% at {grid['surfaces'][best]} m²")
+
+    with open(output_file, 'w') as f:
+        json.dump(grid, f, indent=2)
+
+    print("\n" + "=" * 80)
+    print(f"Grid saved to {output_file}")
+    print("=" * 80)
+
+def write_simulation(profitability_data, surfaces, draws, workers, seed, distributions_file, output_file):
+    """
+    Simulate the yields of every city x surface and save their distribution.
+
+    Args:
+        profitability_data: Research data (see profitability_inputs.py)
+        surfaces: Surfaces to simulate (m²)
+        draws: Number of draws per city
+        workers: Number of worker processes
+        seed: Seed of the run
+        distributions_file: Optional JSON file of input distributions
+        output_file: Output JSON file
+    """
+    # NumPy is only needed for the simulation
+    from profitability_simulation import simulate
+
+    print("=" * 80)
+    print("VACATION RENTAL PROFITABILITY SIMULATION")
+    print("=" * 80)
+    print(f"Draws:    {draws:,} per city ({workers} worker{'s' if workers > 1 else ''}, seed {seed})")
+    print(f"Surfaces: {', '.join(f'{s:g}' for s in surfaces)} m²")
+    print()
+
+    start = time.perf_counter()
+    simulation = simulate(profitability_data, surfaces, draws=draws, workers=workers, seed=seed,
+                          distributions_file=distributions_file)
+    seconds = time.perf_counter() - start
+
+    def percentile(value):
+        return 'out of range' if value is None else f"{value}%"
+
+    for city_code, city in sorted(simulation['cities'].items()):
+        print(f"\n{city_code}:")
+        for size, data in city.items():
+            out_of_range = data['belowRange'] + data['aboveRange']
+            print(f"    {size}: P10 {percentile(data['p10'])}  P50 {percentile(data['p50'])}"
+                  f"  P90 {percentile(data['p90'])}  (negative: {data['probNegative']:.2%})"
+                  + (f"  ⚠️ {out_of_range:.2%} out of the histogram range" if out_of_range else ""))
+
+    with open(output_file, 'w') as f:
+        json.dump(simulation, f, indent=2)
+
+    print("\n" + "=" * 80)
+    print(f"Simulation saved to {output_file} ({seconds:.1f}s)")
+    print("=" * 80)
+
+def write_financing(profitability_data, surfaces, ltvs, rates, terms, output_file):
+    """
+    Compute the financing scenario cube of every city x surface and save it.
+
+    Args:
+        profitability_data: Research data (see profitability_inputs.py)
+        surfaces: Surfaces (m²)
+        ltvs: Loan-to-value ratios (0-1)
+        rates: Annual interest rates (0.05 = 5%)
+        terms: Loan terms (years)
+        output_file: Output JSON file
+    """
+    # NumPy is only needed for the financing cube
+    from profitability_financing import financing_scenarios
+
+    cube = financing_scenarios(profitability_data, surfaces, ltvs, rates, terms)
+
+    # Reference scenario of the summary: highest LTV, middle rate, longest term
+    ltv, rate, term = len(ltvs) - 1, len(rates) // 2, len(terms) - 1
+
+    print("=" * 80)
+    print("VACATION RENTAL FINANCING SCENARIOS")
+    print("=" * 80)
+    print(f"Scenarios: {len(ltvs)} LTV x {len(rates)} rates x {len(terms)} terms"
+          f" x {len(cube['surfaces'])} surfaces x {len(cube['cities'])} cities")
+    print(f"Summary at LTV {ltvs[ltv]:.0%}, {rates[rate]:.2%}, {terms[term]:g} years:")
+
+    for city_code, city in sorted(cube['cities'].items()):
+        print(f"\n{city_code}:")
+        for i, surface in enumerate(cube['surfaces']):
+            cash_on_cash = city['cashOnCash'][i][ltv][rate][term]
+            dscr = city['dscr'][i][ltv][rate][term]
+            payback = city['paybackYears'][i][ltv][rate][term]
+            print(f"    {surface}m2: cash-on-cash {'n/a' if cash_on_cash is None else f'{cash_on_cash}%'},"
+                  f" DSCR {'n/a' if dscr is None else dscr},"
+                  f" payback {'never' if payback is None else f'{payback} years'}")
+
+    with open(output_file, 'w') as f:
+        json.dump(cube, f, indent=2)
+
+    print("\n" + "=" * 80)
+    print(f"Scenario cube saved to {output_file}")
+    print("=" * 80)
+
+def write_after_tax(profitability_data, property_taxes_file, surfaces, holding_years, output_file):
+    """
+    Compute the net-after-tax profitability of every city x surface and save it.
+
+    Args:
+        profitability_data: Research data (see profitability_inputs.py)
+        property_taxes_file: Path to property-taxes.json
+        surfaces: Surfaces (m²)
+        holding_years: Years the transfer tax is amortized over
+        output_file: Output JSON file
+
+    Returns:
+        dict: Results (with the join errors)
+    """
+    # NumPy is only needed for the after-tax grid
+    from profitability_taxes import after_tax_profitability
+    from property_taxes_dataset import PropertyTaxesDataset
+
+    dataset = PropertyTaxesDataset.load(property_taxes_file)
+    results = after_tax_profitability(profitability_data, dataset, surfaces, holding_years)
+
+    print("=" * 80)
+    print("VACATION RENTAL NET-AFTER-TAX PROFITABILITY")
+    print("=" * 80)
+    print(f"Property taxes: {property_taxes_file}")
+    print(f"Transfer tax amortized over {holding_years:g} years")
+
+    for city_code, city in sorted(results['cities'].items()):
+        print(f"\n{city_code} ({city['countryCode']}): property tax {city['propertyTaxRate']}%/yr,"
+              f" transfer tax {city['transferTaxRate']}%")
+        for size in (f"{s}m2" for s in results['surfaces']):
+            data = city[size]
+            print(f"    {size}: {data['profitability']}% -> {data['netAfterTax']}% after tax")
+
+    if results['errors']:
+        print()
+        print("Error details:")
+        for error in results['errors']:
+            print(f"  - {error}")
+
+    with open(output_file, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print("\n" + "=" * 80)
+    print(f"Results saved to {output_file}")
+    print("=" * 80)
+    return results
+
+def write_portfolios(profitability_data, budgets, surfaces, max_per_city, max_per_country, top, output_file):
+    """
+    Optimize the portfolios of every budget of the sweep and save them.
+
+    Args:
+        profitability_data: Research data (see profitability_inputs.py)
+        budgets: Capital budgets (USD)
+        surfaces: Surfaces of the units (m², None: the research surfaces)
+        max_per_city: Maximum number of units per city
+        max_per_country: Maximum number of units per country (None: no limit)
+        top: Number of portfolios per budget
+        output_file: Output JSON file
+    """
+    # NumPy is only needed for the optimizer
+    from profitability_portfolio import optimize_portfolios
+
+    start = time.perf_counter()
+    results = optimize_portfolios(profitability_data, budgets, surfaces, max_per_city, max_per_country, top)
+    seconds = time.perf_counter() - start
+
+    print("=" * 80)
+    print("VACATION RENTAL PORTFOLIO OPTIMIZATION")
+    print("=" * 80)
+    print(f"Budgets:  ${budgets[0]:,}-${budgets[-1]:,} ({len(budgets)} budgets, top {top})")
+    print(f"Units:    max {max_per_city} per city"
+          + (f", max {max_per_country} per country" if max_per_country is not None else ""))
+    print()
+
+    for budget in results['budgets']:
+        if not budget['portfolios']:
+            print(f"  ${budget['budget']:,}: no unit affordable")
+            continue
+        best = budget['portfolios'][0]
+        units = ', '.join(f"{unit['city']} {unit['surface']}" for unit in best['units'])
+        print(f"  ${budget['budget']:,}: ${best['annualNetIncome']:,}/yr ({best['netYield']}%) - {units}")
+
+    with open(output_file, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print("\n" + "=" * 80)
+    print(f"Portfolios saved to {output_file} ({seconds:.2f}s)")
+    print("=" * 80)
+
+def write_seasonal(profitability_data, surfaces, output_file):
+    """
+    Compute the seasonal profitability of every city x surface and save it.
+
+    Args:
+        profitability_data: Research data (see profitability_inputs.py)
+        surfaces: Surfaces (m², None: the research surfaces)
+        output_file: Output JSON file
+    """
+    # NumPy is only needed for the seasonal model
+    from profitability_seasonal import seasonal_profitability
+
+    start = time.perf_counter()
+    results = seasonal_profitability(profitability_data, surfaces)
+    seconds = time.perf_counter() - start
+
+    print("=" * 80)
+    print("VACATION RENTAL SEASONAL PROFITABILITY")
+    print("=" * 80)
+    if not any(field in data for data in profitability_data.values() for field in PROFILE_FIELDS):
+        print("⚠️  No seasonal profile: every city has a flat year, the yields are the ones of the"
+              " research (--profiles=file)")
+
+    for city_code, city in sorted(results['cities'].items()):
+        occupancy = city['averageOccupancy']
+        print(f"\n{city_code}: occupancy {'n/a' if occupancy is None else f'{occupancy:.0%}'}")
+        for size in (f"{s}m2" for s in results['surfaces']):
+            data = city[size]
+            print(f"    {size}: {data['profitability']}% (${data['annualNetRevenue']:,}/yr net),"
+                  f" worst month {data['worstMonth']} {'-' if data['worstMonthCashFlow'] < 0 else ''}"
+                  f"${abs(data['worstMonthCashFlow']):,}")
+
+    with open(output_file, 'w') as f:
         json.dump(results, f, indent=2)
 
     print("\n" + "=" * 80)
-    print("Results saved to profitability_results.json")
+    print(f"Results saved to {output_file} ({seconds * 1000:.1f} ms)")
     print("=" * 80)
 
 if __name__ == "__main__":
-    main()
+    script_dir = Path(__file__).parent
+    options = dict(arg[2:].split('=', 1) for arg in sys.argv[1:] if arg.startswith('--') and '=' in arg)
+
+    def output(default):
+        return Path(options.get('output', script_dir / default))
+
+    data_file = Path(options.get('data', script_dir / DATA_FILENAME))
+    if not data_file.exists():
+        print(f"❌ Error: Profitability data file not found: {data_file}")
+        sys.exit(1)
+    currencies = options['currencies'].split(',') if options.get('currencies') else []
+    fx_table = rate_date = None
+    try:
+        profitability_data = load_profitability_data(data_file)
+        if currencies or any(data['currency'] != DEFAULT_CURRENCY for data in profitability_data.values()):
+            # NumPy is only needed for the exchange rates
+            from profitability_fx import FX_FILENAME, FxTable, normalize_inputs
+
+            fx_table = FxTable.load(options.get('fx', script_dir / FX_FILENAME))
+            rate_date = fx_table.rate_date(options.get('fx-date'))
+            profitability_data = normalize_inputs(profitability_data, fx_table, rate_date)
+            fx_table.factors(rate_date, currencies)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    if '--grid' in sys.argv or 'grid' in options:
+        from profitability_engine import DEFAULT_GRID
+
+        surfaces = tuple(float(value) for value in options['grid'].split(':')) if 'grid' in options else DEFAULT_GRID
+        write_grid(profitability_data, surfaces, options.get('interpolation', 'pchip'),
+                   output('profitability_grid.json'))
+    elif '--simulate' in sys.argv or 'simulate' in options:
+        from profitability_simulation import DEFAULT_DRAWS, DEFAULT_SEED
+        from worker_pool import parse_workers
+
+        try:
+            write_simulation(profitability_data, [float(s) for s in options.get('surfaces', '50,100,200').split(',')],
+                             int(options.get('simulate', DEFAULT_DRAWS)), parse_workers(sys.argv),
+                             int(options.get('seed', DEFAULT_SEED)), options.get('distributions'),
+                             output('profitability_simulation.json'))
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            sys.exit(1)
+    elif '--financing' in sys.argv:
+        from profitability_financing import DEFAULT_LTVS, DEFAULT_RATES, DEFAULT_TERMS
+
+        def values(name, default):
+            return [float(value) for value in options[name].split(',')] if name in options else list(default)
+
+        write_financing(profitability_data, values('surfaces', [50, 100, 200]), values('ltv', DEFAULT_LTVS),
+                        values('rate', DEFAULT_RATES), values('term', DEFAULT_TERMS),
+                        output('profitability_financing.json'))
+    elif '--taxes' in sys.argv or 'taxes' in options:
+        from profitability_taxes import DEFAULT_HOLDING_YEARS
+
+        property_taxes_file = Path(options.get('taxes', script_dir / '../pickandtip-api/data/topics/property-taxes.json'))
+        if not property_taxes_file.exists():
+            print(f"❌ Error: Property taxes file not found: {property_taxes_file}")
+            sys.exit(1)
+
+        results = write_after_tax(profitability_data, property_taxes_file,
+                                  [float(s) for s in options.get('surfaces', '50,100,200').split(',')],
+                                  float(options.get('holding-years', DEFAULT_HOLDING_YEARS)),
+                                  output('profitability_after_tax.json'))
+        sys.exit(0 if not results['errors'] else 1)
+    elif '--portfolio' in sys.argv or 'portfolio' in options:
+        from profitability_portfolio import DEFAULT_BUDGETS, DEFAULT_TOP, budget_range
+
+        budgets = [float(value) for value in options['portfolio'].split(':')] if 'portfolio' in options else DEFAULT_BUDGETS
+        write_portfolios(profitability_data, budget_range(*budgets),
+                         [float(s) for s in options['surfaces'].split(',')] if 'surfaces' in options else None,
+                         int(options.get('max-per-city', 1)),
+                         int(options['max-per-country']) if 'max-per-country' in options else None,
+                         int(options.get('top', DEFAULT_TOP)), output('profitability_portfolios.json'))
+    elif '--seasonal' in sys.argv:
+        if 'profiles' in options:
+            try:
+                profitability_data = load_seasonal_profiles(options['profiles'], profitability_data)
+            except ValueError as e:
+                print(f"❌ Error: {e}")
+                sys.exit(1)
+        write_seasonal(profitability_data,
+                       [float(s) for s in options['surfaces'].split(',')] if 'surfaces' in options else None,
+                       output('profitability_seasonal.json'))
+    else:
+        stats = main(profitability_data, output(RESULTS_FILENAME), full='--full' in sys.argv,
+                     fx_table=fx_table, rate_date=rate_date, currencies=currencies)
+        sys.exit(0 if not stats['pending'] else 1)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Categorization Cache
+====================
+On-disk memoization of smart_categorize results for auto-fill-review.py.
+
+Most currentNotes strings do not change between two review generations, so
+their categorization is kept in a JSON file keyed by
+sha256(version, lang, text). The version is a hash of the keyword lists
+(and split patterns) of smart_categorize: when they change, the cache file
+no longer matches and is started again from scratch.
+
+Entries are kept in least recently used order and the oldest ones are
+evicted above max_entries.
+
+Layout of the cache file (property-taxes-categorize-cache.json by default):
+
+    {
+      "version": "<keywords hash>",
+      "entries": {"<sha256>": {"propertyTaxNotes": "...", ...}, ...}
+    }
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from pathlib import Path
+
+from property_taxes_io import canonical_json
+
+CACHE_FILENAME = 'property-taxes-categorize-cache.json'
+DEFAULT_MAX_ENTRIES = 100000
+
+
+def content_version(*parts):
+    """Short hash identifying the rules a cached result was computed with."""
+    return hashlib.sha256(canonical_json(parts)).hexdigest()[:16]
+
+
+class CategorizeCache:
+    """
+    LRU cache of categorization results, persisted as JSON.
+
+    Args:
+        path: Cache file
+        version: content_version() of the categorization rules
+        max_entries: Maximum number of cached results
+    """
+
+    def __init__(self, path, version, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = Path(path)
+        self.version = version
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get('version') == version:
+                self.entries.update(cache['entries'])
+            else:
+                # Rules changed: every cached result is stale
+                self.dirty = True
+
+    def __str__(self):
+        return f"{self.path} ({len(self.entries)} entries)"
+
+    def key(self, text, lang):
+        """Cache key of one text."""
+        return hashlib.sha256(f"{self.version}\0{lang.upper()}\0{text}".encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Cached result of a key (marked as most recently used), or None."""
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        if next(reversed(self.entries)) != key:
+            self.entries.move_to_end(key)
+            self.dirty = True
+        return result
+
+    def put(self, key, result):
+        """Store a result, evicting the least recently used entries above max_entries."""
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.dirty = True
+
+    def save(self):
+        """Write the cache file if it changed."""
+        if not self.dirty:
+            return False
+
+        # json.dumps encodes in one C call (json.dump writes chunk by chunk)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'version': self.version, 'entries': self.entries}, ensure_ascii=False))
+        self.dirty = False
+        return True
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Equivalence Check: migrate_notes vs the Step Chain
+==================================================
+Runs every country record through the chain of step scripts (step0 → step3,
+then migrate-country-warnings.py) and through the single pass of
+migrate_notes.py, and compares the resulting records field by field
+(values and key order, i.e. the JSON written).
+
+The records are synthetic (synthetic_dataset.py, the same seed gives the
+same records) plus adversarial notes: warnings in the general text and
+inside sections, repeated and out-of-order headers, empty sections,
+duplicated warnings, whitespace runs, fields already present, the singular
+"Accès étranger:" header.
+
+Usage: python check-migrate-notes.py [count] [--seed=N]
+"""
+
+import contextlib
+import copy
+import importlib.util
+import io
+import json
+import sys
+from pathlib import Path
+
+import migrate_notes
+from synthetic_dataset import DEFAULT_SEED, iter_countries, load_samples
+
+script_dir = Path(__file__).parent
+
+DEFAULT_COUNT = 2000
+CHAIN_SCRIPTS = [
+    ('migrate-property-tax-notes-step0.py', 'migrate_country_step0'),
+    ('migrate-property-tax-notes-step1.py', 'migrate_country_step1'),
+    ('migrate-property-tax-notes-step2.py', 'migrate_country_step2'),
+    ('migrate-property-tax-notes-step3.py', 'migrate_country_step3'),
+    ('migrate-country-warnings.py', 'migrate_country_warnings_record'),
+]
+
+
+def load_script(filename):
+    """Import a hyphenated script as a module."""
+    spec = importlib.util.spec_from_file_location(filename.replace('-', '_')[:-3], script_dir / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def step_stats():
+    """Statistics dict with every counter the step scripts update."""
+    stats = {key: 0 for key in ['migrated_fr', 'migrated_en', 'no_match_fr', 'no_match_en', 'empty_notes_after',
+                                'warnings_found_fr', 'warnings_found_en', 'no_warnings_fr', 'no_warnings_en']}
+    stats.update(countries_with_notes=[], countries_with_warnings=[], errors=[])
+    return stats
+
+
+def build_cases():
+    """Adversarial notes, FR and EN."""
+    notes = [
+        ("Territoire autonome. ATTENTION: Zone sensible. Taxe foncière annuelle: 0.5%. Accès étrangers: Libre.",
+         "Autonomous territory. WARNING: Sensitive area. Annual property tax: 0.5%. Foreign access: Free."),
+        ("Taxe foncière annuelle: 0.5%. Note: Exonération. Taxe de transfert: 3%.",
+         "Annual property tax: 0.5%. Note: Exemption. Transfer tax: 3%."),
+        ("Taxe de transfert: 3%. Taxe foncière annuelle: 0.5%. Taxe foncière annuelle: 1%.",
+         "Transfer tax: 3%. Annual property tax: 0.5%. Annual property tax: 1%."),
+        ("Taxe foncière annuelle:   Taxe de transfert: 3%. Accès étranger: ",
+         "Annual property tax:   Transfer tax: 3%. Foreign access: "),
+        ("⚠️ Instable.  ⚠️ Instable.  IMPORTANT:  Pas de cadastre.",
+         "⚠️ Unstable.  ⚠️ Unstable.  IMPORTANT:  No land registry."),
+        ("Sans section.\n\nATTENTION:\tRisque.  Fin.", "No section.\n\nWARNING:\tRisk.  End."),
+        ("   Taxe foncière annuelle: 0.2%   ATTENTION: Révision.   ", "   Annual property tax: 0.2%   WARNING: Review.   "),
+        ("Général. Accès étrangers: Interdit. Taxe de transfert: 5%. Note: Récent.",
+         "General. Foreign access: Prohibited. Transfer tax: 5%. Note: Recent."),
+        # Singular FR foreign access header
+        ("Général. Taxe foncière annuelle: 0.5%. Accès étranger: Libre. Taxe de transfert: 3%.",
+         "General. Annual property tax: 0.5%. Foreign access: Free. Transfer tax: 3%."),
+        ("Territoire. Accès étranger: Interdit. ATTENTION: Zone. Taxe foncière annuelle: 1%.",
+         "Territory. Foreign access: Prohibited. WARNING: Zone. Annual property tax: 1%."),
+        ("Taxe de transfert: 5%. Accès étranger: Libre. Accès étrangers: Bail.",
+         "Transfer tax: 5%. Foreign access: Free. Foreign access: Lease."),
+        ("", ""),
+    ]
+    cases = []
+    for index, (fr, en) in enumerate(notes):
+        cases.append({'countryCode': f'A{index}', 'notes': {'fr': fr, 'en': en}})
+        cases.append({'countryCode': f'B{index}', 'notes': {'en': en},
+                      'propertyTaxNotes': {'en': 'Existing.'}, 'countryWarnings': {}})
+    return cases
+
+
+def run_chain(country, steps):
+    """The record after every step script, in order."""
+    country = copy.deepcopy(country)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for step in steps:
+            step(country, step_stats())
+    return country
+
+
+def run_single_pass(country):
+    """The record after migrate_notes.py."""
+    country = copy.deepcopy(country)
+    stats = {'migrated': {field: {'fr': 0, 'en': 0} for field in migrate_notes.SECTION_FIELDS},
+             'empty_notes_after': 0, 'errors': []}
+    migrate_notes.migrate_country_notes(country, stats)
+    return country
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    count = int(args[0]) if args else DEFAULT_COUNT
+    seed = next((int(arg.split('=', 1)[1]) for arg in sys.argv if arg.startswith('--seed=')), DEFAULT_SEED)
+
+    steps = [getattr(load_script(filename), function) for filename, function in CHAIN_SCRIPTS]
+    samples = load_samples(script_dir / 'property-taxes-manual-review-filled.json')
+    countries = list(iter_countries(count, samples, seed)) + build_cases()
+
+    print("=" * 70)
+    print("EQUIVALENCE CHECK: migrate_notes vs step0 → step3 + warnings")
+    print("=" * 70)
+    print(f"Records: {len(countries)} ({count} synthetic, seed {seed})")
+    print()
+
+    mismatches = 0
+    for country in countries:
+        chain = run_chain(country, steps)
+        single = run_single_pass(country)
+        if json.dumps(chain, ensure_ascii=False) != json.dumps(single, ensure_ascii=False):
+            mismatches += 1
+            if mismatches <= 5:
+                fields = [key for key in dict.fromkeys(list(chain) + list(single)) if chain.get(key) != single.get(key)]
+                print(f"❌ {country['countryCode']}: {', '.join(fields) or 'key order'}")
+                for field in fields:
+                    print(f"   chain:       {json.dumps(chain.get(field), ensure_ascii=False)[:200]}")
+                    print(f"   single pass: {json.dumps(single.get(field), ensure_ascii=False)[:200]}")
+
+    print(f"Mismatches: {mismatches}")
+    if not mismatches:
+        print("✅ migrate_notes.py writes the same records as the step chain")
+    return mismatches
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() == 0 else 1)
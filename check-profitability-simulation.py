@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Loss Check: profitability_simulation
+====================================
+Simulates the cities of profitability_data.json with the expense ratio of
+TUL drawn above its research value (0.665 x U(1.2, 1.8), the example of
+profitability_simulation.load_distributions()) and checks that the draws
+whose expenses exceed the revenue come out as negative returns:
+probNegative of every TUL surface must be about P(0.665 x U > 1), the other
+cities keep their default distributions.
+
+Usage: python check-profitability-simulation.py [draws] [--seed=N]
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from profitability_inputs import DATA_FILENAME, load_profitability_data
+from profitability_simulation import DEFAULT_SEED, simulate
+
+script_dir = Path(__file__).parent
+
+DEFAULT_COUNT = 200_000
+CITY = 'TUL'
+LOW, HIGH = 1.2, 1.8
+# Distance allowed between the simulated and the exact probability
+TOLERANCE = 0.01
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    draws = int(args[0]) if args else DEFAULT_COUNT
+    seed = next((int(arg.split('=', 1)[1]) for arg in sys.argv if arg.startswith('--seed=')), DEFAULT_SEED)
+
+    profitability_data = load_profitability_data(script_dir / DATA_FILENAME)
+    ratio = profitability_data[CITY]['expenseRatio']
+    # The net is negative when ratio x U > 1, U uniform on [LOW, HIGH)
+    expected = min(1.0, max(0.0, (HIGH - 1 / ratio) / (HIGH - LOW)))
+
+    print("=" * 70)
+    print("LOSS CHECK: profitability_simulation")
+    print("=" * 70)
+    print(f"{CITY} expenseRatio: {ratio} x U({LOW}, {HIGH}), {draws:,} draws (seed {seed})")
+    print(f"Expected probNegative: {expected:.4f}")
+    print()
+
+    fd, distributions_file = tempfile.mkstemp(suffix='.json')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'cities': {CITY: {'expenseRatio': {'dist': 'uniform', 'low': LOW, 'high': HIGH}}}}, f)
+        simulation = simulate(profitability_data, [50, 100, 200], draws=draws, seed=seed,
+                              distributions_file=distributions_file)
+    finally:
+        os.unlink(distributions_file)
+
+    failures = 0
+    for size, data in simulation['cities'][CITY].items():
+        ok = data['probNegative'] > 0 and abs(data['probNegative'] - expected) <= TOLERANCE
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {CITY} {size}: probNegative {data['probNegative']:.4f}")
+
+    if not failures:
+        print("\n✅ expenses above the revenue give negative returns")
+    return failures
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() == 0 else 1)
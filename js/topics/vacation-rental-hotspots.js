@@ -152,6 +152,61 @@
         return `<span style="color: ${color}; font-weight: 600;">${rate}%</span>`;
     }
 
+    // Average profitability across sizes (precomputed by calculate_profitability.py)
+    function getAverageProfitability(profitability) {
+        if (typeof profitability.averageProfitability === 'number') {
+            return profitability.averageProfitability;
+        }
+        const prof = profitability.profitabilityBySize;
+        return (prof["50m2"].profitability + prof["100m2"].profitability + prof["200m2"].profitability) / 3;
+    }
+
+    // Average monthly revenue across sizes (precomputed by calculate_profitability.py)
+    function getAverageMonthlyRevenue(profitability) {
+        if (typeof profitability.averageMonthlyRevenue === 'number') {
+            return profitability.averageMonthlyRevenue;
+        }
+        const prof = profitability.profitabilityBySize;
+        return (prof["50m2"].monthlyRevenue + prof["100m2"].monthlyRevenue + prof["200m2"].monthlyRevenue) / 3;
+    }
+
+    // Sort columns ranked by calculate_profitability.py (ranks, 1 = highest)
+    // and the value each rank is computed from
+    const RANKED_SORT_COLUMNS = {
+        profitability: { rank: 'averageProfitability', value: getAverageProfitability },
+        revenue: { rank: 'averageMonthlyRevenue', value: getAverageMonthlyRevenue },
+        pricePerSqm: { rank: 'pricePerSqm', value: profitability => profitability.pricePerSqm },
+        netMargin: { rank: 'netMargin', value: profitability => profitability.netMargin }
+    };
+
+    // Sort key of a ranked column, one for the whole list: the exported rank
+    // (negated, so that a higher key is a higher value) when every city with
+    // profitability data has one, the value otherwise; never a mix of both
+    function getRankedSortKey(cities, column) {
+        const { rank, value } = RANKED_SORT_COLUMNS[column];
+        const useRanks = cities
+            .filter(city => city.profitability && city.profitability.profitabilityBySize)
+            .every(city => city.profitability.ranks && typeof city.profitability.ranks[rank] === 'number');
+
+        return profitability => {
+            if (!profitability || !profitability.profitabilityBySize) {
+                return -Infinity;
+            }
+            return useRanks ? -profitability.ranks[rank] : value(profitability);
+        };
+    }
+
+    // Revenue filter bucket (precomputed by calculate_profitability.py)
+    function getRevenueBucket(profitability) {
+        if (profitability.revenueBucket) {
+            return profitability.revenueBucket;
+        }
+        const avgRevenue = getAverageMonthlyRevenue(profitability);
+        if (avgRevenue > 2000) return 'high';
+        if (avgRevenue >= 1000) return 'medium';
+        return 'low';
+    }
+
     // Format profitability with tooltip
     function formatProfitability(city) {
         const lang = window.currentLang;
@@ -162,11 +217,8 @@
 
         const prof = city.profitability.profitabilityBySize;
 
-        // Calculate average profitability across sizes
-        const avg50 = prof["50m2"].profitability;
-        const avg100 = prof["100m2"].profitability;
-        const avg200 = prof["200m2"].profitability;
-        const avgProf = ((avg50 + avg100 + avg200) / 3).toFixed(1);
+        // Average profitability across sizes
+        const avgProf = getAverageProfitability(city.profitability).toFixed(1);
 
         // Color based on profitability
         let color = '#4CAF50';  // Green
@@ -411,17 +463,16 @@
             // Revenue filter (based on profitability)
             let matchesRevenue = true;
             if (selectedRevenue !== 'all' && city.profitability && city.profitability.profitabilityBySize) {
-                const prof = city.profitability.profitabilityBySize;
-                const avgRevenue = (prof["50m2"].monthlyRevenue + prof["100m2"].monthlyRevenue + prof["200m2"].monthlyRevenue) / 3;
-                if (selectedRevenue === 'high') matchesRevenue = avgRevenue > 2000;
-                else if (selectedRevenue === 'medium') matchesRevenue = avgRevenue >= 1000 && avgRevenue <= 2000;
-                else if (selectedRevenue === 'low') matchesRevenue = avgRevenue < 1000;
+                matchesRevenue = getRevenueBucket(city.profitability) === selectedRevenue;
             }
     
             return matchesSearch && matchesRegion && matchesMarket && matchesRevenue;
         });
     
         // Sort
+        const rankedSortKey = RANKED_SORT_COLUMNS[currentSort.column]
+            ? getRankedSortKey(filtered, currentSort.column)
+            : null;
         filtered.sort((a, b) => {
             let aVal, bVal;
     
@@ -435,19 +486,12 @@
                     bVal = b.countryName[window.currentLang] || b.countryName.fr;
                     break;
                 case 'profitability':
-                    // Calculate average profitability for sorting
-                    if (a.profitability && a.profitability.profitabilityBySize) {
-                        const aProf = a.profitability.profitabilityBySize;
-                        aVal = (aProf["50m2"].profitability + aProf["100m2"].profitability + aProf["200m2"].profitability) / 3;
-                    } else {
-                        aVal = 0;
-                    }
-                    if (b.profitability && b.profitability.profitabilityBySize) {
-                        const bProf = b.profitability.profitabilityBySize;
-                        bVal = (bProf["50m2"].profitability + bProf["100m2"].profitability + bProf["200m2"].profitability) / 3;
-                    } else {
-                        bVal = 0;
-                    }
+                case 'revenue':
+                case 'pricePerSqm':
+                case 'netMargin':
+                    // Precomputed rank of the column (see getRankedSortKey)
+                    aVal = rankedSortKey(a.profitability);
+                    bVal = rankedSortKey(b.profitability);
                     break;
                 case 'licensing':
                     aVal = a.licensing.value || 0;
@@ -478,10 +522,7 @@
     
         const workableCities = cityData.filter(c => c.profitability && c.profitability.profitabilityBySize);
         const avgRevenue = workableCities.length > 0
-            ? Math.round(workableCities.reduce((sum, c) => {
-                const prof = c.profitability.profitabilityBySize;
-                return sum + (prof["50m2"].monthlyRevenue + prof["100m2"].monthlyRevenue + prof["200m2"].monthlyRevenue) / 3;
-            }, 0) / workableCities.length)
+            ? Math.round(workableCities.reduce((sum, c) => sum + getAverageMonthlyRevenue(c.profitability), 0) / workableCities.length)
             : 0;
     
         const avgOccupancy = cityData.length > 0
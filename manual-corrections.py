@@ -4,11 +4,18 @@ Manual Corrections for Specific Countries
 ==========================================
 This script applies manual corrections for countries that the auto-categorization
 didn't handle perfectly.
+
+The corrections are declared in patches/manual-corrections.json.
 """
 
-import json
+import sys
 from pathlib import Path
-from datetime import datetime
+
+from backup_store import BackupStore
+from pipeline_metrics import DEFAULT_METRICS_FILENAME, enable_from_argv
+from property_taxes_patch import apply_patch_files
+
+PATCH_FILE = Path(__file__).parent / 'patches' / 'manual-corrections.json'
 
 def apply_manual_corrections(property_taxes_file, backup_file):
     """
@@ -17,86 +24,26 @@ def apply_manual_corrections(property_taxes_file, backup_file):
     Args:
         property_taxes_file: Path to property-taxes.json
         backup_file: Path to backup file
-    """
-    print("=" * 70)
-    print("APPLYING MANUAL CORRECTIONS")
-    print("=" * 70)
-    print(f"Property taxes file: {property_taxes_file}")
-    print(f"Backup file:         {backup_file}")
-    print()
-
-    # Read property taxes file
-    print("📖 Reading property-taxes.json...")
-    with open(property_taxes_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    # Create backup
-    print("💾 Creating backup...")
-    with open(backup_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"✅ Backup saved")
-    print()
-
-    # Manual corrections
-    corrections = {
-        'ZA': {  # South Africa - split "Rates + Transfer Duty progressif"
-            'propertyTaxNotes': {'fr': 'Rates'},
-            'transferTaxNotes': {'fr': 'Transfer Duty progressif'},
-            'notes': {'fr': 'Accès étranger: Pleine propriété sans restriction.'}
-        }
-    }
-
-    print("🔧 Applying manual corrections...")
 
-    for country in data['countries']:
-        code = country['countryCode']
-
-        if code in corrections:
-            print(f"   ✓ {code}: Applying corrections")
-
-            for field, langs in corrections[code].items():
-                if field == 'notes':
-                    # Direct replacement for notes
-                    for lang, value in langs.items():
-                        country['notes'][lang] = value
-                else:
-                    # For other fields, ensure they exist
-                    if field not in country:
-                        country[field] = {}
-
-                    for lang, value in langs.items():
-                        if value:  # Only set if value is not empty
-                            country[field][lang] = value
-
-    # Write updated file
-    print()
-    print("💾 Writing updated property-taxes.json...")
-    with open(property_taxes_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-    print()
-    print("=" * 70)
-    print("✅ MANUAL CORRECTIONS APPLIED")
-    print("=" * 70)
-    print()
-    print("Corrections applied:")
-    for code, changes in corrections.items():
-        print(f"  • {code}:")
-        for field, langs in changes.items():
-            for lang, value in langs.items():
-                if value:
-                    print(f"      {field}.{lang} = \"{value[:60]}...\"")
-    print()
+    Returns:
+        dict: Statistics of apply_patch_files()
+    """
+    return apply_patch_files([PATCH_FILE], property_taxes_file, backup_file, script=Path(__file__).stem)
 
 
 if __name__ == '__main__':
     script_dir = Path(__file__).parent
 
     property_taxes_file = script_dir / '../pickandtip-api/data/topics/property-taxes.json'
-    backup_file = script_dir / f'../pickandtip-api/data/topics/property-taxes.backup-manual-corrections-{datetime.now().strftime("%Y%m%d-%H%M%S")}.json'
+    backup_file = BackupStore(script_dir / '../pickandtip-api/data/topics/backups', label='manual-corrections')
 
     if not property_taxes_file.exists():
         print(f"❌ Error: Property taxes file not found: {property_taxes_file}")
-        exit(1)
+        sys.exit(1)
+
+    enable_from_argv(sys.argv, property_taxes_file.parent / DEFAULT_METRICS_FILENAME)
+
+    stats = apply_manual_corrections(property_taxes_file, backup_file)
 
-    apply_manual_corrections(property_taxes_file, backup_file)
+    # Exit with appropriate code
+    sys.exit(0 if not stats['errors'] and not stats['conflicts'] else 1)
@@ -8,16 +8,23 @@ section from the notes field to a new propertyTaxNotes field.
 The original notes field is preserved but with the property tax section removed.
 """
 
-import json
-import re
 import sys
-from datetime import datetime
 from pathlib import Path
 
+from backup_store import BackupStore
+from migration_manifest import MigrationManifest, MANIFEST_FILENAME
+from notes_tokenizer import tokenize, find_section, cut_section
+from pipeline_metrics import RunMetrics, DEFAULT_METRICS_FILENAME, enable_from_argv
+from property_taxes_io import migrate_countries
+from worker_pool import parse_workers
+
 def extract_property_tax_notes(notes_text, lang):
     """
     Extract property tax section from notes text.
 
+    The section runs from "Taxe foncière annuelle:" / "Annual property tax:"
+    until the next transfer tax or foreign access section, or end of text.
+
     Args:
         notes_text: Full notes text
         lang: 'fr' or 'en'
@@ -25,51 +32,61 @@ def extract_property_tax_notes(notes_text, lang):
     Returns:
         tuple: (property_tax_notes, remaining_notes)
     """
-    if lang == 'fr':
-        # Match "Taxe foncière annuelle:" until next section or end
-        match = re.search(
-            r'Taxe foncière annuelle:\s*(.*?)(?=\s*(?:Taxe de transfert:|Accès étrangers:|$))',
-            notes_text,
-            re.DOTALL | re.IGNORECASE
-        )
-
-        if match:
-            property_tax_notes = match.group(1).strip()
-            # Remove the matched section from original notes
-            remaining_notes = re.sub(
-                r'Taxe foncière annuelle:\s*.*?(?=\s*(?:Taxe de transfert:|Accès étrangers:|$))',
-                '',
-                notes_text,
-                count=1,
-                flags=re.DOTALL | re.IGNORECASE
-            ).strip()
-            return property_tax_notes, remaining_notes
-
-    else:  # English
-        # Match "Annual property tax:" until next section or end
-        match = re.search(
-            r'Annual property tax:\s*(.*?)(?=\s*(?:Transfer tax:|Foreign access:|$))',
-            notes_text,
-            re.DOTALL | re.IGNORECASE
-        )
-
-        if match:
-            property_tax_notes = match.group(1).strip()
-            # Remove the matched section from original notes
-            remaining_notes = re.sub(
-                r'Annual property tax:\s*.*?(?=\s*(?:Transfer tax:|Foreign access:|$))',
-                '',
-                notes_text,
-                count=1,
-                flags=re.DOTALL | re.IGNORECASE
-            ).strip()
-            return property_tax_notes, remaining_notes
+    tokens = tokenize(notes_text, lang)
+    span = find_section(notes_text, tokens, 'propertyTaxNotes',
+                        stop_kinds=('transferTaxNotes', 'foreignAccessNotes'))
+
+    if span:
+        return cut_section(notes_text, span)
 
     # If no match found, return empty extraction
     return '', notes_text
 
 
-def migrate_property_taxes_step1(input_file, output_file, backup_file):
+def migrate_country_step1(country, stats):
+    """
+    Migrate the property tax notes of one country.
+
+    Args:
+        country: Country record (modified in place)
+        stats: Statistics dict to update
+    """
+    country_code = country['countryCode']
+
+    # Initialize propertyTaxNotes if not exists
+    if 'propertyTaxNotes' not in country:
+        country['propertyTaxNotes'] = {}
+
+    # Process French notes
+    if 'fr' in country['notes']:
+        notes_fr = country['notes']['fr']
+        property_tax_fr, remaining_fr = extract_property_tax_notes(notes_fr, 'fr')
+
+        if property_tax_fr:
+            country['propertyTaxNotes']['fr'] = property_tax_fr
+            country['notes']['fr'] = remaining_fr
+            stats['migrated_fr'] += 1
+        else:
+            country['propertyTaxNotes']['fr'] = ''
+            stats['no_match_fr'] += 1
+            print(f"  ⚠️  {country_code}: No French property tax section found")
+
+    # Process English notes
+    if 'en' in country['notes']:
+        notes_en = country['notes']['en']
+        property_tax_en, remaining_en = extract_property_tax_notes(notes_en, 'en')
+
+        if property_tax_en:
+            country['propertyTaxNotes']['en'] = property_tax_en
+            country['notes']['en'] = remaining_en
+            stats['migrated_en'] += 1
+        else:
+            country['propertyTaxNotes']['en'] = ''
+            stats['no_match_en'] += 1
+            print(f"  ⚠️  {country_code}: No English property tax section found")
+
+
+def migrate_property_taxes_step1(input_file, output_file, backup_file, stream=False, manifest=None, workers=1):
     """
     Migrate property tax notes from notes field to propertyTaxNotes field.
 
@@ -77,6 +94,9 @@ def migrate_property_taxes_step1(input_file, output_file, backup_file):
         input_file: Path to input JSON file
         output_file: Path to output JSON file
         backup_file: Path to backup file
+        stream: Process the countries array one record at a time
+        manifest: MigrationManifest of this step (incremental run), or None
+        workers: Number of worker processes (1 = sequential)
     """
     print("=" * 70)
     print("MIGRATION STEP 1: Property Tax Notes")
@@ -86,21 +106,9 @@ def migrate_property_taxes_step1(input_file, output_file, backup_file):
     print(f"Backup file: {backup_file}")
     print()
 
-    # Read input file
-    print("📖 Reading input file...")
-    with open(input_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    # Create backup
-    print("💾 Creating backup...")
-    with open(backup_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"✅ Backup saved to: {backup_file}")
-    print()
-
     # Statistics
     stats = {
-        'total_countries': len(data['countries']),
+        'total_countries': 0,
         'migrated_fr': 0,
         'migrated_en': 0,
         'no_match_fr': 0,
@@ -108,54 +116,11 @@ def migrate_property_taxes_step1(input_file, output_file, backup_file):
         'errors': []
     }
 
-    # Migrate each country
-    print("🔄 Migrating property tax notes...")
-    for country in data['countries']:
-        country_code = country['countryCode']
-
-        try:
-            # Initialize propertyTaxNotes if not exists
-            if 'propertyTaxNotes' not in country:
-                country['propertyTaxNotes'] = {}
-
-            # Process French notes
-            if 'fr' in country['notes']:
-                notes_fr = country['notes']['fr']
-                property_tax_fr, remaining_fr = extract_property_tax_notes(notes_fr, 'fr')
-
-                if property_tax_fr:
-                    country['propertyTaxNotes']['fr'] = property_tax_fr
-                    country['notes']['fr'] = remaining_fr
-                    stats['migrated_fr'] += 1
-                else:
-                    country['propertyTaxNotes']['fr'] = ''
-                    stats['no_match_fr'] += 1
-                    print(f"  ⚠️  {country_code}: No French property tax section found")
-
-            # Process English notes
-            if 'en' in country['notes']:
-                notes_en = country['notes']['en']
-                property_tax_en, remaining_en = extract_property_tax_notes(notes_en, 'en')
-
-                if property_tax_en:
-                    country['propertyTaxNotes']['en'] = property_tax_en
-                    country['notes']['en'] = remaining_en
-                    stats['migrated_en'] += 1
-                else:
-                    country['propertyTaxNotes']['en'] = ''
-                    stats['no_match_en'] += 1
-                    print(f"  ⚠️  {country_code}: No English property tax section found")
-
-        except Exception as e:
-            error_msg = f"{country_code}: {str(e)}"
-            stats['errors'].append(error_msg)
-            print(f"  ❌ Error processing {country_code}: {e}")
-
-    # Write output file
-    print()
-    print("💾 Writing migrated data...")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    metrics = RunMetrics(Path(__file__).stem)
+    migrate_countries(input_file, output_file, backup_file, migrate_country_step1, stats,
+                      "🔄 Migrating property tax notes...", stream=stream, manifest=manifest,
+                      workers=workers, metrics=metrics)
+    stats['metrics'] = metrics.finish(countries=stats['total_countries'])
 
     # Print statistics
     print()
@@ -163,6 +128,7 @@ def migrate_property_taxes_step1(input_file, output_file, backup_file):
     print("MIGRATION STATISTICS")
     print("=" * 70)
     print(f"Total countries:           {stats['total_countries']}")
+    print(f"Unchanged (manifest):      {stats['unchanged']}")
     print(f"Successfully migrated FR:  {stats['migrated_fr']}")
     print(f"Successfully migrated EN:  {stats['migrated_en']}")
     print(f"No match found FR:         {stats['no_match_fr']}")
@@ -196,26 +162,33 @@ if __name__ == '__main__':
     # Default paths (adjust if your API is elsewhere)
     input_file = script_dir / '../api/data/property-taxes.json'
     output_file = script_dir / '../api/data/property-taxes.json'
-    backup_file = script_dir / f'../api/data/property-taxes.backup-step1-{datetime.now().strftime("%Y%m%d-%H%M%S")}.json'
+    backup_file = BackupStore(script_dir / '../api/data/backups', label='step1')
 
     # Allow override via command line
-    if len(sys.argv) > 1:
-        input_file = Path(sys.argv[1])
-    if len(sys.argv) > 2:
-        output_file = Path(sys.argv[2])
-    if len(sys.argv) > 3:
-        backup_file = Path(sys.argv[3])
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    stream = '--stream' in sys.argv
+    incremental = '--incremental' in sys.argv
+    workers = parse_workers(sys.argv)
+    if len(args) > 0:
+        input_file = Path(args[0])
+    if len(args) > 1:
+        output_file = Path(args[1])
+    if len(args) > 2:
+        backup_file = Path(args[2])
 
     # Check if input file exists
     if not input_file.exists():
         print(f"❌ Error: Input file not found: {input_file}")
         print()
         print("Please provide the correct path to property-taxes.json")
-        print("Usage: python migrate-property-tax-notes-step1.py [input_file] [output_file] [backup_file]")
+        print("Usage: python migrate-property-tax-notes-step1.py [input_file] [output_file] [backup_file] [--stream] [--incremental] [--workers=N] [--metrics[=file]]")
         sys.exit(1)
 
+    enable_from_argv(sys.argv, input_file.parent / DEFAULT_METRICS_FILENAME)
+    manifest = MigrationManifest(input_file.parent / MANIFEST_FILENAME, 'step1') if incremental else None
+
     # Run migration
-    stats = migrate_property_taxes_step1(input_file, output_file, backup_file)
+    stats = migrate_property_taxes_step1(input_file, output_file, backup_file, stream=stream, manifest=manifest, workers=workers)
 
     # Exit with appropriate code
     sys.exit(0 if len(stats['errors']) == 0 else 1)
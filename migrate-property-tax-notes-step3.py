@@ -13,16 +13,23 @@ Example:
 - EN: "Foreign access: PROHIBITED. Only Afghan citizens can own..."
 """
 
-import json
-import re
 import sys
-from datetime import datetime
 from pathlib import Path
 
+from backup_store import BackupStore
+from migration_manifest import MigrationManifest, MANIFEST_FILENAME
+from notes_tokenizer import tokenize, find_section, cut_section
+from pipeline_metrics import RunMetrics, DEFAULT_METRICS_FILENAME, enable_from_argv
+from property_taxes_io import migrate_countries
+from worker_pool import parse_workers
+
 def extract_foreign_access_notes(notes_text, lang):
     """
     Extract foreign access notes from notes text.
 
+    The section runs from "Accès étrangers:" / "Accès étranger:" /
+    "Foreign access:" until the end of text.
+
     Args:
         notes_text: Full notes text
         lang: 'fr' or 'en'
@@ -30,60 +37,73 @@ def extract_foreign_access_notes(notes_text, lang):
     Returns:
         tuple: (foreign_access_notes, remaining_notes)
     """
-    if lang == 'fr':
-        # Find "Accès étrangers:" or "Accès étranger:" section
-        match = re.search(
-            r'Accès étrangers?:\s*(.+)',
-            notes_text,
-            re.DOTALL | re.IGNORECASE
-        )
-
-        if match:
-            foreign_access_notes = match.group(1).strip()
-            # Remove this section from original notes
-            remaining_notes = re.sub(
-                r'Accès étrangers?:\s*.+',
-                '',
-                notes_text,
-                count=1,
-                flags=re.DOTALL | re.IGNORECASE
-            ).strip()
-
-            # Only return if there's actual content
-            if foreign_access_notes:
-                return foreign_access_notes, remaining_notes
-
-        # No match found
-        return '', notes_text
-
-    else:  # English
-        # Find "Foreign access:" section
-        match = re.search(
-            r'Foreign access:\s*(.+)',
-            notes_text,
-            re.DOTALL | re.IGNORECASE
-        )
-
-        if match:
-            foreign_access_notes = match.group(1).strip()
-            # Remove this section from original notes
-            remaining_notes = re.sub(
-                r'Foreign access:\s*.+',
-                '',
-                notes_text,
-                count=1,
-                flags=re.DOTALL | re.IGNORECASE
-            ).strip()
-
-            # Only return if there's actual content
-            if foreign_access_notes:
-                return foreign_access_notes, remaining_notes
-
-        # No match found
-        return '', notes_text
-
-
-def migrate_property_taxes_step3(input_file, output_file, backup_file):
+    tokens = tokenize(notes_text, lang)
+    span = find_section(notes_text, tokens, 'foreignAccessNotes')
+
+    if span:
+        foreign_access_notes, remaining_notes = cut_section(notes_text, span)
+
+        # Only return if there's actual content
+        if foreign_access_notes:
+            return foreign_access_notes, remaining_notes
+
+    # No match found
+    return '', notes_text
+
+
+def migrate_country_step3(country, stats):
+    """
+    Migrate the foreign access notes of one country.
+
+    Args:
+        country: Country record (modified in place)
+        stats: Statistics dict to update
+    """
+    country_code = country['countryCode']
+
+    # Initialize foreignAccessNotes if not exists
+    if 'foreignAccessNotes' not in country:
+        country['foreignAccessNotes'] = {}
+
+    # Process French notes
+    if 'fr' in country['notes']:
+        notes_fr = country['notes']['fr']
+        foreign_fr, remaining_fr = extract_foreign_access_notes(notes_fr, 'fr')
+
+        if foreign_fr:
+            country['foreignAccessNotes']['fr'] = foreign_fr
+            country['notes']['fr'] = remaining_fr
+            stats['migrated_fr'] += 1
+            stats['countries_with_notes'].append(f"{country_code} (FR): {foreign_fr[:80]}...")
+        else:
+            country['foreignAccessNotes']['fr'] = ''
+            stats['no_match_fr'] += 1
+
+        # Check if notes are now empty
+        if not remaining_fr:
+            stats['empty_notes_after'] += 1
+
+    # Process English notes
+    if 'en' in country['notes']:
+        notes_en = country['notes']['en']
+        foreign_en, remaining_en = extract_foreign_access_notes(notes_en, 'en')
+
+        if foreign_en:
+            country['foreignAccessNotes']['en'] = foreign_en
+            country['notes']['en'] = remaining_en
+            stats['migrated_en'] += 1
+            if country_code not in [c.split(' ')[0] for c in stats['countries_with_notes']]:
+                stats['countries_with_notes'].append(f"{country_code} (EN): {foreign_en[:80]}...")
+        else:
+            country['foreignAccessNotes']['en'] = ''
+            stats['no_match_en'] += 1
+
+        # Check if notes are now empty
+        if not remaining_en:
+            stats['empty_notes_after'] += 1
+
+
+def migrate_property_taxes_step3(input_file, output_file, backup_file, stream=False, manifest=None, workers=1):
     """
     Migrate foreign access notes from notes field to foreignAccessNotes field.
 
@@ -91,6 +111,9 @@ def migrate_property_taxes_step3(input_file, output_file, backup_file):
         input_file: Path to input JSON file
         output_file: Path to output JSON file
         backup_file: Path to backup file
+        stream: Process the countries array one record at a time
+        manifest: MigrationManifest of this step (incremental run), or None
+        workers: Number of worker processes (1 = sequential)
     """
     print("=" * 70)
     print("MIGRATION STEP 3: Foreign Access Notes")
@@ -100,88 +123,23 @@ def migrate_property_taxes_step3(input_file, output_file, backup_file):
     print(f"Backup file: {backup_file}")
     print()
 
-    # Read input file
-    print("📖 Reading input file...")
-    with open(input_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    # Create backup
-    print("💾 Creating backup...")
-    with open(backup_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"✅ Backup saved to: {backup_file}")
-    print()
-
     # Statistics
     stats = {
-        'total_countries': len(data['countries']),
+        'total_countries': 0,
         'migrated_fr': 0,
         'migrated_en': 0,
         'no_match_fr': 0,
         'no_match_en': 0,
         'empty_notes_after': 0,
-        'errors': []
+        'errors': [],
+        'countries_with_notes': [],
     }
 
-    # Migrate each country
-    print("🔄 Migrating foreign access notes...")
-    countries_with_notes = []
-
-    for country in data['countries']:
-        country_code = country['countryCode']
-
-        try:
-            # Initialize foreignAccessNotes if not exists
-            if 'foreignAccessNotes' not in country:
-                country['foreignAccessNotes'] = {}
-
-            # Process French notes
-            if 'fr' in country['notes']:
-                notes_fr = country['notes']['fr']
-                foreign_fr, remaining_fr = extract_foreign_access_notes(notes_fr, 'fr')
-
-                if foreign_fr:
-                    country['foreignAccessNotes']['fr'] = foreign_fr
-                    country['notes']['fr'] = remaining_fr
-                    stats['migrated_fr'] += 1
-                    countries_with_notes.append(f"{country_code} (FR): {foreign_fr[:80]}...")
-                else:
-                    country['foreignAccessNotes']['fr'] = ''
-                    stats['no_match_fr'] += 1
-
-                # Check if notes are now empty
-                if not remaining_fr:
-                    stats['empty_notes_after'] += 1
-
-            # Process English notes
-            if 'en' in country['notes']:
-                notes_en = country['notes']['en']
-                foreign_en, remaining_en = extract_foreign_access_notes(notes_en, 'en')
-
-                if foreign_en:
-                    country['foreignAccessNotes']['en'] = foreign_en
-                    country['notes']['en'] = remaining_en
-                    stats['migrated_en'] += 1
-                    if country_code not in [c.split(' ')[0] for c in countries_with_notes]:
-                        countries_with_notes.append(f"{country_code} (EN): {foreign_en[:80]}...")
-                else:
-                    country['foreignAccessNotes']['en'] = ''
-                    stats['no_match_en'] += 1
-
-                # Check if notes are now empty
-                if not remaining_en:
-                    stats['empty_notes_after'] += 1
-
-        except Exception as e:
-            error_msg = f"{country_code}: {str(e)}"
-            stats['errors'].append(error_msg)
-            print(f"  ❌ Error processing {country_code}: {e}")
-
-    # Write output file
-    print()
-    print("💾 Writing migrated data...")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    metrics = RunMetrics(Path(__file__).stem)
+    migrate_countries(input_file, output_file, backup_file, migrate_country_step3, stats,
+                      "🔄 Migrating foreign access notes...", stream=stream, manifest=manifest,
+                      workers=workers, metrics=metrics)
+    stats['metrics'] = metrics.finish(countries=stats['total_countries'])
 
     # Print statistics
     print()
@@ -189,6 +147,7 @@ def migrate_property_taxes_step3(input_file, output_file, backup_file):
     print("MIGRATION STATISTICS")
     print("=" * 70)
     print(f"Total countries:              {stats['total_countries']}")
+    print(f"Unchanged (manifest):         {stats['unchanged']}")
     print(f"Successfully migrated FR:     {stats['migrated_fr']}")
     print(f"Successfully migrated EN:     {stats['migrated_en']}")
     print(f"No foreign access notes FR:   {stats['no_match_fr']}")
@@ -196,15 +155,15 @@ def migrate_property_taxes_step3(input_file, output_file, backup_file):
     print(f"Empty notes after migration:  {stats['empty_notes_after']}")
     print(f"Errors:                       {len(stats['errors'])}")
 
-    if countries_with_notes:
+    if stats['countries_with_notes']:
         print()
         print("=" * 70)
-        print(f"COUNTRIES WITH FOREIGN ACCESS NOTES ({len(countries_with_notes)}):")
+        print(f"COUNTRIES WITH FOREIGN ACCESS NOTES ({len(stats['countries_with_notes'])}):")
         print("=" * 70)
-        for note in countries_with_notes[:15]:  # Show first 15
+        for note in stats['countries_with_notes'][:15]:  # Show first 15
             print(f"  • {note}")
-        if len(countries_with_notes) > 15:
-            print(f"  ... and {len(countries_with_notes) - 15} more")
+        if len(stats['countries_with_notes']) > 15:
+            print(f"  ... and {len(stats['countries_with_notes']) - 15} more")
 
     if stats['errors']:
         print()
@@ -234,26 +193,33 @@ if __name__ == '__main__':
     # Default paths
     input_file = script_dir / '../pickandtip-api/data/topics/property-taxes.json'
     output_file = script_dir / '../pickandtip-api/data/topics/property-taxes.json'
-    backup_file = script_dir / f'../pickandtip-api/data/topics/property-taxes.backup-step3-{datetime.now().strftime("%Y%m%d-%H%M%S")}.json'
+    backup_file = BackupStore(script_dir / '../pickandtip-api/data/topics/backups', label='step3')
 
     # Allow override via command line
-    if len(sys.argv) > 1:
-        input_file = Path(sys.argv[1])
-    if len(sys.argv) > 2:
-        output_file = Path(sys.argv[2])
-    if len(sys.argv) > 3:
-        backup_file = Path(sys.argv[3])
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    stream = '--stream' in sys.argv
+    incremental = '--incremental' in sys.argv
+    workers = parse_workers(sys.argv)
+    if len(args) > 0:
+        input_file = Path(args[0])
+    if len(args) > 1:
+        output_file = Path(args[1])
+    if len(args) > 2:
+        backup_file = Path(args[2])
 
     # Check if input file exists
     if not input_file.exists():
         print(f"❌ Error: Input file not found: {input_file}")
         print()
         print("Please provide the correct path to property-taxes.json")
-        print("Usage: python migrate-property-tax-notes-step3.py [input_file] [output_file] [backup_file]")
+        print("Usage: python migrate-property-tax-notes-step3.py [input_file] [output_file] [backup_file] [--stream] [--incremental] [--workers=N] [--metrics[=file]]")
         sys.exit(1)
 
+    enable_from_argv(sys.argv, input_file.parent / DEFAULT_METRICS_FILENAME)
+    manifest = MigrationManifest(input_file.parent / MANIFEST_FILENAME, 'step3') if incremental else None
+
     # Run migration
-    stats = migrate_property_taxes_step3(input_file, output_file, backup_file)
+    stats = migrate_property_taxes_step3(input_file, output_file, backup_file, stream=stream, manifest=manifest, workers=workers)
 
     # Exit with appropriate code
     sys.exit(0 if len(stats['errors']) == 0 else 1)
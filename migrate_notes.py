@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Migration Script - All Notes Fields in a Single Pass
+=====================================================
+This script replaces the chain of step scripts (step0 → step3 + warnings) by a
+single load/transform/write. Each FR/EN notes string is tokenized ONCE, then
+the cuts of the chain are replayed in the same order on that token list
+(the offsets of the remaining tokens are moved after each cut instead of
+scanning the text again):
+
+- countryGeneralNotes: text before the first section header (step0)
+- propertyTaxNotes:    "Taxe foncière annuelle:" / "Annual property tax:",
+                       until a transfer tax or foreign access header (step1)
+- transferTaxNotes:    "Taxe de transfert:" / "Transfer tax:", until a
+                       foreign access header (step2)
+- foreignAccessNotes:  "Accès étrangers:" / "Foreign access:", until the
+                       end of the text (step3)
+- countryWarnings:     "ATTENTION:", "WARNING:", "IMPORTANT:", "Note:", "⚠️"
+                       in what is left of the notes after the sections
+                       (migrate-country-warnings.py)
+
+The output is the one of the chain: a warning in the general text goes to
+countryGeneralNotes with it (step0 moved it before the warnings ran), a
+field without content is set to '', and whatever is not claimed stays in
+the notes field. check-migrate-notes.py compares both on synthetic data.
+"""
+
+import re
+import sys
+from pathlib import Path
+
+from backup_store import BackupStore
+from migration_manifest import MigrationManifest, MANIFEST_FILENAME
+from notes_tokenizer import Token, tokenize, find_section, SECTION_KINDS, WARNING
+from pipeline_metrics import RunMetrics, DEFAULT_METRICS_FILENAME, enable_from_argv
+from property_taxes_io import migrate_countries
+from worker_pool import parse_workers
+
+SECTION_FIELDS = ['countryGeneralNotes', 'propertyTaxNotes', 'transferTaxNotes', 'foreignAccessNotes', 'countryWarnings']
+
+# Sections in chain order, with the headers that end each of them
+SECTION_STOPS = [
+    ('propertyTaxNotes', ('transferTaxNotes', 'foreignAccessNotes')),
+    ('transferTaxNotes', ('foreignAccessNotes',)),
+    ('foreignAccessNotes', ()),
+]
+
+
+def remove_span(notes_text, tokens, start, end):
+    """
+    Cut notes_text[start:end] out of the notes like the step scripts do.
+
+    Args:
+        notes_text: Notes text
+        tokens: Tokens of notes_text
+        start: Start of the cut
+        end: End of the cut (no token straddles start or end)
+
+    Returns:
+        tuple: (remaining_notes, tokens) - the stripped remainder and its
+        tokens, at their new offsets
+    """
+    remaining = notes_text[:start] + notes_text[end:]
+    shift = len(remaining) - len(remaining.lstrip())
+    moved = [Token(token.kind, token.start - shift, token.end - shift) if token.end <= start
+             else Token(token.kind, token.start - (end - start) - shift, token.end - (end - start) - shift)
+             for token in tokens if token.end <= start or token.start >= end]
+    return remaining.strip(), moved
+
+
+def split_notes(notes_text, lang):
+    """
+    Split a notes string into all target fields with a single scan.
+
+    Args:
+        notes_text: Full notes text
+        lang: 'fr' or 'en'
+
+    Returns:
+        tuple: (sections, remaining_notes) where sections maps each field of
+        SECTION_FIELDS to its extracted text ('' when absent)
+    """
+    sections = {field: '' for field in SECTION_FIELDS}
+    tokens = tokenize(notes_text, lang)
+
+    # Step0: general text before the first section header
+    first_section = next((token for token in tokens if token.kind in SECTION_KINDS), None)
+    if first_section and notes_text[:first_section.start].strip():
+        sections['countryGeneralNotes'] = notes_text[:first_section.start].strip()
+        notes_text, tokens = remove_span(notes_text, tokens, 0, first_section.start)
+
+    # Steps 1-3: first section of each kind, empty sections stay in the notes
+    for field, stop_kinds in SECTION_STOPS:
+        span = find_section(notes_text, tokens, field, stop_kinds)
+        if span and notes_text[span[1]:span[2]].strip():
+            header_start, body_start, body_end = span
+            sections[field] = notes_text[body_start:body_end].strip()
+            notes_text, tokens = remove_span(notes_text, tokens, header_start, body_end)
+
+    # Warnings: each one runs until the next token of what is left
+    warnings = []
+    kept_parts = []
+    cursor = 0
+    for i, token in enumerate(tokens):
+        if token.kind != WARNING:
+            continue
+        warning_end = tokens[i + 1].start if i + 1 < len(tokens) else len(notes_text)
+        if not notes_text[token.end:warning_end].strip():
+            continue
+        warning = notes_text[token.start:warning_end].strip()
+        if warning not in warnings:
+            warnings.append(warning)
+        kept_parts.append(notes_text[cursor:token.start])
+        cursor = warning_end
+    if warnings:
+        kept_parts.append(notes_text[cursor:])
+        sections['countryWarnings'] = ' '.join(warnings).strip()
+        notes_text = re.sub(r'\s+', ' ', ''.join(kept_parts)).strip()
+
+    return sections, notes_text
+
+
+def migrate_country_notes(country, stats):
+    """
+    Split the notes of one country into the dedicated fields.
+
+    Like the step scripts, every field of a language with notes is set,
+    to '' when the notes have no content for it.
+
+    Args:
+        country: Country record (modified in place)
+        stats: Statistics dict to update
+    """
+    for field in SECTION_FIELDS:
+        if field not in country:
+            country[field] = {}
+
+    for lang in ['fr', 'en']:
+        if lang not in country['notes']:
+            continue
+
+        sections, remaining = split_notes(country['notes'][lang], lang)
+
+        for field in SECTION_FIELDS:
+            country[field][lang] = sections[field]
+            if sections[field]:
+                stats['migrated'][field][lang] += 1
+
+        country['notes'][lang] = remaining
+        if not remaining:
+            stats['empty_notes_after'] += 1
+
+
+def migrate_notes(input_file, output_file, backup_file, stream=False, manifest=None, workers=1):
+    """
+    Migrate all notes sections to their dedicated fields in one pass.
+
+    Args:
+        input_file: Path to input JSON file
+        output_file: Path to output JSON file
+        backup_file: Path to backup file
+        stream: Process the countries array one record at a time
+        manifest: MigrationManifest of this step (incremental run), or None
+        workers: Number of worker processes (1 = sequential)
+    """
+    print("=" * 70)
+    print("MIGRATION: All Notes Fields (single pass)")
+    print("=" * 70)
+    print(f"Input file:  {input_file}")
+    print(f"Output file: {output_file}")
+    print(f"Backup file: {backup_file}")
+    print()
+
+    # Statistics
+    stats = {
+        'total_countries': 0,
+        'migrated': {field: {'fr': 0, 'en': 0} for field in SECTION_FIELDS},
+        'empty_notes_after': 0,
+        'errors': []
+    }
+
+    metrics = RunMetrics(Path(__file__).stem)
+    migrate_countries(input_file, output_file, backup_file, migrate_country_notes, stats,
+                      "🔄 Migrating notes sections...", stream=stream, manifest=manifest,
+                      workers=workers, metrics=metrics)
+    stats['metrics'] = metrics.finish(countries=stats['total_countries'])
+
+    # Print statistics
+    print()
+    print("=" * 70)
+    print("MIGRATION STATISTICS")
+    print("=" * 70)
+    print(f"Total countries:              {stats['total_countries']}")
+    print(f"Unchanged (manifest):         {stats['unchanged']}")
+    for field in SECTION_FIELDS:
+        counts = stats['migrated'][field]
+        print(f"{field + ':':<30}FR {counts['fr']:<6} EN {counts['en']}")
+    print(f"Empty notes after migration:  {stats['empty_notes_after']}")
+    print(f"Errors:                       {len(stats['errors'])}")
+
+    if stats['errors']:
+        print()
+        print("Errors details:")
+        for error in stats['errors']:
+            print(f"  - {error}")
+
+    print()
+    print("=" * 70)
+    print("✅ MIGRATION COMPLETED")
+    print("=" * 70)
+    print()
+    print("Next steps:")
+    print("1. Review the migrated data in the output file")
+    print("2. Review remaining standalone notes (generate-review-file.py)")
+    print("3. Once notes are empty, run remove-notes-field.py")
+    print()
+
+    return stats
+
+
+if __name__ == '__main__':
+    # Determine file paths
+    script_dir = Path(__file__).parent
+
+    # Default paths
+    input_file = script_dir / '../pickandtip-api/data/topics/property-taxes.json'
+    output_file = script_dir / '../pickandtip-api/data/topics/property-taxes.json'
+    backup_file = BackupStore(script_dir / '../pickandtip-api/data/topics/backups', label='notes')
+
+    # Allow override via command line
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    stream = '--stream' in sys.argv
+    incremental = '--incremental' in sys.argv
+    workers = parse_workers(sys.argv)
+    if len(args) > 0:
+        input_file = Path(args[0])
+    if len(args) > 1:
+        output_file = Path(args[1])
+    if len(args) > 2:
+        backup_file = Path(args[2])
+
+    # Check if input file exists
+    if not input_file.exists():
+        print(f"❌ Error: Input file not found: {input_file}")
+        print()
+        print("Please provide the correct path to property-taxes.json")
+        print("Usage: python migrate_notes.py [input_file] [output_file] [backup_file] [--stream] [--incremental] [--workers=N] [--metrics[=file]]")
+        sys.exit(1)
+
+    enable_from_argv(sys.argv, input_file.parent / DEFAULT_METRICS_FILENAME)
+    manifest = MigrationManifest(input_file.parent / MANIFEST_FILENAME, 'notes') if incremental else None
+
+    # Run migration
+    stats = migrate_notes(input_file, output_file, backup_file, stream=stream, manifest=manifest, workers=workers)
+
+    # Exit with appropriate code
+    sys.exit(0 if len(stats['errors']) == 0 else 1)
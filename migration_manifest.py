@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Migration Manifest
+==================
+Per-step, per-country content hashes used to make the migrations incremental.
+
+For every migration step the manifest keeps the sha256 of each country record
+as the step last wrote it. On the next run a record whose hash is unchanged
+is already the output of that step and is not transformed again; when no
+record changed at all the data file is not rewritten.
+
+Layout of the manifest file (property-taxes.manifest.json by default):
+
+    {
+      "step0": {"AX": "<sha256>", "AF": "<sha256>", ...},
+      "warnings": {...}
+    }
+"""
+
+import json
+from pathlib import Path
+
+from property_taxes_io import country_key, record_hash
+
+MANIFEST_FILENAME = 'property-taxes.manifest.json'
+
+
+class MigrationManifest:
+    """
+    Hashes of the records produced by one migration step.
+
+    Args:
+        path: Manifest file (shared by all steps)
+        step: Name of the migration step (e.g. 'step1')
+    """
+
+    def __init__(self, path, step):
+        self.path = Path(path)
+        self.step = step
+        self.steps = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.steps = json.load(f)
+        self.previous = self.steps.get(step, {})
+        self.hashes = {}
+
+    def __str__(self):
+        return f"{self.path} [{self.step}]"
+
+    def is_current(self, key, digest):
+        """
+        Check whether a record (by its record_hash) is exactly what this step
+        produced last time. Current records are carried over as they are.
+        """
+        if self.previous.get(key) != digest:
+            return False
+        self.hashes[key] = digest
+        return True
+
+    def pending(self, countries):
+        """
+        Number of records that have to go through the step again.
+
+        Args:
+            countries: Iterable of country records, in document order
+        """
+        seen = {}
+        return sum(1 for country in countries
+                   if self.previous.get(country_key(country, seen)) != record_hash(country))
+
+    def update(self, key, country):
+        """Store and return the hash of a record the step has just migrated."""
+        self.hashes[key] = record_hash(country)
+        return self.hashes[key]
+
+    def save(self):
+        """Write the manifest; records that are gone are dropped from the step."""
+        self.steps[self.step] = self.hashes
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.steps, f, ensure_ascii=False, indent=2)
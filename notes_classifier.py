@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Notes Sentence Classifier
+=========================
+Naive Bayes classifier of notes sentences, trained on the manually reviewed
+file (property-taxes-manual-review-filled.json), one model per language
+(lang of the review items), as an alternative to the keyword rules of
+smart_categorize (auto-fill-review.py --classifier).
+
+Every sentence of the reviewed propertyTaxNotes / transferTaxNotes /
+countryGeneralNotes fields is a training example labeled with its field.
+Features are hashed character n-grams (NGRAM_SIZES) of the lower-cased
+sentence, computed for a whole batch at once with NumPy: the sentences are
+concatenated into one array of code points, the n-gram hashes (FNV-1a) are
+computed with shifted array operations and the n-grams crossing two
+sentences are masked out. Scoring is one gather + bincount per label over
+the batch; the confidence of a prediction is its softmax probability.
+
+A language model is only used where it did at least as well as the
+keyword rules on a held-out split of the countries of that language, and
+only for the texts it is sure of (MIN_CONFIDENCE); every other text keeps
+the keyword rules.
+
+INACTIVE ON THE CURRENT DATA: the reviewed file is the unedited output of
+the keyword rules (no human correction yet), so the rules score 100% on it
+by construction and no model can beat them. On the current file (84 FR
+items, 95 sentences) the classifier scores 53.6% on the held-out countries,
+is never used, and --classifier gives exactly the output of the rules. It
+becomes useful once the reviewed file holds real corrections; retrain then.
+
+Only NumPy is needed (imported by this module only, the rest of the
+pipeline does not depend on it).
+
+Usage: python notes_classifier.py [review_file] [--model=file] [--test-fraction=0.2]
+    Trains one model per language on the review file, compares it with the
+    keyword rules on a held-out split of the countries and saves the models
+    with their held-out accuracies.
+"""
+
+import importlib.util
+import json
+import re
+import sys
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+LABELS = ('propertyTaxNotes', 'transferTaxNotes', 'countryGeneralNotes')
+NGRAM_SIZES = (3, 4, 5)
+DEFAULT_BUCKETS = 2 ** 18
+DEFAULT_ALPHA = 0.1
+BATCH_SIZE = 20000
+# Lowest softmax probability of a text's sentences for the classifier to be used
+MIN_CONFIDENCE = 0.9
+MODEL_FILENAME = 'notes-classifier.npz'
+
+# Same sentence split as smart_categorize
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+|\.\s+(?=[A-Z])')
+
+_FNV_OFFSET = np.uint64(14695981039346656037)
+_FNV_PRIME = np.uint64(1099511628211)
+
+
+def split_sentences(text):
+    """Non-empty sentences of a notes text."""
+    return [sentence.strip() for sentence in SENTENCE_SPLIT.split(text) if sentence.strip()]
+
+
+def featurize(sentences, buckets=DEFAULT_BUCKETS):
+    """
+    Hashed character n-grams of a batch of sentences.
+
+    Args:
+        sentences: List of sentences
+        buckets: Number of hash buckets
+
+    Returns:
+        (features, owners): bucket of every n-gram and index of the
+        sentence it belongs to (int64 arrays of the same length)
+    """
+    texts = [f' {sentence.lower()} ' for sentence in sentences]
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    codes = np.frombuffer(''.join(texts).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    owner_of_char = np.repeat(np.arange(len(texts)), lengths)
+
+    features = []
+    owners = []
+    for size in NGRAM_SIZES:
+        count = len(codes) - size + 1
+        if count <= 0:
+            continue
+        hashes = np.full(count, _FNV_OFFSET, dtype=np.uint64)
+        for offset in range(size):
+            hashes = (hashes ^ codes[offset:offset + count]) * _FNV_PRIME
+        # Drop the n-grams that span two sentences
+        inside = owner_of_char[:count] == owner_of_char[size - 1:size - 1 + count]
+        features.append((hashes[inside] % np.uint64(buckets)).astype(np.int64))
+        owners.append(owner_of_char[:count][inside])
+
+    if not features:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(features), np.concatenate(owners)
+
+
+def training_examples(review_data, items=None):
+    """
+    Labeled sentences of the reviewed fields.
+
+    Args:
+        review_data: Filled review items
+        items: Indexes of the items to use (default: all)
+
+    Returns:
+        (sentences, labels): list of sentences and list of label indexes
+    """
+    sentences = []
+    labels = []
+    for index in (range(len(review_data)) if items is None else items):
+        item = review_data[index]
+        for label, field in enumerate(LABELS):
+            for sentence in split_sentences(item.get(field, '')):
+                sentences.append(sentence)
+                labels.append(label)
+    return sentences, labels
+
+
+class NotesClassifier:
+    """
+    Multinomial naive Bayes over hashed character n-grams.
+
+    Args:
+        log_prior: (labels,) log prior of each label
+        log_likelihood: (labels, buckets) log probability of each n-gram bucket
+    """
+
+    def __init__(self, log_prior, log_likelihood):
+        self.log_prior = log_prior
+        self.log_likelihood = log_likelihood
+        self.buckets = log_likelihood.shape[1]
+
+    @classmethod
+    def train(cls, sentences, labels, buckets=DEFAULT_BUCKETS, alpha=DEFAULT_ALPHA):
+        """
+        Fit the classifier on labeled sentences.
+
+        Args:
+            sentences: List of sentences
+            labels: Label index (in LABELS) of each sentence
+            buckets: Number of hash buckets
+            alpha: Additive (Laplace) smoothing
+
+        Returns:
+            NotesClassifier
+        """
+        labels = np.asarray(labels, dtype=np.int64)
+        features, owners = featurize(sentences, buckets)
+
+        # counts[label, bucket] in one bincount over (label * buckets + bucket)
+        counts = np.bincount(labels[owners] * buckets + features,
+                             minlength=len(LABELS) * buckets).reshape(len(LABELS), buckets).astype(np.float64)
+        counts += alpha
+        log_likelihood = np.log(counts) - np.log(counts.sum(axis=1, keepdims=True))
+
+        label_counts = np.bincount(labels, minlength=len(LABELS)) + 1.0
+        log_prior = np.log(label_counts / label_counts.sum())
+        return cls(log_prior, log_likelihood)
+
+    @classmethod
+    def load(cls, model_file):
+        """Load a model saved by save()."""
+        with np.load(model_file) as model:
+            return cls(model['log_prior'], model['log_likelihood'])
+
+    def save(self, model_file):
+        """Save the model (NumPy .npz)."""
+        np.savez_compressed(model_file, log_prior=self.log_prior, log_likelihood=self.log_likelihood)
+
+    def scores(self, sentences):
+        """
+        Log posterior (unnormalized) of every label for a batch of sentences.
+
+        Returns:
+            (sentences, labels) float array
+        """
+        features, owners = featurize(sentences, self.buckets)
+        scores = np.empty((len(sentences), len(LABELS)))
+        for label in range(len(LABELS)):
+            scores[:, label] = np.bincount(owners, weights=self.log_likelihood[label, features],
+                                           minlength=len(sentences))
+        return scores + self.log_prior
+
+    def classify(self, sentences):
+        """
+        Predict the field of each sentence.
+
+        Args:
+            sentences: List of sentences (any number, scored BATCH_SIZE at a time)
+
+        Returns:
+            (labels, confidences): label index (in LABELS) and softmax
+            probability of the predicted label, as arrays
+        """
+        labels = np.zeros(len(sentences), dtype=np.int64)
+        confidences = np.zeros(len(sentences))
+        for start in range(0, len(sentences), BATCH_SIZE):
+            scores = self.scores(sentences[start:start + BATCH_SIZE])
+            scores -= scores.max(axis=1, keepdims=True)
+            probabilities = np.exp(scores)
+            probabilities /= probabilities.sum(axis=1, keepdims=True)
+            labels[start:start + BATCH_SIZE] = probabilities.argmax(axis=1)
+            confidences[start:start + BATCH_SIZE] = probabilities.max(axis=1)
+        return labels, confidences
+
+    def categorize_batch(self, texts):
+        """
+        Categorize notes texts like smart_categorize, all sentences in one batch.
+
+        Args:
+            texts: List of notes texts
+
+        Returns:
+            list of dicts with keys propertyTaxNotes, transferTaxNotes,
+            countryGeneralNotes and confidence (lowest sentence confidence,
+            None for an empty text)
+        """
+        text_sentences = [split_sentences(text) for text in texts]
+        labels, confidences = self.classify([s for sentences in text_sentences for s in sentences])
+
+        results = []
+        position = 0
+        for sentences in text_sentences:
+            parts = {field: [] for field in LABELS}
+            for sentence in sentences:
+                parts[LABELS[labels[position]]].append(sentence)
+            text_confidences = confidences[position:position + len(sentences)]
+            position += len(sentences)
+
+            result = {field: ' '.join(parts[field]).strip() for field in LABELS}
+            result['confidence'] = round(float(text_confidences.min()), 4) if len(sentences) else None
+            results.append(result)
+        return results
+
+
+class LanguageClassifiers:
+    """
+    One NotesClassifier per language, used only where it is trusted.
+
+    Args:
+        classifiers: {lang: NotesClassifier}
+        accuracy: {lang: (classifier accuracy, keyword rules accuracy)} on
+            the held-out countries (None: not measured)
+        min_confidence: Lowest confidence of a text categorized by a classifier
+    """
+
+    def __init__(self, classifiers, accuracy, min_confidence=MIN_CONFIDENCE):
+        self.classifiers = classifiers
+        self.accuracy = accuracy
+        self.min_confidence = min_confidence
+
+    def trusted(self, lang):
+        """Whether the classifier of lang did at least as well as the keyword rules."""
+        classifier_accuracy, rules_accuracy = self.accuracy.get(lang, (None, None))
+        return (lang in self.classifiers and classifier_accuracy is not None
+                and (rules_accuracy is None or classifier_accuracy >= rules_accuracy))
+
+    @property
+    def languages(self):
+        """Languages categorized by their classifier."""
+        return sorted(lang for lang in self.classifiers if self.trusted(lang))
+
+    @classmethod
+    def load(cls, model_file, min_confidence=MIN_CONFIDENCE):
+        """Load the models saved by save()."""
+        with np.load(model_file) as model:
+            classifiers, accuracy = {}, {}
+            for i, lang in enumerate(model['languages'].tolist()):
+                classifiers[lang] = NotesClassifier(model[f'{lang}_log_prior'], model[f'{lang}_log_likelihood'])
+                accuracy[lang] = tuple(None if np.isnan(value) else float(value)
+                                       for value in (model['accuracy'][i], model['rules_accuracy'][i]))
+        return cls(classifiers, accuracy, min_confidence)
+
+    def save(self, model_file):
+        """Save the models and their accuracies (NumPy .npz)."""
+        languages = sorted(self.classifiers)
+        arrays = {'languages': np.array(languages)}
+        for column, position in (('accuracy', 0), ('rules_accuracy', 1)):
+            arrays[column] = np.array([np.nan if self.accuracy.get(lang, (None, None))[position] is None
+                                       else self.accuracy[lang][position] for lang in languages])
+        for lang in languages:
+            arrays[f'{lang}_log_prior'] = self.classifiers[lang].log_prior
+            arrays[f'{lang}_log_likelihood'] = self.classifiers[lang].log_likelihood
+        np.savez_compressed(model_file, **arrays)
+
+    def categorize_batch(self, texts, langs):
+        """
+        Categorize notes texts with the classifier of their language.
+
+        Args:
+            texts: List of notes texts
+            langs: Language code of each text
+
+        Returns:
+            list with, for each text, the result of
+            NotesClassifier.categorize_batch(), or None where the keyword
+            rules must be used (language without trusted classifier, empty
+            text or confidence below min_confidence)
+        """
+        results = [None] * len(texts)
+        for lang in self.languages:
+            positions = [i for i, text_lang in enumerate(langs) if text_lang == lang]
+            if not positions:
+                continue
+            categorized = self.classifiers[lang].categorize_batch([texts[i] for i in positions])
+            for i, result in zip(positions, categorized):
+                if result['confidence'] is not None and result['confidence'] >= self.min_confidence:
+                    results[i] = result
+        return results
+
+
+def split_items(review_data, test_fraction):
+    """
+    Deterministic train / held-out split of the review items by country.
+
+    Returns:
+        (train_items, test_items): lists of item indexes
+    """
+    train, test = [], []
+    for index, item in enumerate(review_data):
+        bucket = zlib.crc32(item['countryCode'].encode('utf-8')) % 100
+        (test if bucket < test_fraction * 100 else train).append(index)
+    return train, test
+
+
+def rules_label(categorize, sentence, lang):
+    """Field the keyword rules put (most of) a single sentence in."""
+    result = categorize(sentence, lang)
+    return max(range(len(LABELS)), key=lambda label: len(result[LABELS[label]]))
+
+
+def evaluate(review_data, test_fraction=0.2, categorize=None):
+    """
+    Train on part of the review items and measure the accuracy on the others.
+
+    Args:
+        review_data: Filled review items (of one language)
+        test_fraction: Share of the countries held out
+        categorize: smart_categorize, to compare with the keyword rules
+
+    Returns:
+        dict: sentence counts, accuracies and timings
+    """
+    train_items, test_items = split_items(review_data, test_fraction)
+    classifier = NotesClassifier.train(*training_examples(review_data, train_items))
+    sentences, labels = training_examples(review_data, test_items)
+
+    start = time.perf_counter()
+    predicted, _ = classifier.classify(sentences)
+    seconds = time.perf_counter() - start
+
+    evaluation = {
+        'trainSentences': len(training_examples(review_data, train_items)[0]),
+        'testSentences': len(sentences),
+        'classifierAccuracy': float(np.mean(predicted == np.asarray(labels))) if sentences else None,
+        'classifierSeconds': seconds,
+    }
+    if categorize:
+        lang_of = [review_data[index]['lang'] for index in test_items
+                   for field in LABELS for _ in split_sentences(review_data[index].get(field, ''))]
+        start = time.perf_counter()
+        rules = [rules_label(categorize, sentence, lang) for sentence, lang in zip(sentences, lang_of)]
+        evaluation['rulesSeconds'] = time.perf_counter() - start
+        evaluation['rulesAccuracy'] = float(np.mean(np.asarray(rules) == np.asarray(labels))) if sentences else None
+    return evaluation
+
+
+if __name__ == '__main__':
+    script_dir = Path(__file__).parent
+
+    review_file = script_dir / 'property-taxes-manual-review-filled.json'
+    model_file = script_dir / MODEL_FILENAME
+    test_fraction = 0.2
+
+    # Allow override via command line
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if len(args) > 0:
+        review_file = Path(args[0])
+    for arg in sys.argv[1:]:
+        if arg.startswith('--model='):
+            model_file = Path(arg.split('=', 1)[1])
+        elif arg.startswith('--test-fraction='):
+            test_fraction = float(arg.split('=', 1)[1])
+
+    if not review_file.exists():
+        print(f"❌ Error: Review file not found: {review_file}")
+        sys.exit(1)
+
+    print("=" * 70)
+    print("TRAINING NOTES CLASSIFIER")
+    print("=" * 70)
+    print(f"Review file: {review_file}")
+    print(f"Model file:  {model_file}")
+    print()
+
+    print("📖 Reading review file...")
+    with open(review_file, 'r', encoding='utf-8') as f:
+        review_data = json.load(f)
+
+    # Keyword rules of auto-fill-review.py, for the comparison
+    spec = importlib.util.spec_from_file_location('auto_fill_review', script_dir / 'auto-fill-review.py')
+    auto_fill = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(auto_fill)
+
+    classifiers, accuracy = {}, {}
+    for lang in sorted({item['lang'] for item in review_data}):
+        items = [item for item in review_data if item['lang'] == lang]
+        print(f"🔎 {lang}: evaluating on {test_fraction:.0%} of the countries held out...")
+        evaluation = evaluate(items, test_fraction, auto_fill.smart_categorize)
+        print(f"   Train sentences:      {evaluation['trainSentences']}")
+        print(f"   Held-out sentences:   {evaluation['testSentences']}")
+        if evaluation['testSentences']:
+            print(f"   Classifier accuracy:  {evaluation['classifierAccuracy']:.1%}")
+            print(f"   Keyword rules:        {evaluation['rulesAccuracy']:.1%}")
+        accuracy[lang] = (evaluation['classifierAccuracy'], evaluation['rulesAccuracy'])
+
+        sentences, labels = training_examples(items)
+        classifiers[lang] = NotesClassifier.train(sentences, labels)
+        print(f"🔄 {lang}: trained on all the {len(sentences)} sentences")
+        print()
+
+    model = LanguageClassifiers(classifiers, accuracy)
+    model.save(model_file)
+    print(f"✅ Models saved to: {model_file}")
+    for lang in sorted(classifiers):
+        if not model.trusted(lang):
+            print(f"⚠️  {lang}: below the keyword rules on the held-out countries, the rules are kept")
+    if not model.languages:
+        print("⚠️  No language beat the keyword rules: --classifier is inactive until the review file"
+              " holds human corrections")
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Notes Section Tokenizer
+=======================
+Shared tokenizer for the FR/EN notes strings of property-taxes.json.
+
+All section headers ("Taxe foncière annuelle:", "Transfer tax:",
+"Accès étrangers?:", ...) and warning markers ("ATTENTION:", "WARNING:", ...)
+are compiled ONCE into a single alternation per language. tokenize() returns
+every boundary in one linear scan, and the migrations cut the text by offsets
+instead of running a search followed by a sub with the same lazy pattern.
+
+Token kinds are the names of the fields the sections migrate to.
+"""
+
+import re
+from collections import namedtuple
+
+Token = namedtuple('Token', ['kind', 'start', 'end'])
+
+SECTION_HEADERS = {
+    'fr': {
+        'propertyTaxNotes': r'Taxe foncière annuelle:',
+        'transferTaxNotes': r'Taxe de transfert:',
+        'foreignAccessNotes': r'Accès étrangers?:',
+    },
+    'en': {
+        'propertyTaxNotes': r'Annual property tax:',
+        'transferTaxNotes': r'Transfer tax:',
+        'foreignAccessNotes': r'Foreign access:',
+    }
+}
+
+WARNING_MARKERS = {
+    'fr': r'ATTENTION:|IMPORTANT:|Note:|⚠️',
+    'en': r'WARNING:|IMPORTANT:|Note:|⚠️|ATTENTION:',
+}
+
+WARNING = 'countryWarnings'
+SECTION_KINDS = tuple(SECTION_HEADERS['en'])
+
+
+def _compile(lang):
+    alternatives = [f'(?P<{kind}>{header})' for kind, header in SECTION_HEADERS[lang].items()]
+    alternatives.append(f'(?P<{WARNING}>{WARNING_MARKERS[lang]})')
+    return re.compile('(?:' + '|'.join(alternatives) + r')\Z', re.IGNORECASE)
+
+
+# Every header and marker ends with ':' or starts with '⚠'. The scan only
+# looks for those characters, then checks the few characters before them
+# against the compiled alternation (anchored at the candidate position).
+PATTERNS = {lang: _compile(lang) for lang in SECTION_HEADERS}
+ANCHOR = re.compile(r'[:⚠]')
+VARIATION_SELECTOR = '\ufe0f'
+MAX_HEADER_LENGTH = max(len(header) for headers in SECTION_HEADERS.values() for header in headers.values())
+
+
+def iter_tokens(notes_text, lang):
+    """
+    Yield section headers and warning markers in text order.
+
+    Args:
+        notes_text: Full notes text
+        lang: 'fr' or 'en' (case-insensitive)
+
+    Yields:
+        Token(kind, start, end)
+    """
+    pattern = PATTERNS[lang.lower()]
+    last_end = 0
+
+    for anchor in ANCHOR.finditer(notes_text):
+        end = anchor.end()
+        if anchor.group() == '⚠' and notes_text.startswith(VARIATION_SELECTOR, end):
+            end += 1
+
+        match = pattern.search(notes_text, max(last_end, end - MAX_HEADER_LENGTH), end)
+        if match:
+            last_end = match.end()
+            yield Token(match.lastgroup, match.start(), match.end())
+
+
+def tokenize(notes_text, lang):
+    """
+    Find every section header and warning marker in one pass.
+
+    Args:
+        notes_text: Full notes text
+        lang: 'fr' or 'en' (case-insensitive)
+
+    Returns:
+        list of Token(kind, start, end), in text order
+    """
+    return list(iter_tokens(notes_text, lang))
+
+
+def _skip_whitespace(notes_text, start):
+    while start < len(notes_text) and notes_text[start].isspace():
+        start += 1
+    return start
+
+
+def _trim_whitespace(notes_text, end, floor):
+    while end > floor and notes_text[end - 1].isspace():
+        end -= 1
+    return end
+
+
+def find_section(notes_text, tokens, kind, stop_kinds=()):
+    """
+    Locate the first section of a given kind.
+
+    The body starts after the header and its following whitespace, and ends
+    before the whitespace preceding the next header of one of stop_kinds
+    (or at the end of the text).
+
+    Args:
+        notes_text: Full notes text
+        tokens: Result of tokenize(notes_text, lang)
+        kind: Kind of the section to locate
+        stop_kinds: Kinds whose header ends the section
+
+    Returns:
+        tuple: (header_start, body_start, body_end), or None if not found
+    """
+    for i, token in enumerate(tokens):
+        if token.kind == kind:
+            break
+    else:
+        return None
+
+    body_start = _skip_whitespace(notes_text, token.end)
+    body_end = len(notes_text)
+    for following in tokens[i + 1:]:
+        if following.kind in stop_kinds:
+            body_end = following.start
+            break
+
+    return token.start, body_start, _trim_whitespace(notes_text, body_end, body_start)
+
+
+def cut_section(notes_text, span):
+    """
+    Extract a section located by find_section().
+
+    Args:
+        notes_text: Full notes text
+        span: (header_start, body_start, body_end)
+
+    Returns:
+        tuple: (section_text, remaining_notes)
+    """
+    header_start, body_start, body_end = span
+    section_text = notes_text[body_start:body_end].strip()
+    remaining_notes = (notes_text[:header_start] + notes_text[body_end:]).strip()
+    return section_text, remaining_notes
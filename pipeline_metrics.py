@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Pipeline Metrics
+================
+Per-phase timing and memory instrumentation shared by the pipeline scripts.
+
+A script marks its phases in order (read → backup → transform → write, or
+any other names) and each phase records:
+
+- wallSeconds: elapsed time (time.perf_counter)
+- cpuSeconds: CPU time of the process (time.process_time)
+- peakMemoryBytes: peak of the Python allocations during the phase
+  (tracemalloc, only when it is tracing, i.e. with --metrics)
+
+Per-country transform latencies are collected with lap() at the top of each
+loop iteration (or record_latency() for work done by a worker pool) and
+summarized as percentiles. Latencies measured in worker processes are
+included; their memory is not.
+
+finish() returns one JSON metrics record per run, which the scripts store in
+stats['metrics']. When enabled with --metrics[=file], the record is also
+appended to a JSONL file and compared with the previous runs of the same
+script: a total wall time above the median of the last runs by more than
+REGRESSION_THRESHOLD is reported as a regression.
+"""
+
+import json
+import math
+import os
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_METRICS_FILENAME = 'pipeline-metrics.jsonl'
+REGRESSION_THRESHOLD = 0.25
+REGRESSION_HISTORY = 10
+
+_metrics_file = None
+
+
+def enable(metrics_file):
+    """Trace memory and append the metrics of every run to metrics_file."""
+    global _metrics_file
+    _metrics_file = Path(metrics_file)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def enable_from_argv(argv, default_file):
+    """
+    Handle the --metrics / --metrics=<file> command line flag.
+
+    Returns:
+        True if metrics are enabled
+    """
+    for arg in argv:
+        if arg == '--metrics' or arg.startswith('--metrics='):
+            enable(arg.split('=', 1)[1] if '=' in arg else default_file)
+            return True
+    return False
+
+
+def _tracing():
+    # The peak is only reset by runs that own the tracing (--metrics), so
+    # that an outer tracemalloc measurement (benchmark-pipeline.py) is kept
+    return _metrics_file is not None and tracemalloc.is_tracing()
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(len(sorted_values) * fraction))
+    return sorted_values[rank - 1]
+
+
+class RunMetrics:
+    """
+    Metrics of one run of a pipeline script.
+
+    Args:
+        script: Name of the script / migration step (e.g. 'step1')
+    """
+
+    def __init__(self, script):
+        self.script = script
+        self.started = datetime.now().isoformat(timespec='seconds')
+        self.phases = {}
+        self.latencies = []
+        self._phase = None
+        self._lap_start = None
+        self._run_start = (time.perf_counter(), time.process_time())
+        if _tracing():
+            tracemalloc.reset_peak()
+
+    def phase(self, name):
+        """End the current phase (if any) and start the phase `name`."""
+        self._end_phase()
+        self._phase = (name, time.perf_counter(), time.process_time())
+        if _tracing():
+            tracemalloc.reset_peak()
+
+    def lap(self):
+        """Mark the start of one country (the previous one ends here)."""
+        now = time.perf_counter()
+        if self._lap_start is not None:
+            self.latencies.append(now - self._lap_start)
+        self._lap_start = now
+
+    def record_latency(self, seconds):
+        """Add the latency of one country measured elsewhere (e.g. in a worker)."""
+        self.latencies.append(seconds)
+
+    def _end_phase(self):
+        if self._lap_start is not None:
+            self.latencies.append(time.perf_counter() - self._lap_start)
+            self._lap_start = None
+        if self._phase is None:
+            return
+
+        name, wall_start, cpu_start = self._phase
+        phase = self.phases.setdefault(name, {'wallSeconds': 0.0, 'cpuSeconds': 0.0, 'peakMemoryBytes': None})
+        phase['wallSeconds'] += time.perf_counter() - wall_start
+        phase['cpuSeconds'] += time.process_time() - cpu_start
+        if _tracing():
+            peak = tracemalloc.get_traced_memory()[1]
+            phase['peakMemoryBytes'] = max(phase['peakMemoryBytes'] or 0, peak)
+        self._phase = None
+
+    def finish(self, **extra):
+        """
+        End the last phase and build the metrics record of the run.
+
+        Args:
+            **extra: Additional fields of the record (e.g. countries=250)
+
+        Returns:
+            dict: JSON-serializable metrics record
+        """
+        self._end_phase()
+        wall_start, cpu_start = self._run_start
+        latencies = sorted(self.latencies)
+        peaks = [p['peakMemoryBytes'] for p in self.phases.values() if p['peakMemoryBytes'] is not None]
+
+        record = {
+            'script': self.script,
+            'started': self.started,
+            'pid': os.getpid(),
+            'wallSeconds': round(time.perf_counter() - wall_start, 6),
+            'cpuSeconds': round(time.process_time() - cpu_start, 6),
+            'peakMemoryBytes': max(peaks) if peaks else None,
+            'phases': {name: {'wallSeconds': round(p['wallSeconds'], 6), 'cpuSeconds': round(p['cpuSeconds'], 6),
+                              'peakMemoryBytes': p['peakMemoryBytes']}
+                       for name, p in self.phases.items()},
+            'countryLatency': {
+                'count': len(latencies),
+                'p50': percentile(latencies, 0.5),
+                'p90': percentile(latencies, 0.9),
+                'p99': percentile(latencies, 0.99),
+                'max': latencies[-1] if latencies else None,
+            },
+        }
+        record.update(extra)
+
+        if _metrics_file is not None:
+            record['regression'] = _check_regression(record)
+            with open(_metrics_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            print(f"📊 Metrics appended to: {_metrics_file}")
+
+        return record
+
+
+def _check_regression(record):
+    """Compare a run with the median of the previous runs of the same script."""
+    if not _metrics_file.exists():
+        return False
+
+    previous = []
+    with open(_metrics_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                run = json.loads(line)
+                if run.get('script') == record['script']:
+                    previous.append(run['wallSeconds'])
+
+    previous = sorted(previous[-REGRESSION_HISTORY:])
+    if not previous:
+        return False
+
+    median = previous[len(previous) // 2]
+    if record['wallSeconds'] > median * (1 + REGRESSION_THRESHOLD):
+        print(f"⚠️  REGRESSION: {record['script']} took {record['wallSeconds']:.2f}s "
+              f"(median of the last {len(previous)} runs: {median:.2f}s)")
+        return True
+    return False
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Profitability Engine
+====================
+Vectorized version of calculate_profitability() for any number of cities
+and surfaces at once.
+
+The research data gives the monthly revenue of each city at three surfaces
+only (50, 100 and 200 m²). The engine turns the cities into
+arrays (one row per city) and interpolates the revenue to any surface:
+
+- 'linear': piecewise-linear through the known points
+- 'pchip':  monotone cubic (Fritsch-Carlson), smooth and without the
+            overshoot of a plain cubic spline: the revenue never leaves the
+            range of two neighbouring known points
+
+Outside the known surfaces the revenue per m² of the smallest / largest
+known unit is kept (revenue proportional to the surface, so the yield stays
+flat instead of following the slope of the end segment). The yield of every
+city x surface is then one broadcast of the same formula as
+calculate_profitability(), so at the known surfaces the grid gives exactly
+the same numbers.
+
+Only NumPy is needed (imported by this module only).
+"""
+
+import numpy as np
+
+INTERPOLATIONS = ('linear', 'pchip')
+DEFAULT_GRID = (20, 300, 5)
+
+
+class CityArrays:
+    """
+    The research data of the cities as arrays.
+
+    Args:
+        profitability_data: {city code: {pricePerSqm, expenseRatio, monthlyRevenue}}
+            (monthlyRevenue keyed by surface: {"50": ..., "100": ..., "200": ...})
+    """
+
+    def __init__(self, profitability_data):
+        self.codes = list(profitability_data)
+        self.surfaces = np.array(sorted({int(size) for data in profitability_data.values()
+                                         for size in data['monthlyRevenue']}), dtype=np.float64)
+
+        self.price_per_sqm = np.array([data['pricePerSqm'] for data in profitability_data.values()], dtype=np.float64)
+        self.expense_ratio = np.array([data['expenseRatio'] for data in profitability_data.values()], dtype=np.float64)
+        try:
+            self.monthly_revenue = np.array([[data['monthlyRevenue'][str(int(size))] for size in self.surfaces]
+                                             for data in profitability_data.values()], dtype=np.float64)
+        except KeyError as e:
+            raise ValueError(f"every city needs the monthly revenue of the same surfaces (missing {e})")
+
+    def __len__(self):
+        return len(self.codes)
+
+
+def pchip_slopes(x, y):
+    """
+    Fritsch-Carlson derivatives of a monotone cubic through the points.
+
+    Args:
+        x: (k,) knots, increasing
+        y: (n, k) values of n curves at the knots
+
+    Returns:
+        (n, k) derivative at each knot
+    """
+    h = np.diff(x)
+    delta = np.diff(y, axis=1) / h
+    if len(x) == 2:
+        return np.repeat(delta, 2, axis=1)
+
+    slopes = np.zeros_like(y)
+
+    # Interior knots: weighted harmonic mean of the neighbouring secants,
+    # 0 at a local extremum
+    left, right = delta[:, :-1], delta[:, 1:]
+    w1 = 2 * h[1:] + h[:-1]
+    w2 = h[1:] + 2 * h[:-1]
+    monotone = left * right > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        harmonic = (w1 + w2) / (w1 / left + w2 / right)
+    slopes[:, 1:-1] = np.where(monotone, harmonic, 0.0)
+
+    # End knots: one-sided three-point estimate, kept monotone
+    for end, (d0, d1, h0, h1) in ((0, (delta[:, 0], delta[:, 1], h[0], h[1])),
+                                  (-1, (delta[:, -1], delta[:, -2], h[-1], h[-2]))):
+        slope = ((2 * h0 + h1) * d0 - h0 * d1) / (h0 + h1)
+        slope = np.where(np.sign(slope) != np.sign(d0), 0.0, slope)
+        slope = np.where((np.sign(d0) != np.sign(d1)) & (np.abs(slope) > 3 * np.abs(d0)), 3 * d0, slope)
+        slopes[:, end] = slope
+
+    return slopes
+
+
+def interpolate_revenue(knots, revenue, surfaces, method='pchip'):
+    """
+    Monthly revenue of every city at any surface.
+
+    Args:
+        knots: (k,) surfaces of the research data, increasing
+        revenue: (n, k) monthly revenue of each city at the knots
+        surfaces: (m,) surfaces to evaluate
+        method: 'linear' or 'pchip'
+
+    Returns:
+        (n, m) monthly revenue
+    """
+    if method not in INTERPOLATIONS:
+        raise ValueError(f"unknown interpolation '{method}' (expected one of {', '.join(INTERPOLATIONS)})")
+
+    knots = np.asarray(knots, dtype=np.float64)
+    surfaces = np.asarray(surfaces, dtype=np.float64)
+
+    # Segment of each surface (clipped to the end segments outside the knots)
+    segment = np.clip(np.searchsorted(knots, surfaces, side='right') - 1, 0, len(knots) - 2)
+    x0, x1 = knots[segment], knots[segment + 1]
+    y0, y1 = revenue[:, segment], revenue[:, segment + 1]
+    h = x1 - x0
+    t = (surfaces - x0) / h
+
+    if method == 'linear':
+        inside = y0 + (y1 - y0) * t
+    else:
+        # Cubic Hermite on each segment, with the monotone slopes
+        slopes = pchip_slopes(knots, revenue)
+        d0, d1 = slopes[:, segment], slopes[:, segment + 1]
+        t2, t3 = t * t, t * t * t
+        inside = ((2 * t3 - 3 * t2 + 1) * y0 + (t3 - 2 * t2 + t) * h * d0
+                  + (-2 * t3 + 3 * t2) * y1 + (t3 - t2) * h * d1)
+
+    # Constant revenue per m² beyond the smallest / largest known surface
+    below = revenue[:, :1] / knots[0] * surfaces
+    above = revenue[:, -1:] / knots[-1] * surfaces
+    return np.where(surfaces < knots[0], below, np.where(surfaces > knots[-1], above, inside))
+
+
+def yield_grid(price_per_sqm, expense_ratio, monthly_revenue, surfaces):
+    """
+    Net profitability (%) of every city x surface in one broadcast.
+
+    Same formula, in the same order, as calculate_profitability():
+    monthly revenue x 12 x (1 - expense ratio) / (price per m² x surface).
+
+    Args:
+        price_per_sqm: (n,) price per m² of each city
+        expense_ratio: (n,) operating expense ratio of each city (0-1)
+        monthly_revenue: (n, m) monthly revenue of each city at each surface
+        surfaces: (m,) surfaces (m²)
+
+    Returns:
+        (n, m) net profitability percentage (not rounded)
+    """
+    surfaces = np.asarray(surfaces, dtype=np.float64)
+    annual_net_revenue = monthly_revenue * 12 * (1 - expense_ratio[:, None])
+    property_price = price_per_sqm[:, None] * surfaces[None, :]
+    return annual_net_revenue / property_price * 100
+
+
+def surface_range(start, stop, step):
+    """Surfaces from start to stop included, every step m²."""
+    return np.arange(start, stop + step / 2, step, dtype=np.float64)
+
+
+def profitability_grid(profitability_data, surfaces, method='pchip'):
+    """
+    Monthly revenue and net profitability of every city at every surface.
+
+    Args:
+        profitability_data: Research data (see CityArrays)
+        surfaces: Surfaces to evaluate (m²)
+        method: Revenue interpolation, 'linear' or 'pchip'
+
+    Returns:
+        dict: {surfaces, interpolation, cities: {code: {monthlyRevenue: [...],
+        propertyPrice: [...], profitability: [...]}}}, revenue and prices
+        rounded to the dollar, profitability to 0.1% like
+        profitability_results.json
+    """
+    cities = CityArrays(profitability_data)
+    surfaces = np.asarray(surfaces, dtype=np.float64)
+
+    revenue = interpolate_revenue(cities.surfaces, cities.monthly_revenue, surfaces, method)
+    profitability = yield_grid(cities.price_per_sqm, cities.expense_ratio, revenue, surfaces)
+    property_price = cities.price_per_sqm[:, None] * surfaces[None, :]
+
+    return {
+        'surfaces': [int(s) if float(s).is_integer() else float(s) for s in surfaces],
+        'interpolation': method,
+        'cities': {
+            code: {
+                'monthlyRevenue': [round(value) for value in revenue[i].tolist()],
+                'propertyPrice': [round(value) for value in property_price[i].tolist()],
+                'profitability': [round(value, 1) for value in profitability[i].tolist()],
+            }
+            for i, code in enumerate(cities.codes)
+        },
+    }
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Profitability Financing
+=======================
+Leveraged returns of the vacation rental units: the purchase is financed by
+a fixed-rate mortgage (loan-to-value, annual rate, term in years) and the
+net revenue of calculate_profitability() pays the debt service.
+
+For every city x surface x LTV x rate x term (the scenario cube), with
+price = price per m² x surface, loan = LTV x price, equity = price - loan
+and NOI = annual net revenue (monthly revenue x 12 x (1 - expense ratio)):
+
+- monthlyPayment:   annuity payment, loan x r / (1 - (1 + r)^-n) with the
+                    monthly rate r and n monthly payments (loan / n at 0%)
+- annualCashFlow:   NOI - 12 x monthly payment
+- cashOnCash:       annual cash flow / equity (%)
+- dscr:             debt-service coverage, NOI / annual debt service
+- paybackYears:     years until the cumulated cash flow repays the equity
+                    (cash flow during the loan, NOI after it), None if never
+
+Everything is closed-form annuity math broadcast over the whole cube; the
+yearly amortization schedule (balance, interest, principal) of any grid of
+loans is given by amortization_schedule().
+
+Only NumPy is needed (imported by this module only).
+"""
+
+import numpy as np
+
+from profitability_engine import CityArrays, interpolate_revenue
+
+DEFAULT_LTVS = (0.0, 0.5, 0.7, 0.8)
+DEFAULT_RATES = (0.04, 0.06, 0.08)
+DEFAULT_TERMS = (15, 20, 25)
+METRICS = ('monthlyPayment', 'annualCashFlow', 'cashOnCash', 'dscr', 'paybackYears')
+
+
+def monthly_payment(loan, annual_rate, term_years):
+    """
+    Fixed monthly payment of a loan (arrays broadcast together).
+
+    Args:
+        loan: Amount borrowed
+        annual_rate: Nominal annual rate (0.05 = 5%)
+        term_years: Duration in years
+
+    Returns:
+        Monthly payment
+    """
+    r = np.asarray(annual_rate, dtype=np.float64) / 12
+    n = np.asarray(term_years, dtype=np.float64) * 12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annuity = r / (1 - (1 + r) ** -n)
+    return loan * np.where(r > 0, annuity, 1 / n)
+
+
+def amortization_schedule(loan, annual_rate, term_years, years=None):
+    """
+    Yearly amortization schedule of any grid of loans.
+
+    Args:
+        loan, annual_rate, term_years: Arrays broadcast together (shape S)
+        years: Number of years of the schedule (default: the longest term)
+
+    Returns:
+        dict of (years,) + S arrays: balance (at the end of each year),
+        interest and principal (paid during each year)
+    """
+    loan, annual_rate, term_years = np.broadcast_arrays(np.asarray(loan, dtype=np.float64),
+                                                        np.asarray(annual_rate, dtype=np.float64),
+                                                        np.asarray(term_years, dtype=np.float64))
+    years = int(term_years.max()) if years is None else years
+    r = annual_rate / 12
+    n = term_years * 12
+    k = np.arange(0, years + 1).reshape((-1,) + (1,) * loan.ndim) * 12.0
+
+    # Balance after k payments: loan x ((1+r)^n - (1+r)^k) / ((1+r)^n - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth_n, growth_k = (1 + r) ** n, (1 + r) ** np.minimum(k, n)
+        balance = np.where(r > 0, loan * (growth_n - growth_k) / (growth_n - 1),
+                           loan * (1 - np.minimum(k, n) / n))
+    balance = np.maximum(balance, 0.0)
+
+    payments = 12 * monthly_payment(loan, annual_rate, term_years) * (k[1:] <= n)
+    principal = balance[:-1] - balance[1:]
+    return {
+        'balance': balance[1:],
+        'interest': np.maximum(payments - principal, 0.0),
+        'principal': principal,
+    }
+
+
+def financing_cube(price, noi, ltvs, rates, terms):
+    """
+    Leveraged metrics of every unit x financing scenario.
+
+    Args:
+        price: (...) purchase price of each unit
+        noi: (...) annual net operating income of each unit
+        ltvs, rates, terms: Scenario axes
+
+    Returns:
+        dict: {metric: (..., ltvs, rates, terms) array}, NaN where a metric
+        is undefined (no equity, no debt, never paid back)
+    """
+    price = np.asarray(price, dtype=np.float64)[..., None, None, None]
+    noi = np.asarray(noi, dtype=np.float64)[..., None, None, None]
+    ltv = np.asarray(ltvs, dtype=np.float64)[:, None, None]
+    rate = np.asarray(rates, dtype=np.float64)[None, :, None]
+    term = np.asarray(terms, dtype=np.float64)[None, None, :]
+
+    loan = ltv * price
+    equity = price - loan
+    payment = monthly_payment(loan, rate, term)
+    debt_service = 12 * payment
+    cash_flow = noi - debt_service
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cash_on_cash = np.where(equity > 0, cash_flow / equity * 100, np.nan)
+        dscr = np.where(debt_service > 0, noi / debt_service, np.nan)
+
+        # Repaid during the loan, or after it by the NOI alone
+        during = np.where(cash_flow > 0, equity / cash_flow, np.inf)
+        after = term + (equity - cash_flow * term) / noi
+        payback = np.where(during <= term, during, np.where(noi > 0, after, np.nan))
+
+    return {
+        'monthlyPayment': np.broadcast_to(payment, cash_flow.shape),
+        'annualCashFlow': cash_flow,
+        'cashOnCash': cash_on_cash,
+        'dscr': dscr,
+        'paybackYears': payback,
+    }
+
+
+def _rounded(array, digits):
+    """Nested lists of an array, rounded, None for NaN / infinite values."""
+    if array.ndim == 0:
+        value = float(array)
+        return round(value, digits) if np.isfinite(value) else None
+    return [_rounded(item, digits) for item in array]
+
+
+def financing_scenarios(profitability_data, surfaces, ltvs=DEFAULT_LTVS, rates=DEFAULT_RATES, terms=DEFAULT_TERMS,
+                        method='pchip'):
+    """
+    Scenario cube of every city x surface x LTV x rate x term.
+
+    Args:
+        profitability_data: Research data (see profitability_engine.CityArrays)
+        surfaces: Surfaces (m²)
+        ltvs, rates, terms: Financing scenarios
+        method: Revenue interpolation between the known surfaces
+
+    Returns:
+        dict: {axes, surfaces, ltv, rate, term, cities: {code: {metric:
+        nested lists [surface][ltv][rate][term]}}}
+    """
+    cities = CityArrays(profitability_data)
+    surfaces = np.asarray(surfaces, dtype=np.float64)
+
+    revenue = interpolate_revenue(cities.surfaces, cities.monthly_revenue, surfaces, method)
+    noi = revenue * 12 * (1 - cities.expense_ratio[:, None])
+    price = cities.price_per_sqm[:, None] * surfaces[None, :]
+    cube = financing_cube(price, noi, ltvs, rates, terms)
+
+    digits = {'monthlyPayment': 0, 'annualCashFlow': 0, 'cashOnCash': 1, 'dscr': 2, 'paybackYears': 1}
+    return {
+        'axes': ['surface', 'ltv', 'rate', 'term'],
+        'surfaces': [int(s) if float(s).is_integer() else float(s) for s in surfaces],
+        'ltv': list(ltvs),
+        'rate': list(rates),
+        'term': list(terms),
+        'cities': {
+            code: {metric: _rounded(cube[metric][i], digits[metric]) for metric in METRICS}
+            for i, code in enumerate(cities.codes)
+        },
+    }
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Profitability FX
+================
+Offline exchange rates for the profitability scripts: the research figures
+of a city may be given in its own currency (currency of the city in
+profitability_data.json), the computations are done in the base currency
+of the rate table (USD), and the amounts of the results can be emitted in
+several display currencies at once.
+
+Layout of the rate table (fx_rates.json, units of each currency per 1 unit
+of the base currency, one set of rates per date):
+
+    {
+      "base": "USD",
+      "rates": {
+        "2024-12-31": {"EUR": 0.9626, "MXN": 20.79, ...},
+        ...
+      }
+    }
+
+The rates of a date are used for every figure of a run (the latest date
+on or before the requested one, the latest date by default). The factors
+of a date x currencies are computed once and cached, and the conversions
+are one broadcast over the city grid.
+
+Only NumPy is needed (imported by this module only).
+"""
+
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+
+FX_FILENAME = 'fx_rates.json'
+DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+CURRENCY_PATTERN = re.compile(r'^[A-Z]{3}$')
+
+
+class FxTable:
+    """
+    Dated exchange rates, with the conversion factors cached per rate date.
+
+    Args:
+        document: Parsed rate table (see the module docstring)
+        source: Name of the table in the error messages
+
+    Raises:
+        ValueError: if the table does not follow the layout
+    """
+
+    def __init__(self, document, source=FX_FILENAME):
+        self.base = document.get('base') if isinstance(document, dict) else None
+        if not isinstance(self.base, str) or not CURRENCY_PATTERN.match(self.base):
+            raise ValueError(f"{source}: 'base' must be an ISO 4217 currency code")
+
+        rates = document.get('rates')
+        if not isinstance(rates, dict) or not rates:
+            raise ValueError(f"{source}: expected a non-empty 'rates' object")
+        for date, day in rates.items():
+            if not DATE_PATTERN.match(date) or not isinstance(day, dict):
+                raise ValueError(f"{source}: rates of '{date}' must be an object keyed by a YYYY-MM-DD date")
+            for currency, rate in day.items():
+                if not CURRENCY_PATTERN.match(currency) or isinstance(rate, bool) \
+                        or not isinstance(rate, (int, float)) or rate <= 0:
+                    raise ValueError(f"{source} {date}: invalid rate {currency}={rate!r}")
+
+        self.rates = {date: {**rates[date], self.base: 1.0} for date in sorted(rates)}
+        self._factors = {}
+
+    @classmethod
+    def load(cls, fx_file):
+        """Read a rate table (ValueError if it does not follow the layout)."""
+        with open(fx_file, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), Path(fx_file).name)
+
+    def rate_date(self, date=None):
+        """
+        Date of the rates to use: the latest one on or before date.
+
+        Raises:
+            ValueError: if the table has no rates that early
+        """
+        dates = [day for day in self.rates if date is None or day <= date]
+        if not dates:
+            raise ValueError(f"no exchange rates on or before {date} (first: {next(iter(self.rates))})")
+        return dates[-1]
+
+    def factors(self, date, currencies):
+        """
+        Units of each currency per 1 unit of the base currency (cached per
+        rate date x currencies).
+
+        Args:
+            date: Rate date (see rate_date())
+            currencies: Currency codes
+
+        Returns:
+            (len(currencies),) array
+
+        Raises:
+            ValueError: if a currency has no rate at that date
+        """
+        key = (date, tuple(currencies))
+        if key not in self._factors:
+            missing = [currency for currency in currencies if currency not in self.rates[date]]
+            if missing:
+                raise ValueError(f"no {date} exchange rate for {', '.join(sorted(set(missing)))}")
+            self._factors[key] = np.array([self.rates[date][currency] for currency in currencies], dtype=np.float64)
+        return self._factors[key]
+
+    def to_base(self, amounts, currencies, date):
+        """
+        Convert amounts to the base currency.
+
+        Args:
+            amounts: (n, ...) amounts, row i in currencies[i]
+            currencies: (n,) currency of each row
+            date: Rate date
+
+        Returns:
+            (n, ...) amounts in the base currency
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        factors = self.factors(date, currencies).reshape((-1,) + (1,) * (amounts.ndim - 1))
+        return amounts / factors
+
+    def from_base(self, amounts, currencies, date):
+        """
+        Convert amounts in the base currency to every display currency.
+
+        Args:
+            amounts: (...) amounts in the base currency
+            currencies: (c,) display currencies
+            date: Rate date
+
+        Returns:
+            (c, ...) amounts, one slice per currency
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        return self.factors(date, currencies).reshape((-1,) + (1,) * amounts.ndim) * amounts[None]
+
+
+def normalize_inputs(profitability_data, table, date):
+    """
+    Research data with every amount in the base currency.
+
+    pricePerSqm and monthlyRevenue of the cities given in another currency
+    are converted (rounded to the unit), the cities already in the base
+    currency are returned as they are.
+
+    Args:
+        profitability_data: Research data (see profitability_inputs.py)
+        table: FxTable
+        date: Rate date
+
+    Returns:
+        dict: Research data in the base currency
+    """
+    codes = [code for code, data in profitability_data.items() if data.get('currency', table.base) != table.base]
+    if not codes:
+        return profitability_data
+
+    sizes = list(profitability_data[codes[0]]['monthlyRevenue'])
+    amounts = np.array([[profitability_data[code]['pricePerSqm']]
+                        + [profitability_data[code]['monthlyRevenue'][size] for size in sizes] for code in codes])
+    converted = np.round(table.to_base(amounts, [profitability_data[code]['currency'] for code in codes], date))
+
+    normalized = dict(profitability_data)
+    for code, row in zip(codes, converted.tolist()):
+        normalized[code] = {
+            **profitability_data[code],
+            'currency': table.base,
+            'pricePerSqm': int(row[0]),
+            'monthlyRevenue': {size: int(value) for size, value in zip(sizes, row[1:])},
+        }
+    return normalized
+
+
+def display_currencies(results, table, date, currencies):
+    """
+    Amounts of profitability_results.json entries in every display currency.
+
+    Args:
+        results: {city code: result of calculate_profitability.city_profitability()}
+        table: FxTable
+        date: Rate date
+        currencies: Display currencies
+
+    Returns:
+        dict: {city code: {rateDate, <currency>: {pricePerSqm,
+        profitabilityBySize: {"50m2": {monthlyRevenue, propertyPrice}}}}}
+        (the yields do not depend on the currency)
+    """
+    codes = list(results)
+    if not codes:
+        return {}
+
+    sizes = list(results[codes[0]]['profitabilityBySize'])
+    amounts = np.array([[results[code]['pricePerSqm']]
+                        + [results[code]['profitabilityBySize'][size][field] for size in sizes
+                           for field in ('monthlyRevenue', 'propertyPrice')] for code in codes])
+    converted = np.round(table.from_base(amounts, currencies, date)).astype(np.int64)
+
+    display = {}
+    for i, code in enumerate(codes):
+        display[code] = {'rateDate': date}
+        for c, currency in enumerate(currencies):
+            row = converted[c, i].tolist()
+            display[code][currency] = {
+                'pricePerSqm': row[0],
+                'profitabilityBySize': {
+                    size: {'monthlyRevenue': row[1 + 2 * j], 'propertyPrice': row[2 + 2 * j]}
+                    for j, size in enumerate(sizes)
+                },
+            }
+    return display
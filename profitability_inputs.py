@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Profitability Inputs
+====================
+Research data of the vacation rental hotspots (profitability_data.json),
+read and checked against its schema before any profitability is computed.
+
+Layout of the data file:
+
+    {
+      "version": 3,
+      "source": "...",
+      "currency": "USD",
+      "cities": {
+        "CUN": {
+          "name": "Cancún",
+          "countryCode": "MX",
+          "currency": "USD",
+          "pricePerSqm": 1800,
+          "expenseRatio": 0.61,
+          "monthlyRevenue": {"50": 1000, "100": 2000, "200": 3500},
+          "seasonality": [1.32, 1.32, 1.37, ...],
+          "occupancy": [0.77, 0.77, 0.79, ...]
+        },
+        ...
+      }
+    }
+
+Every city (IATA code) gives the monthly revenue of the same surfaces (m²,
+at least two, the knots of profitability_engine.py).
+
+Version 2 adds the optional seasonal profile of a city (see
+profitability_seasonal.py): seasonality, the revenue of each month
+(January to December) relative to the average month, occupancy, the
+occupancy rate of each month (0-1), and fixedExpenseShare, the part of the
+expenses that does not depend on the bookings. Only measured profiles
+belong in the data file; other profiles are read from a separate profiles
+file (load_seasonal_profiles(), e.g. the illustrative
+profitability_seasonal.example.json). Version 3 adds the
+currency of the figures of a city (ISO 4217, converted by
+profitability_fx.py); a city without currency is in the currency of the
+file ("currency", USD by default), filled in when the file is read.
+
+Older versions are still read (flat year, figures in the currency of the
+file); a file written for another version of the schema is refused rather
+than half read.
+"""
+
+import json
+from pathlib import Path
+
+DATA_FILENAME = 'profitability_data.json'
+SCHEMA_VERSION = 3
+SUPPORTED_VERSIONS = (1, 2, 3)
+DEFAULT_CURRENCY = 'USD'
+# Optional fields, by the version of the schema that introduced them
+FIELD_VERSIONS = {'seasonality': 2, 'occupancy': 2, 'fixedExpenseShare': 2, 'currency': 3}
+PROFILE_FIELDS = ('seasonality', 'occupancy', 'fixedExpenseShare')
+CITY_FIELDS = ('name', 'countryCode', 'pricePerSqm', 'expenseRatio', 'monthlyRevenue') + tuple(FIELD_VERSIONS)
+REQUIRED_FIELDS = ('countryCode', 'pricePerSqm', 'expenseRatio', 'monthlyRevenue')
+MONTHS = 12
+
+
+def _is_number(value):
+    """int or float, but not bool."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_currency(value):
+    """Three upper-case ASCII letters."""
+    return isinstance(value, str) and len(value) == 3 and value.isascii() and value.isalpha() and value.isupper()
+
+
+def check_city(city_code, data):
+    """
+    Check one city of the data file.
+
+    Args:
+        city_code: IATA code of the city
+        data: City record
+
+    Returns:
+        Error message, or None
+    """
+    if not isinstance(data, dict):
+        return "expected an object"
+
+    unknown = [field for field in data if field not in CITY_FIELDS]
+    if unknown:
+        return f"unknown field '{unknown[0]}' (expected {', '.join(CITY_FIELDS)})"
+    missing = [field for field in REQUIRED_FIELDS if field not in data]
+    if missing:
+        return f"missing field '{missing[0]}'"
+
+    if 'name' in data and not isinstance(data['name'], str):
+        return "name must be a string"
+    if 'currency' in data and not _is_currency(data['currency']):
+        return f"currency must be an ISO 4217 code (got {data['currency']!r})"
+    country_code = data['countryCode']
+    if not isinstance(country_code, str) or len(country_code) != 2 or not country_code.isupper():
+        return f"countryCode must be an ISO 3166 alpha-2 code (got {country_code!r})"
+    if not _is_number(data['pricePerSqm']) or data['pricePerSqm'] <= 0:
+        return f"pricePerSqm must be a positive number (got {data['pricePerSqm']!r})"
+    if not _is_number(data['expenseRatio']) or not 0 <= data['expenseRatio'] < 1:
+        return f"expenseRatio must be a number in [0, 1) (got {data['expenseRatio']!r})"
+
+    revenue = data['monthlyRevenue']
+    if not isinstance(revenue, dict) or len(revenue) < 2:
+        return "monthlyRevenue must give the revenue of at least two surfaces"
+    for size, value in revenue.items():
+        if not size.isdigit() or int(size) == 0:
+            return f"monthlyRevenue: '{size}' is not a surface in m²"
+        if not _is_number(value) or value < 0:
+            return f"monthlyRevenue.{size} must be a number >= 0 (got {value!r})"
+
+    for field, low, high in (('seasonality', 0, None), ('occupancy', 0, 1)):
+        if field not in data:
+            continue
+        profile = data[field]
+        if not isinstance(profile, list) or len(profile) != MONTHS:
+            return f"{field} must give the {MONTHS} months, January to December"
+        if not all(_is_number(value) and value >= low and (high is None or value <= high) for value in profile):
+            return f"{field} must be numbers >= {low}" + (f" and <= {high}" if high is not None else "")
+        if sum(profile) <= 0:
+            return f"{field} must have at least one month above 0"
+    if 'fixedExpenseShare' in data and (not _is_number(data['fixedExpenseShare'])
+                                        or not 0 <= data['fixedExpenseShare'] <= 1):
+        return f"fixedExpenseShare must be a number in [0, 1] (got {data['fixedExpenseShare']!r})"
+    return None
+
+
+def load_profitability_data(data_file):
+    """
+    Read and validate the research data.
+
+    Args:
+        data_file: Path to profitability_data.json
+
+    Returns:
+        dict: {city code: {name, countryCode, currency, pricePerSqm,
+        expenseRatio, monthlyRevenue, [seasonality, occupancy,
+        fixedExpenseShare]}}, in file order
+
+    Raises:
+        ValueError: if the file does not follow the schema
+    """
+    with open(data_file, 'r', encoding='utf-8') as f:
+        document = json.load(f)
+
+    source = Path(data_file).name
+    version = document.get('version') if isinstance(document, dict) else None
+    if version not in SUPPORTED_VERSIONS:
+        raise ValueError(f"{source}: unsupported version {version!r}"
+                         f" (expected {' or '.join(str(v) for v in SUPPORTED_VERSIONS)})")
+
+    cities = document.get('cities')
+    if not isinstance(cities, dict) or not cities:
+        raise ValueError(f"{source}: expected a non-empty 'cities' object")
+    currency = document.get('currency', DEFAULT_CURRENCY)
+    if not _is_currency(currency):
+        raise ValueError(f"{source}: currency must be an ISO 4217 code (got {currency!r})")
+
+    surfaces = None
+    for city_code, data in cities.items():
+        error = check_city(city_code, data)
+        newer = [field for field in data if FIELD_VERSIONS.get(field, 1) > version] if not error else []
+        if newer:
+            error = f"{newer[0]} in a version {version} file (needs version {FIELD_VERSIONS[newer[0]]})"
+        if error:
+            raise ValueError(f"{source} city {city_code}: {error}")
+        data.setdefault('currency', currency)
+
+        # Same knots everywhere, so the cities can be interpolated together
+        city_surfaces = sorted(data['monthlyRevenue'], key=int)
+        if surfaces is None:
+            surfaces = city_surfaces
+        elif city_surfaces != surfaces:
+            raise ValueError(f"{source} city {city_code}: monthlyRevenue of {', '.join(city_surfaces)} m²"
+                             f" (expected {', '.join(surfaces)} like the other cities)")
+
+    return cities
+
+
+def load_seasonal_profiles(profiles_file, profitability_data):
+    """
+    Research data completed with the seasonal profiles of a profiles file.
+
+    Layout of the profiles file:
+
+        {
+          "description": "...",
+          "cities": {
+            "CUN": {"seasonality": [...], "occupancy": [...]},
+            ...
+          }
+        }
+
+    A profile of the file replaces the one of the data file; the cities
+    without profile keep theirs (a flat year if none).
+
+    Args:
+        profiles_file: Path to the profiles file
+        profitability_data: Result of load_profitability_data()
+
+    Returns:
+        dict: New research data (profitability_data is not modified)
+
+    Raises:
+        ValueError: if the file does not follow the layout or names a city
+        that is not in the research data
+    """
+    with open(profiles_file, 'r', encoding='utf-8') as f:
+        document = json.load(f)
+
+    source = Path(profiles_file).name
+    cities = document.get('cities') if isinstance(document, dict) else None
+    if not isinstance(cities, dict):
+        raise ValueError(f"{source}: expected a 'cities' object")
+
+    merged = dict(profitability_data)
+    for city_code, profile in cities.items():
+        if city_code not in profitability_data:
+            raise ValueError(f"{source} city {city_code}: not in the research data")
+        if not isinstance(profile, dict):
+            raise ValueError(f"{source} city {city_code}: expected an object")
+        unknown = [field for field in profile if field not in PROFILE_FIELDS]
+        if unknown:
+            raise ValueError(f"{source} city {city_code}: unknown field '{unknown[0]}'"
+                             f" (expected {', '.join(PROFILE_FIELDS)})")
+
+        merged[city_code] = {**profitability_data[city_code], **profile}
+        error = check_city(city_code, merged[city_code])
+        if error:
+            raise ValueError(f"{source} city {city_code}: {error}")
+
+    return merged
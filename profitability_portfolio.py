@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Profitability Portfolio
+=======================
+Which set of vacation rental units maximizes the annual net income for a
+given capital budget: a knapsack over every city x surface option of the
+research data (profitability_data.json).
+
+Each option is one unit, with its purchase price (price per m² x surface)
+and its annual net revenue (monthly revenue x 12 x (1 - expense ratio)).
+A portfolio buys any number of units under the constraints:
+
+- budget:          total purchase price <= budget
+- max per city:    at most N units in a city (same surface or not)
+- max per country: at most N units in a country (diversification)
+
+The prices are discretized to BUDGET_STEP, rounded up so a portfolio never
+costs more than its budget, and the search is a group knapsack by dynamic
+programming: one group per city (its choices are the multisets of up to
+max-per-city surfaces), the cities of a country in a row with the units
+already bought in that country as a second state dimension. Every state
+keeps its top-k values, so one pass gives the exact top-k portfolios of
+every budget of the sweep at once (the DP is exact on the discretized
+prices; no branch-and-bound is needed at this size).
+
+Only NumPy is needed (imported by this module only).
+"""
+
+from itertools import combinations_with_replacement
+
+import numpy as np
+
+from profitability_engine import CityArrays, interpolate_revenue
+
+DEFAULT_BUDGETS = (100_000, 2_000_000, 100_000)
+BUDGET_STEP = 10_000
+DEFAULT_TOP = 5
+
+
+def city_choices(price_steps, noi, max_per_city):
+    """
+    Every way of buying up to max_per_city units in one city.
+
+    Args:
+        price_steps: (m,) price of each surface, in budget steps
+        noi: (m,) annual net revenue of each surface
+        max_per_city: Maximum number of units
+
+    Returns:
+        list of (surface indexes, cost in steps, annual net revenue), the
+        empty choice first
+    """
+    choices = [((), 0, 0.0)]
+    for count in range(1, max_per_city + 1):
+        for combo in combinations_with_replacement(range(len(price_steps)), count):
+            choices.append((combo, int(sum(price_steps[j] for j in combo)), float(sum(noi[j] for j in combo))))
+    return choices
+
+
+def prune_choices(choices, capacity, top):
+    """
+    Drop the choices that cannot be in any top-k portfolio: over the
+    largest budget, or beaten by k choices of the same cost and unit count
+    (they extend the same states, with a higher value).
+    """
+    kept, seen = [], {}
+    for choice in sorted(choices, key=lambda choice: -choice[2]):
+        combo, cost, _ = choice
+        key = (cost, len(combo))
+        if cost <= capacity and seen.get(key, 0) < top:
+            seen[key] = seen.get(key, 0) + 1
+            kept.append(choice)
+    return sorted(kept, key=lambda choice: (len(choice[0]), choice[0]))
+
+
+def _add_group(values, choices, track_units):
+    """
+    One DP layer: add the choices of a city to every state.
+
+    Args:
+        values: (capacity, units, k) top-k values of the states (-inf if none)
+        choices: Choices of the city (see city_choices())
+        track_units: Count the units in the country dimension
+
+    Returns:
+        (values, source, choice): the new top-k values, and for each of them
+        the flat index of the state it extends and the choice taken
+    """
+    capacity, units, k = values.shape
+    index = np.arange(values.size).reshape(values.shape)
+    candidates = np.full((capacity, units, len(choices), k), -np.inf)
+    sources = np.full((capacity, units, len(choices), k), -1, dtype=np.int64)
+    for number, (combo, cost, noi) in enumerate(choices):
+        n = len(combo) if track_units else 0
+        if cost < capacity and n < units:
+            candidates[cost:, n:, number] = values[:capacity - cost, :units - n] + noi
+            sources[cost:, n:, number] = index[:capacity - cost, :units - n]
+
+    candidates = candidates.reshape(capacity, units, -1)
+    # Top-k of the candidates of every state, best first
+    order = np.argpartition(-candidates, k - 1, axis=-1)[..., :k]
+    order = np.take_along_axis(order, np.argsort(-np.take_along_axis(candidates, order, axis=-1),
+                                                 axis=-1, kind='stable'), axis=-1)
+    return (np.take_along_axis(candidates, order, axis=-1),
+            np.take_along_axis(sources.reshape(capacity, units, -1), order, axis=-1),
+            order // k)
+
+
+def _close_country(values):
+    """
+    DP layer between two countries: keep the top-k of every capacity over
+    the units bought in the country, back to 0 units for the next one.
+    """
+    capacity, units, k = values.shape
+    flat = values.reshape(capacity, units * k)
+    order = np.argsort(-flat, axis=-1, kind='stable')[:, :k]
+
+    closed = np.full(values.shape, -np.inf)
+    source = np.full(values.shape, -1, dtype=np.int64)
+    closed[:, 0] = np.take_along_axis(flat, order, axis=-1)
+    source[:, 0] = np.arange(capacity)[:, None] * units * k + order
+    return closed, source, np.full(values.shape, -1, dtype=np.int64)
+
+
+def top_portfolios(price_steps, noi, countries, capacity, max_per_city=1, max_per_country=None, top=DEFAULT_TOP):
+    """
+    Top-k portfolios of every budget from 0 to capacity budget steps.
+
+    Args:
+        price_steps: (n, m) price of every city x surface, in budget steps
+        noi: (n, m) annual net revenue of every city x surface
+        countries: (n,) country of each city
+        capacity: Largest budget, in steps
+        max_per_city: Maximum number of units per city
+        max_per_country: Maximum number of units per country (None: no limit)
+        top: Number of portfolios per budget
+
+    Returns:
+        function (budget in steps) -> list of (annual net revenue, [(city
+        index, surface index), ...]), best first, empty portfolio excluded
+    """
+    track_units = max_per_country is not None
+    units = max_per_country + 1 if track_units else 1
+
+    values = np.full((capacity + 1, units, top), -np.inf)
+    values[:, 0, 0] = 0.0
+
+    # Cities of a country next to each other, so its unit count is one dimension
+    order = sorted(range(len(countries)), key=lambda i: countries[i])
+    layers = []
+    for position, i in enumerate(order):
+        if position and countries[i] != countries[order[position - 1]]:
+            values, source, choice = _close_country(values)
+            layers.append((None, None, source, choice))
+        choices = prune_choices(city_choices(price_steps[i], noi[i], max_per_city), capacity, top)
+        values, source, choice = _add_group(values, choices, track_units)
+        layers.append((i, choices, source, choice))
+    values, source, choice = _close_country(values)
+    layers.append((None, None, source, choice))
+
+    def portfolios(budget_steps):
+        c = min(budget_steps, capacity)
+        found = []
+        for rank in range(top):
+            value = values[c, 0, rank]
+            if not np.isfinite(value) or value <= 0:
+                continue
+            units_bought = []
+            flat = np.ravel_multi_index((c, 0, rank), values.shape)
+            for city, choices, source, choice in reversed(layers):
+                if city is not None:
+                    units_bought.extend((city, j) for j in choices[choice.flat[flat]][0])
+                flat = source.flat[flat]
+            found.append((float(value), sorted(units_bought)))
+        return found
+
+    return portfolios
+
+
+def budget_range(start, stop, step):
+    """Budgets from start to stop included, every step."""
+    return list(range(int(start), int(stop) + 1, int(step)))
+
+
+def optimize_portfolios(profitability_data, budgets, surfaces=None, max_per_city=1, max_per_country=None,
+                        top=DEFAULT_TOP, budget_step=BUDGET_STEP, method='pchip'):
+    """
+    Top-k portfolios of every budget of the sweep.
+
+    Args:
+        profitability_data: Research data (see profitability_inputs.py)
+        budgets: Capital budgets (USD)
+        surfaces: Surfaces of the units (m², default: the surfaces of the
+            research data)
+        max_per_city: Maximum number of units per city
+        max_per_country: Maximum number of units per country (None: no limit)
+        top: Number of portfolios per budget
+        budget_step: Price discretization (USD)
+        method: Revenue interpolation between the known surfaces
+
+    Returns:
+        dict: {budgetStep, maxPerCity, maxPerCountry, surfaces, budgets:
+        [{budget, portfolios: [{annualNetIncome, cost, netYield, units:
+        [{city, countryCode, surface, propertyPrice, annualNetIncome}]}]}]}
+    """
+    cities = CityArrays(profitability_data)
+    surfaces = cities.surfaces if surfaces is None else np.asarray(surfaces, dtype=np.float64)
+
+    revenue = interpolate_revenue(cities.surfaces, cities.monthly_revenue, surfaces, method)
+    noi = revenue * 12 * (1 - cities.expense_ratio[:, None])
+    price = cities.price_per_sqm[:, None] * surfaces[None, :]
+    price_steps = np.ceil(price / budget_step - 1e-9).astype(np.int64)
+    countries = [profitability_data[code].get('countryCode') or code for code in cities.codes]
+
+    portfolios = top_portfolios(price_steps, noi, countries, max(budgets) // budget_step,
+                                max_per_city, max_per_country, top)
+
+    labels = [f"{int(s) if float(s).is_integer() else float(s)}m2" for s in surfaces]
+    sweep = []
+    for budget in budgets:
+        found = []
+        for value, units in portfolios(budget // budget_step):
+            cost = float(sum(price[i, j] for i, j in units))
+            found.append({
+                'annualNetIncome': round(value),
+                'cost': round(cost),
+                'netYield': round(value / cost * 100, 2),
+                'units': [{
+                    'city': cities.codes[i],
+                    'countryCode': countries[i],
+                    'surface': labels[j],
+                    'propertyPrice': round(float(price[i, j])),
+                    'annualNetIncome': round(float(noi[i, j])),
+                } for i, j in units],
+            })
+        sweep.append({'budget': budget, 'portfolios': found})
+
+    return {
+        'budgetStep': budget_step,
+        'maxPerCity': max_per_city,
+        'maxPerCountry': max_per_country,
+        'surfaces': [int(s) if float(s).is_integer() else float(s) for s in surfaces],
+        'budgets': sweep,
+    }
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Profitability Seasonal
+======================
+Month-by-month version of calculate_profitability(): instead of one flat
+monthlyRevenue x 12, the revenue of each city follows its seasonal profile
+(profitability_data.json, version 2, or a separate profiles file, see
+profitability_inputs.load_seasonal_profiles()):
+
+- seasonality:       revenue of each month relative to the average month
+                     (the research monthlyRevenue), January to December
+- occupancy:         occupancy rate of each month (0-1)
+- fixedExpenseShare: part of the expenses that does not depend on the
+                     bookings (FIXED_EXPENSE_SHARE by default)
+
+For every city x surface x month, with R the monthly revenue of the
+surface (interpolated by profitability_engine.py):
+
+    revenue[month]   = R x seasonality[month]
+    annual gross     = sum of the months
+    annual expenses  = annual gross x expense ratio, of which
+                       fixed:    spread evenly over the 12 months
+                       variable: spread like the occupancy (cleaning,
+                                 fees... follow the occupied nights)
+    cash flow[month] = revenue - fixed / 12 - variable x occupancy share
+    annual net       = annual gross - annual expenses
+    yield            = annual net / price
+
+A city without profile has a flat year (seasonality and occupancy of 1):
+its yield is the one of calculate_profitability(). Profiles averaging 1
+keep the annual figures of the research and only change how the year is
+distributed (worst month). The research data has no measured profile yet;
+profitability_seasonal.example.json holds illustrative regional shapes to
+try the model with (--profiles=profitability_seasonal.example.json).
+
+All the cities x surfaces x months are one array pass (n x m x 12), so
+the whole dataset is regenerated in milliseconds on every data edit.
+
+Only NumPy is needed (imported by this module only).
+"""
+
+import numpy as np
+
+from profitability_engine import CityArrays, interpolate_revenue
+
+MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+FIXED_EXPENSE_SHARE = 0.5
+
+
+def season_arrays(profitability_data):
+    """
+    Seasonal profiles of the cities as arrays (flat when missing).
+
+    Args:
+        profitability_data: Research data (see profitability_inputs.py)
+
+    Returns:
+        (seasonality, occupancy, fixed_share): (n, 12), (n, 12) and (n,)
+        arrays; occupancy is NaN for the cities without occupancy profile
+    """
+    cities = list(profitability_data.values())
+    seasonality = np.array([data.get('seasonality', [1.0] * 12) for data in cities], dtype=np.float64)
+    occupancy = np.array([data.get('occupancy', [np.nan] * 12) for data in cities], dtype=np.float64)
+    fixed_share = np.array([data.get('fixedExpenseShare', FIXED_EXPENSE_SHARE) for data in cities],
+                           dtype=np.float64)
+    return seasonality, occupancy, fixed_share
+
+
+def seasonal_yields(price_per_sqm, expense_ratio, monthly_revenue, surfaces, seasonality, occupancy, fixed_share):
+    """
+    Annual and monthly figures of every city x surface in one broadcast.
+
+    Args:
+        price_per_sqm: (n,) price per m² of each city
+        expense_ratio: (n,) operating expense ratio of each city (0-1)
+        monthly_revenue: (n, m) average monthly revenue of each city at each surface
+        surfaces: (m,) surfaces (m²)
+        seasonality: (n, 12) revenue of each month relative to the average month
+        occupancy: (n, 12) occupancy of each month (NaN: flat)
+        fixed_share: (n,) fixed part of the expenses (0-1)
+
+    Returns:
+        dict of arrays: monthlyRevenue and monthlyCashFlow (n, m, 12),
+        annualGrossRevenue, annualNetRevenue, profitability (%),
+        worstMonth (index) and worstMonthCashFlow (n, m)
+    """
+    surfaces = np.asarray(surfaces, dtype=np.float64)
+    revenue = monthly_revenue[:, :, None] * seasonality[:, None, :]
+    annual_gross = monthly_revenue * seasonality.sum(axis=1)[:, None]
+    annual_expenses = annual_gross * expense_ratio[:, None]
+
+    # Variable expenses follow the occupied nights (evenly without occupancy)
+    nights = np.where(np.isnan(occupancy), 1.0, occupancy)
+    nights_share = nights / nights.sum(axis=1, keepdims=True)
+    fixed = annual_expenses * fixed_share[:, None] / 12
+    variable = annual_expenses * (1 - fixed_share[:, None])
+    cash_flow = revenue - fixed[:, :, None] - variable[:, :, None] * nights_share[:, None, :]
+
+    # Same operation order as calculate_profitability() for a flat year
+    annual_net = annual_gross * (1 - expense_ratio[:, None])
+    property_price = price_per_sqm[:, None] * surfaces[None, :]
+    worst_month = cash_flow.argmin(axis=2)
+    return {
+        'monthlyRevenue': revenue,
+        'monthlyCashFlow': cash_flow,
+        'annualGrossRevenue': annual_gross,
+        'annualNetRevenue': annual_net,
+        'profitability': annual_net / property_price * 100,
+        'worstMonth': worst_month,
+        'worstMonthCashFlow': np.take_along_axis(cash_flow, worst_month[:, :, None], axis=2)[:, :, 0],
+    }
+
+
+def seasonal_profitability(profitability_data, surfaces=None, method='pchip'):
+    """
+    Seasonal profitability of every city x surface.
+
+    Args:
+        profitability_data: Research data (see profitability_inputs.py)
+        surfaces: Surfaces (m², default: the surfaces of the research data)
+        method: Revenue interpolation between the known surfaces
+
+    Returns:
+        dict: {surfaces, months, cities: {code: {averageOccupancy,
+        "<surface>m2": {annualGrossRevenue, annualNetRevenue, profitability,
+        worstMonth, worstMonthCashFlow, monthlyCashFlow: [12]}}}}
+    """
+    cities = CityArrays(profitability_data)
+    surfaces = cities.surfaces if surfaces is None else np.asarray(surfaces, dtype=np.float64)
+    seasonality, occupancy, fixed_share = season_arrays(profitability_data)
+
+    revenue = interpolate_revenue(cities.surfaces, cities.monthly_revenue, surfaces, method)
+    figures = seasonal_yields(cities.price_per_sqm, cities.expense_ratio, revenue, surfaces,
+                              seasonality, occupancy, fixed_share)
+    average_occupancy = occupancy.mean(axis=1)
+
+    labels = [f"{int(s) if float(s).is_integer() else float(s)}m2" for s in surfaces]
+    results = {}
+    for i, code in enumerate(cities.codes):
+        results[code] = {
+            'averageOccupancy': round(float(average_occupancy[i]), 2) if np.isfinite(average_occupancy[i]) else None,
+        }
+        for j, label in enumerate(labels):
+            results[code][label] = {
+                'annualGrossRevenue': round(float(figures['annualGrossRevenue'][i, j])),
+                'annualNetRevenue': round(float(figures['annualNetRevenue'][i, j])),
+                'profitability': round(float(figures['profitability'][i, j]), 1),
+                'worstMonth': MONTHS[figures['worstMonth'][i, j]],
+                'worstMonthCashFlow': round(float(figures['worstMonthCashFlow'][i, j])),
+                'monthlyCashFlow': [round(value) for value in figures['monthlyCashFlow'][i, j].tolist()],
+            }
+
+    return {
+        'surfaces': [int(s) if float(s).is_integer() else float(s) for s in surfaces],
+        'months': list(MONTHS),
+        'cities': results,
+    }
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Profitability Simulation
+========================
+Monte Carlo version of calculate_profitability(): the research figures
+(pricePerSqm, expenseRatio, monthlyRevenue) are rough estimates, so each of
+them is drawn from a distribution around its value and the yield of every
+city x surface is computed for every draw.
+
+Distributions (DEFAULT_DISTRIBUTIONS, overridable per input and per city):
+
+- lognormal  {"sigma": s}            value x exp(s x Z), median = value
+- normal     {"sd": s}               value + s x Z, in the units of the value
+- uniform    {"low": a, "high": b}   value x U(a, b)
+- triangular {"low": a, "high": b}   value x Tri(a, 1, b), mode = value
+- fixed      {}                      value
+
+One draw of monthlyRevenue scales the revenue of all the surfaces of a city
+(the uncertainty is on the city, not on each unit size). The expense ratio
+is kept non-negative (EXPENSE_RATIO_RANGE) by truncation: a negative draw is
+drawn again, so the mass is not piled up on 0. A ratio above 1 is kept: the
+expenses exceed the revenue and the net return is negative, which is what
+probNegative counts (e.g. the TUL override of load_distributions(): 0.665
+x U(1.2, 1.8) is above 1 in about half of the draws).
+
+The draws are simulated in chunks (CHUNK_DRAWS draws per city, vectorized
+over draws x surfaces), spread over a process pool (worker_pool.py) and
+reduced to one histogram of the yields per city x surface
+(HISTOGRAM_STEP wide bins between HISTOGRAM_RANGE, plus one bin for the
+yields below and one for the yields above the range, reported as
+belowRange / aboveRange), so any number of draws fits in memory and the
+result does not depend on the number of workers.
+Each chunk has its own seed, spawned from the run seed: a run is
+reproducible.
+
+Only NumPy is needed (imported by this module only).
+"""
+
+import json
+
+import numpy as np
+
+from profitability_engine import CityArrays, interpolate_revenue
+from worker_pool import map_batches
+
+DEFAULT_DRAWS = 1_000_000
+CHUNK_DRAWS = 100_000
+DEFAULT_SEED = 2024
+INPUTS = ('pricePerSqm', 'expenseRatio', 'monthlyRevenue')
+DISTRIBUTIONS = ('lognormal', 'normal', 'uniform', 'triangular', 'fixed')
+DEFAULT_DISTRIBUTIONS = {
+    'pricePerSqm': {'dist': 'lognormal', 'sigma': 0.15},
+    'expenseRatio': {'dist': 'normal', 'sd': 0.08},
+    'monthlyRevenue': {'dist': 'lognormal', 'sigma': 0.25},
+}
+PERCENTILES = (10, 50, 90)
+HISTOGRAM_RANGE = (-100.0, 100.0)
+HISTOGRAM_STEP = 0.01
+# No upper bound: expenses above the revenue are a loss, not an invalid draw
+EXPENSE_RATIO_RANGE = (0.0, np.inf)
+# Rounds of redraws before a distribution is deemed to miss its domain
+MAX_REDRAWS = 1000
+
+
+def load_distributions(distributions_file=None):
+    """
+    Distributions of the inputs, per city.
+
+    The file (optional) overrides the defaults for every city and / or for
+    some cities:
+
+        {
+          "default": {"monthlyRevenue": {"dist": "lognormal", "sigma": 0.3}},
+          "cities": {"TUL": {"expenseRatio": {"dist": "uniform", "low": 1.2, "high": 1.8}}}
+        }
+
+    Returns:
+        (defaults, per_city): {input: spec} and {city: {input: spec}}
+
+    Raises:
+        ValueError: if an input or a distribution is unknown
+    """
+    overrides = {}
+    if distributions_file:
+        with open(distributions_file, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+
+    defaults = {**DEFAULT_DISTRIBUTIONS, **overrides.get('default', {})}
+    per_city = overrides.get('cities', {})
+
+    for where, specs in [('default', defaults)] + list(per_city.items()):
+        for name, spec in specs.items():
+            if name not in INPUTS:
+                raise ValueError(f"{where}: unknown input '{name}' (expected one of {', '.join(INPUTS)})")
+            if spec.get('dist') not in DISTRIBUTIONS:
+                raise ValueError(f"{where}.{name}: unknown distribution '{spec.get('dist')}'")
+    return defaults, per_city
+
+
+def sample(rng, value, spec, draws):
+    """
+    Draw one input of one city.
+
+    Args:
+        rng: numpy Generator
+        value: Research value of the input
+        spec: Distribution ({"dist": ..., parameters})
+        draws: Number of draws
+
+    Returns:
+        (draws,) array
+    """
+    dist = spec['dist']
+    if dist == 'lognormal':
+        return value * np.exp(spec['sigma'] * rng.standard_normal(draws))
+    if dist == 'normal':
+        return value + spec['sd'] * rng.standard_normal(draws)
+    if dist == 'uniform':
+        return value * rng.uniform(spec['low'], spec['high'], draws)
+    if dist == 'triangular':
+        return value * rng.triangular(spec['low'], 1.0, spec['high'], draws)
+    return np.full(draws, float(value))
+
+
+def sample_truncated(rng, value, spec, draws, low, high):
+    """
+    Draw one input restricted to [low, high): the draws outside the range
+    are drawn again (truncated distribution).
+
+    Raises:
+        ValueError: if the distribution has almost no draws in the range
+    """
+    values = sample(rng, value, spec, draws)
+    for _ in range(MAX_REDRAWS):
+        outside = np.flatnonzero((values < low) | (values >= high))
+        if not len(outside):
+            return values
+        values[outside] = sample(rng, value, spec, len(outside))
+    raise ValueError(f"{spec['dist']} distribution around {value} has almost no draws in [{low}, {high})")
+
+
+def simulate_chunk(setup, seed, draws):
+    """
+    Histograms of the yields of one chunk of draws.
+
+    Args:
+        setup: dict built by simulate() (city arrays, revenue at each
+            surface, distributions)
+        seed: numpy SeedSequence of the chunk
+        draws: Number of draws
+
+    Returns:
+        (cities x surfaces, bins + 2) int64 histogram counts, the first and
+        last bins counting the yields below and above HISTOGRAM_RANGE
+    """
+    rng = np.random.default_rng(seed)
+    cities, surfaces = setup['revenue'].shape
+    low, high = HISTOGRAM_RANGE
+    bins = int(round((high - low) / HISTOGRAM_STEP)) + 2
+    counts = np.empty((cities, surfaces * bins), dtype=np.int64)
+
+    for i in range(cities):
+        specs = setup['specs'][i]
+        price_per_sqm = sample(rng, setup['price_per_sqm'][i], specs['pricePerSqm'], draws)
+        expense_ratio = sample_truncated(rng, setup['expense_ratio'][i], specs['expenseRatio'], draws,
+                                         *EXPENSE_RATIO_RANGE)
+        revenue_factor = sample(rng, 1.0, specs['monthlyRevenue'], draws)
+
+        # Same formula as calculate_profitability(), over draws x surfaces
+        monthly_revenue = revenue_factor[:, None] * setup['revenue'][i][None, :]
+        annual_net_revenue = monthly_revenue * 12 * (1 - expense_ratio[:, None])
+        property_price = price_per_sqm[:, None] * setup['surfaces'][None, :]
+        profitability = annual_net_revenue / property_price * 100
+
+        # One bincount for all the surfaces: offset each one by its bins.
+        # Bin 0 and bins - 1 collect the yields out of the range
+        index = np.clip(np.floor((profitability - low) / HISTOGRAM_STEP), -1, bins - 2).astype(np.int64) + 1
+        index += np.arange(surfaces)[None, :] * bins
+        counts[i] = np.bincount(index.ravel(), minlength=surfaces * bins)
+
+    return counts.reshape(cities * surfaces, bins)
+
+
+def simulate_batch(batch, stats):
+    """Worker side of simulate(): histograms of a batch of chunks."""
+    return [simulate_chunk(setup, seed, draws) for setup, seed, draws in batch], stats
+
+
+def summarize(counts, draws):
+    """
+    Percentiles and probability of a negative return of one histogram.
+
+    Returns:
+        dict: {p10, p50, p90, probNegative, belowRange, aboveRange} (yields
+        in %, at the bin resolution, rounded to 0.1; a percentile out of
+        HISTOGRAM_RANGE is None; belowRange and aboveRange are the shares of
+        the draws out of the range)
+    """
+    low, _ = HISTOGRAM_RANGE
+    cumulative = np.cumsum(counts)
+    summary = {}
+    for percentile in PERCENTILES:
+        bin_index = int(np.searchsorted(cumulative, percentile / 100 * draws))
+        in_range = 0 < bin_index < len(counts) - 1
+        summary[f'p{percentile}'] = round(low + (bin_index - 0.5) * HISTOGRAM_STEP, 1) if in_range else None
+    # The underflow bin and the bins below 0
+    negative_bins = int(round(-low / HISTOGRAM_STEP)) + 1
+    summary['probNegative'] = round(float(cumulative[negative_bins - 1]) / draws, 4)
+    summary['belowRange'] = round(float(counts[0]) / draws, 4)
+    summary['aboveRange'] = round(float(counts[-1]) / draws, 4)
+    return summary
+
+
+def simulate(profitability_data, surfaces, draws=DEFAULT_DRAWS, workers=1, seed=DEFAULT_SEED,
+             distributions_file=None, method='pchip'):
+    """
+    Monte Carlo yields of every city x surface.
+
+    Args:
+        profitability_data: Research data (see profitability_engine.CityArrays)
+        surfaces: Surfaces to simulate (m²)
+        draws: Number of draws per city
+        workers: Number of worker processes (1 = sequential)
+        seed: Seed of the run
+        distributions_file: Optional JSON file of distributions (see load_distributions)
+        method: Revenue interpolation between the known surfaces
+
+    Returns:
+        dict: {draws, seed, surfaces, cities: {code: {"<surface>m2": {p10, p50, p90, probNegative,
+        belowRange, aboveRange}}}}
+
+    Raises:
+        ValueError: if draws is not positive, or a distribution is invalid
+    """
+    if draws < 1:
+        raise ValueError(f"the number of draws must be at least 1 (got {draws})")
+
+    cities = CityArrays(profitability_data)
+    surfaces = np.asarray(surfaces, dtype=np.float64)
+    defaults, per_city = load_distributions(distributions_file)
+
+    setup = {
+        'price_per_sqm': cities.price_per_sqm,
+        'expense_ratio': cities.expense_ratio,
+        'revenue': interpolate_revenue(cities.surfaces, cities.monthly_revenue, surfaces, method),
+        'surfaces': surfaces,
+        'specs': [{**defaults, **per_city.get(code, {})} for code in cities.codes],
+    }
+
+    chunk_sizes = [CHUNK_DRAWS] * (draws // CHUNK_DRAWS) + ([draws % CHUNK_DRAWS] if draws % CHUNK_DRAWS else [])
+    chunks = [(setup, chunk_seed, size)
+              for chunk_seed, size in zip(np.random.SeedSequence(seed).spawn(len(chunk_sizes)), chunk_sizes)]
+
+    if workers > 1:
+        histograms = (counts for batch in map_batches(simulate_batch, chunks, {}, workers, batch_size=1)
+                      for counts in batch)
+    else:
+        histograms = (simulate_chunk(*chunk) for chunk in chunks)
+
+    total = None
+    for counts in histograms:
+        total = counts if total is None else total + counts
+
+    labels = [f"{int(s) if float(s).is_integer() else float(s)}m2" for s in surfaces]
+    return {
+        'draws': draws,
+        'seed': seed,
+        'surfaces': [int(s) if float(s).is_integer() else float(s) for s in surfaces],
+        'cities': {
+            code: {label: summarize(total[i * len(surfaces) + j], draws) for j, label in enumerate(labels)}
+            for i, code in enumerate(cities.codes)
+        },
+    }
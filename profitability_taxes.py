@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Profitability Taxes
+===================
+Net-after-tax yield of the vacation rental units: joins the research data
+(profitability_data.json) with the property tax and transfer tax rates of
+property-taxes.json.
+
+Each city (IATA code) names its country (countryCode of the research data),
+looked up once in the countryCode index of PropertyTaxesDataset. The rates
+used are the numeric fields of the country record:
+
+- propertyTaxValue: annual property tax, % of the property value
+- transferTaxValue: one-off transfer tax, % of the purchase price,
+                    amortized over the holding period
+
+    net after tax = (annual net revenue - annual property tax
+                     - transfer tax / holding years) / price
+
+The tax rates are joined once per city and the yields of all the cities x
+surfaces computed in one broadcast. A city whose country (or rate) is
+missing from property-taxes.json gets no after-tax figures and is reported
+in the errors.
+
+Only NumPy is needed (imported by this module only).
+"""
+
+import numpy as np
+
+from profitability_engine import CityArrays, interpolate_revenue
+
+DEFAULT_HOLDING_YEARS = 10
+
+
+def join_tax_rates(profitability_data, dataset):
+    """
+    Tax rates of the country of every city.
+
+    Args:
+        profitability_data: Research data ({city: {countryCode, ...}})
+        dataset: PropertyTaxesDataset of property-taxes.json
+
+    Returns:
+        (country_codes, property_rate, transfer_rate, errors): rates as
+        (n,) arrays in % (NaN when missing), errors as messages
+    """
+    country_codes = []
+    property_rate = np.full(len(profitability_data), np.nan)
+    transfer_rate = np.full(len(profitability_data), np.nan)
+    errors = []
+
+    for i, (city_code, data) in enumerate(profitability_data.items()):
+        country_code = data.get('countryCode')
+        country_codes.append(country_code)
+        country = dataset.get(country_code) if country_code else None
+        if not country:
+            errors.append(f"{city_code}: country {country_code} not found in property-taxes.json")
+            continue
+
+        for rates, field in ((property_rate, 'propertyTaxValue'), (transfer_rate, 'transferTaxValue')):
+            if isinstance(country.get(field), (int, float)):
+                rates[i] = country[field]
+            else:
+                errors.append(f"{city_code}: no {field} for {country_code}")
+
+    return country_codes, property_rate, transfer_rate, errors
+
+
+def after_tax_yields(price, noi, property_rate, transfer_rate, holding_years=DEFAULT_HOLDING_YEARS):
+    """
+    Taxes and net-after-tax yield of every city x surface.
+
+    Args:
+        price: (n, m) purchase price
+        noi: (n, m) annual net revenue
+        property_rate: (n,) annual property tax (% of the value)
+        transfer_rate: (n,) transfer tax (% of the price)
+        holding_years: Years the transfer tax is amortized over
+
+    Returns:
+        dict of (n, m) arrays: annualPropertyTax, transferTax,
+        netAfterTax (%)
+    """
+    annual_property_tax = price * property_rate[:, None] / 100
+    transfer_tax = price * transfer_rate[:, None] / 100
+    net_after_tax = (noi - annual_property_tax - transfer_tax / holding_years) / price * 100
+    return {
+        'annualPropertyTax': annual_property_tax,
+        'transferTax': transfer_tax,
+        'netAfterTax': net_after_tax,
+    }
+
+
+def _number(value, digits):
+    """Rounded float, None for NaN."""
+    return round(value, digits) if np.isfinite(value) else None
+
+
+def after_tax_profitability(profitability_data, dataset, surfaces, holding_years=DEFAULT_HOLDING_YEARS,
+                            method='pchip'):
+    """
+    Net-after-tax profitability of every city x surface.
+
+    Args:
+        profitability_data: Research data (see profitability_engine.CityArrays)
+        dataset: PropertyTaxesDataset of property-taxes.json
+        surfaces: Surfaces (m²)
+        holding_years: Years the transfer tax is amortized over
+        method: Revenue interpolation between the known surfaces
+
+    Returns:
+        dict: {holdingYears, surfaces, cities: {code: {countryCode,
+        propertyTaxRate, transferTaxRate, "<surface>m2": {profitability,
+        annualPropertyTax, transferTax, netAfterTax}}}, errors}
+    """
+    cities = CityArrays(profitability_data)
+    surfaces = np.asarray(surfaces, dtype=np.float64)
+    country_codes, property_rate, transfer_rate, errors = join_tax_rates(profitability_data, dataset)
+
+    revenue = interpolate_revenue(cities.surfaces, cities.monthly_revenue, surfaces, method)
+    noi = revenue * 12 * (1 - cities.expense_ratio[:, None])
+    price = cities.price_per_sqm[:, None] * surfaces[None, :]
+    profitability = noi / price * 100
+    taxes = after_tax_yields(price, noi, property_rate, transfer_rate, holding_years)
+
+    labels = [f"{int(s) if float(s).is_integer() else float(s)}m2" for s in surfaces]
+    results = {}
+    for i, code in enumerate(cities.codes):
+        results[code] = {
+            'countryCode': country_codes[i],
+            'propertyTaxRate': _number(property_rate[i], 2),
+            'transferTaxRate': _number(transfer_rate[i], 2),
+        }
+        for j, label in enumerate(labels):
+            results[code][label] = {
+                'profitability': round(float(profitability[i, j]), 1),
+                'annualPropertyTax': _number(taxes['annualPropertyTax'][i, j], 0),
+                'transferTax': _number(taxes['transferTax'][i, j], 0),
+                'netAfterTax': _number(taxes['netAfterTax'][i, j], 1),
+            }
+
+    return {
+        'holdingYears': holding_years,
+        'surfaces': [int(s) if float(s).is_integer() else float(s) for s in surfaces],
+        'cities': results,
+        'errors': errors,
+    }
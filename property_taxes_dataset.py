@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Property Taxes Dataset
+======================
+Indexed access to property-taxes.json for the scripts that edit a few
+countries at a time.
+
+The file is loaded once and indexed by countryCode, so looking a country up
+is O(1) instead of a scan of the countries array. Secondary indexes group
+the countries by foreignerRestrictionLevel and by region (taken from the
+record, or from the countries database since property-taxes.json does not
+store it).
+
+Every change goes through update() / set_note() / set_record() or is
+declared with mark_dirty(); save() only writes the file when something
+changed, in the same format as the other scripts (json.dump, indent=2,
+ensure_ascii=False), through a temporary file that keeps the permissions of
+the file (property_taxes_io.write_json()) so it can be saved again and again
+during a long run (apply-manual-review.py checkpoints).
+"""
+
+import bisect
+import json
+from pathlib import Path
+
+from property_taxes_io import write_json
+
+
+def load_regions(countries_file):
+    """
+    Read the countryCode → region map of the countries database.
+
+    Args:
+        countries_file: Path to countries.json (a list of countries, or an
+            object with a "countries" list; entries have "code" and "region")
+
+    Returns:
+        dict: {countryCode: region}, empty if the file does not exist
+    """
+    countries_file = Path(countries_file)
+    if not countries_file.exists():
+        return {}
+
+    with open(countries_file, 'r', encoding='utf-8') as f:
+        countries = json.load(f)
+    if isinstance(countries, dict):
+        countries = countries.get('countries', [])
+
+    return {c['code']: c.get('region') for c in countries if 'code' in c}
+
+
+class PropertyTaxesDataset:
+    """
+    property-taxes.json loaded once, with hash indexes.
+
+    Args:
+        data: Parsed property-taxes.json document
+        path: File the dataset is saved to
+        regions: Optional {countryCode: region} map (see load_regions())
+    """
+
+    def __init__(self, data, path=None, regions=None):
+        self.data = data
+        self.path = Path(path) if path else None
+        self.regions = regions or {}
+        self.dirty = set()
+
+        # The groups of the secondary indexes hold positions in the countries
+        # array (sorted, i.e. file order), so a record moves between groups
+        # with a bisect instead of a re-sort
+        self._by_code = {}
+        self._position = {}
+        self._by_level = {}
+        self._by_region = {}
+        for position, country in enumerate(data['countries']):
+            code = country['countryCode']
+            # Like the linear lookups, the first record of a code wins
+            if code in self._by_code:
+                continue
+            self._by_code[code] = country
+            self._position[code] = position
+            self._by_level.setdefault(country.get('foreignerRestrictionLevel'), []).append(position)
+            self._by_region.setdefault(self.region(code), []).append(position)
+
+    @classmethod
+    def load(cls, path, regions=None):
+        """Load property-taxes.json and build the indexes."""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data, path, regions)
+
+    def __len__(self):
+        return len(self.data['countries'])
+
+    def __iter__(self):
+        return iter(self.data['countries'])
+
+    def __contains__(self, code):
+        return code in self._by_code
+
+    # ------------------------------------------
+    # Lookups
+    # ------------------------------------------
+
+    def get(self, code):
+        """Country record of a countryCode, or None."""
+        return self._by_code.get(code)
+
+    def region(self, code):
+        """Region of a country (record first, then the countries database)."""
+        country = self._by_code.get(code)
+        if country and country.get('region'):
+            return country['region']
+        return self.regions.get(code)
+
+    def by_restriction_level(self, level):
+        """Country records with a given foreignerRestrictionLevel, in file order."""
+        return [self.data['countries'][position] for position in self._by_level.get(level, [])]
+
+    def by_region(self, region):
+        """Country records of a region, in file order."""
+        return [self.data['countries'][position] for position in self._by_region.get(region, [])]
+
+    # ------------------------------------------
+    # Updates
+    # ------------------------------------------
+
+    def update(self, code, **fields):
+        """
+        Set top-level fields of a country and keep the indexes up to date.
+
+        Args:
+            code: countryCode
+            **fields: field=value pairs
+
+        Returns:
+            The updated record
+
+        Raises:
+            KeyError: if the country is not in the dataset
+        """
+        country = self._by_code[code]
+        if 'foreignerRestrictionLevel' in fields:
+            self._reindex(self._by_level, code, country.get('foreignerRestrictionLevel'),
+                          fields['foreignerRestrictionLevel'])
+        if 'region' in fields:
+            self._reindex(self._by_region, code, self.region(code), fields['region'])
+
+        country.update(fields)
+        self.dirty.add(code)
+        return country
+
+    def set_note(self, code, field, lang, value):
+        """
+        Set one language of a notes field ({'fr': ..., 'en': ...}).
+
+        Raises:
+            KeyError: if the country is not in the dataset
+        """
+        country = self._by_code[code]
+        country.setdefault(field, {})[lang] = value
+        self.dirty.add(code)
+        return country
+
+    def set_record(self, code, record):
+        """
+        Replace the content of a country record (fields may be added or removed).
+
+        The record keeps its identity and position in the countries array.
+
+        Returns:
+            True if the record changed
+
+        Raises:
+            KeyError: if the country is not in the dataset
+        """
+        country = self._by_code[code]
+        if record == country:
+            return False
+
+        self._reindex(self._by_level, code, country.get('foreignerRestrictionLevel'),
+                      record.get('foreignerRestrictionLevel'))
+        self._reindex(self._by_region, code, self.region(code),
+                      record.get('region') or self.regions.get(code))
+
+        country.clear()
+        country.update(record)
+        self.dirty.add(code)
+        return True
+
+    def mark_dirty(self, code):
+        """Declare a record modified in place by the caller."""
+        self.dirty.add(code)
+
+    def _reindex(self, index, code, old, new):
+        if old == new:
+            return
+        position = self._position[code]
+        group = index[old]
+        del group[bisect.bisect_left(group, position)]
+        if not group:
+            del index[old]
+        # Keep file order inside the group
+        bisect.insort(index.setdefault(new, []), position)
+
+    # ------------------------------------------
+    # Write back
+    # ------------------------------------------
+
+    def save(self, path=None):
+        """
+        Write the dataset if it was modified.
+
+        Args:
+            path: Output file (defaults to the file it was loaded from)
+
+        Returns:
+            True if the file was written
+        """
+        if not self.dirty:
+            return False
+
+        write_json(path or self.path, self.data)
+        self.dirty.clear()
+        return True
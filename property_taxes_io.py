@@ -0,0 +1,559 @@
+#!/usr/bin/env python3
+"""
+Property Taxes I/O
+==================
+Shared read / backup / transform / write loop for the scripts that edit
+property-taxes.json one country at a time.
+
+Two modes are available:
+
+- default:   json.load of the whole document, transform, json.dump
+- streaming: the "countries" array is parsed one record at a time and each
+             transformed record is written out immediately, so peak memory
+             stays O(one country) whatever the size of the file. The output
+             is written to a temporary file first, so input and output may
+             be the same file.
+
+Backups go either to a full JSON copy or to a BackupStore (backup_store.py).
+Records can be migrated by a process pool (worker_pool.py) in both modes.
+
+Both modes produce the same file (json.dump with indent=2, ensure_ascii=False),
+written to a temporary file renamed over the output (atomic_output()): a crash
+never leaves a half-written file and the file keeps its permissions.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+import time
+from collections import deque
+from functools import partial
+from pathlib import Path
+
+from pipeline_metrics import RunMetrics
+from worker_pool import map_batches
+
+CHUNK_SIZE = 1 << 16
+
+
+# ==========================================
+# STREAMING READER
+# ==========================================
+
+class _StreamReader:
+    """Incremental JSON reader over a text file, used to walk the top level."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size=CHUNK_SIZE):
+        chunk = self.f.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop the consumed part so the buffer only holds the current record
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Invalid JSON: expected '{char}' at offset {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        size = CHUNK_SIZE
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill(size)
+            size *= 2
+
+
+def iter_document(input_file):
+    """
+    Walk property-taxes.json one top-level entry / one country at a time.
+
+    Args:
+        input_file: Path to property-taxes.json
+
+    Yields:
+        ('field', key, value) for every top-level entry except "countries",
+        ('countries', None, None) where the countries array starts,
+        ('country', None, record) for every country record,
+        in document order
+    """
+    with open(input_file, 'r', encoding='utf-8') as f:
+        reader = _StreamReader(f)
+        reader.expect('{')
+        if reader.peek() == '}':
+            return
+
+        while True:
+            key = reader.value()
+            reader.expect(':')
+
+            if key == 'countries':
+                yield 'countries', None, None
+                reader.expect('[')
+                if reader.peek() == ']':
+                    reader.pos += 1
+                else:
+                    while True:
+                        yield 'country', None, reader.value()
+                        if reader.peek() == ']':
+                            reader.pos += 1
+                            break
+                        reader.expect(',')
+            else:
+                yield 'field', key, reader.value()
+
+            if reader.peek() == '}':
+                return
+            reader.expect(',')
+
+
+def iter_data(data):
+    """Events of iter_document() for a document already loaded in memory."""
+    for key, value in data.items():
+        if key == 'countries':
+            yield 'countries', None, None
+            for country in value:
+                yield 'country', None, country
+        else:
+            yield 'field', key, value
+
+
+def canonical_json(value):
+    """Compact JSON of a value; key order is kept so equal bytes mean an equal file."""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def record_hash(country):
+    """sha256 of a country record (key order included)."""
+    return hashlib.sha256(canonical_json(country)).hexdigest()
+
+
+def country_key(country, seen):
+    """
+    Stable key of a country record: its countryCode, suffixed '#n' for the
+    n-th record sharing that code.
+
+    Args:
+        country: Country record
+        seen: dict of codes already met in this document (updated here)
+    """
+    code = country.get('countryCode', '')
+    seen[code] = seen.get(code, 0) + 1
+    return code if seen[code] == 1 else f'{code}#{seen[code]}'
+
+
+# ==========================================
+# STREAMING WRITER
+# ==========================================
+
+def _dumps(value, indent_level):
+    """json.dumps(indent=2) of a value nested indent_level levels deep."""
+    text = json.dumps(value, ensure_ascii=False, indent=2)
+    return text.replace('\n', '\n' + '  ' * indent_level)
+
+
+class StreamWriter:
+    """Write a top-level object incrementally, in json.dump(indent=2) format."""
+
+    def __init__(self, f):
+        self.f = f
+        self.entries = 0
+        self.countries = None
+
+    def field(self, key, value):
+        self._end_countries()
+        self._key(key)
+        self.f.write(_dumps(value, 1))
+
+    def begin_countries(self):
+        self._key('countries')
+        self.f.write('[')
+        self.countries = 0
+
+    def country(self, record):
+        self.f.write(',\n    ' if self.countries else '\n    ')
+        self.f.write(_dumps(record, 2))
+        self.countries += 1
+
+    def close(self):
+        self._end_countries()
+        self.f.write('\n}' if self.entries else '{}')
+
+    def _end_countries(self):
+        if self.countries is not None:
+            self.f.write('\n  ]' if self.countries else ']')
+            self.countries = None
+
+    def _key(self, key):
+        self.f.write(',\n  ' if self.entries else '{\n  ')
+        self.f.write(json.dumps(key, ensure_ascii=False) + ': ')
+        self.entries += 1
+
+
+def atomic_output(output_file):
+    """
+    Open a temporary file next to output_file, to be renamed over it.
+
+    The temporary file gets the permissions of the file it replaces
+    (mkstemp creates it 0600), or 0644 for a new file, so the rename does not
+    hide the data from the other users that read it.
+
+    Returns:
+        (file, temp_path)
+    """
+    output_file = Path(output_file)
+    fd, temp_path = tempfile.mkstemp(prefix='.property-taxes-', suffix='.json', dir=output_file.resolve().parent)
+    try:
+        os.chmod(temp_path, stat.S_IMODE(output_file.stat().st_mode) if output_file.exists() else 0o644)
+    except BaseException:
+        os.close(fd)
+        os.unlink(temp_path)
+        raise
+    return os.fdopen(fd, 'w', encoding='utf-8'), temp_path
+
+
+def write_json(output_file, data):
+    """
+    Write data to output_file (json.dump, indent=2, ensure_ascii=False)
+    through a temporary file: a crash never leaves a half-written file, and
+    the file keeps its permissions.
+    """
+    f, temp_path = atomic_output(output_file)
+    try:
+        with f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, output_file)
+    except BaseException:
+        # Nothing replaced: do not leave the partial temporary file behind
+        os.unlink(temp_path)
+        raise
+
+
+def _map_country_events(events, map_records):
+    """Replace the 'country' events by map_records(records), kept in order."""
+    events = iter(events)
+    for event in events:
+        yield event
+        if event[0] != 'countries':
+            continue
+
+        following = []
+
+        def records():
+            for event in events:
+                if event[0] != 'country':
+                    following.append(event)
+                    return
+                yield event[2]
+
+        for record in map_records(records()):
+            yield 'country', None, record
+        yield from following
+
+
+def stream_transform(input_file, output_file, transform=None, should_write=None, map_records=None):
+    """
+    Apply transform(country) to every record, one record in memory at a time.
+
+    Args:
+        input_file: Path to input JSON file
+        output_file: Path to output JSON file (may be the input file)
+        transform: Function called with each country record (modified in place)
+        should_write: Function called once every record is transformed; when
+            it returns False the output file is left untouched
+        map_records: Alternative to transform: function mapping the iterator
+            of country records to the transformed records, in the same order
+            (used to hand batches of records to a worker pool)
+
+    Returns:
+        Number of country records processed
+    """
+    events = iter_document(input_file)
+    if map_records is not None:
+        events = _map_country_events(events, map_records)
+
+    count = 0
+    f, temp_path = atomic_output(output_file)
+    try:
+        with f:
+            writer = StreamWriter(f)
+            for event, key, value in events:
+                if event == 'field':
+                    writer.field(key, value)
+                elif event == 'countries':
+                    writer.begin_countries()
+                else:
+                    if transform is not None:
+                        transform(value)
+                    writer.country(value)
+                    count += 1
+            writer.close()
+        if should_write is None or should_write():
+            os.replace(temp_path, output_file)
+        else:
+            os.unlink(temp_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+    return count
+
+
+# ==========================================
+# BACKUP
+# ==========================================
+
+def write_backup(backup_file, data=None, input_file=None):
+    """
+    Back up the document before it is modified.
+
+    Args:
+        backup_file: Path of a full JSON copy, or a BackupStore
+        data: Document already loaded in memory
+        input_file: Path to the document (used when data is None)
+
+    Returns:
+        Where the backup went (file path or store snapshot)
+    """
+    if hasattr(backup_file, 'snapshot'):
+        events = iter_data(data) if data is not None else iter_document(input_file)
+        snapshot_id = backup_file.snapshot(events)
+        return f"{backup_file} (snapshot {snapshot_id})"
+
+    if data is not None:
+        with open(backup_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    else:
+        shutil.copyfile(input_file, backup_file)
+    return backup_file
+
+
+# ==========================================
+# MIGRATION LOOP
+# ==========================================
+
+def _migrate_record(migrate_country, country, stats):
+    """Migrate one record; errors go to stats['errors']. Returns True on success."""
+    country_code = country.get('countryCode', '?')
+    try:
+        migrate_country(country, stats)
+        return True
+    except Exception as e:
+        error_msg = f"{country_code}: {str(e)}"
+        stats['errors'].append(error_msg)
+        print(f"  ❌ Error processing {country_code}: {e}")
+        return False
+
+
+def _migrate_batch(migrate_country, batch, stats):
+    """
+    Worker side of migrate_countries(workers=N).
+
+    Args:
+        migrate_country: Function(country, stats)
+        batch: list of (country, skip) pairs
+        stats: Empty stats dict of the batch
+
+    Returns:
+        tuple: ([(country, ok, seconds), ...], stats)
+    """
+    results = []
+    for country, skip in batch:
+        start = time.perf_counter()
+        ok = not skip and _migrate_record(migrate_country, country, stats)
+        results.append((country, ok, time.perf_counter() - start))
+    return results, stats
+
+
+def migrate_countries(input_file, output_file, backup_file, migrate_country, stats, message, stream=False,
+                      manifest=None, workers=1, metrics=None):
+    """
+    Read, back up, migrate every country and write the result.
+
+    Errors raised by migrate_country are recorded in stats['errors'] and the
+    loop continues with the next country, as every migration script did.
+
+    With a manifest (migration_manifest.MigrationManifest) the run is
+    incremental: records whose hash is the one this step produced last time
+    are not migrated again (counted in stats['unchanged']). When the data
+    file is migrated in place and no record needs the step, neither the
+    backup nor the write happen; when the step changes no record, the write
+    is skipped.
+
+    With workers > 1 the records are migrated by a process pool
+    (worker_pool.py) and written back in their original order; the stats of
+    the workers are merged into stats. migrate_country must then be a
+    module-level function.
+
+    Args:
+        input_file: Path to input JSON file
+        output_file: Path to output JSON file
+        backup_file: Path to backup file, or a BackupStore
+        migrate_country: Function(country, stats) modifying a record in place
+        stats: Statistics dict ('total_countries' and 'errors' are filled here)
+        message: Progress line printed before the migration loop
+        stream: Process the countries array one record at a time
+        manifest: MigrationManifest of this step, or None to migrate everything
+        workers: Number of worker processes
+        metrics: RunMetrics of the run (phases read / backup / transform /
+            write and per-country latencies are recorded in it); in streaming
+            mode reading and writing happen within the transform phase
+
+    Returns:
+        stats
+    """
+    metrics = metrics or RunMetrics('migrate_countries')
+    seen = {}
+    changed = []
+    stats['unchanged'] = 0
+    in_place = Path(output_file).resolve() == Path(input_file).resolve()
+
+    def check(country):
+        """Returns (key, digest, skip) for a record about to be migrated."""
+        if manifest is None:
+            return None, None, False
+        key = country_key(country, seen)
+        digest = record_hash(country)
+        if manifest.is_current(key, digest):
+            stats['unchanged'] += 1
+            return key, digest, True
+        return key, digest, False
+
+    def migrated(key, digest, country):
+        if manifest is not None and manifest.update(key, country) != digest:
+            changed.append(key)
+
+    def migrate(country):
+        metrics.lap()
+        key, digest, skip = check(country)
+        if not skip and _migrate_record(migrate_country, country, stats):
+            migrated(key, digest, country)
+
+    def migrate_records(countries):
+        pending = deque()
+
+        def jobs():
+            for country in countries:
+                key, digest, skip = check(country)
+                pending.append((key, digest))
+                yield country, skip
+
+        for results in map_batches(partial(_migrate_batch, migrate_country), jobs(), stats, workers):
+            for country, ok, seconds in results:
+                metrics.record_latency(seconds)
+                key, digest = pending.popleft()
+                if ok:
+                    migrated(key, digest, country)
+                yield country
+
+    def up_to_date(countries):
+        if manifest is None or not in_place:
+            return False
+        pending = manifest.pending(countries)
+        print(f"🔎 Manifest {manifest}: {pending} countries to migrate")
+        return pending == 0
+
+    def should_write():
+        return manifest is None or bool(changed) or not in_place
+
+    if stream:
+        def countries():
+            for event, key, value in iter_document(input_file):
+                if event == 'country':
+                    stats['total_countries'] += 1
+                    yield value
+
+        metrics.phase('read')
+        if up_to_date(countries()):
+            print("✅ Nothing changed since the last run, data file left untouched")
+            return stats
+
+        # Create backup
+        metrics.phase('backup')
+        print("💾 Creating backup...")
+        print(f"✅ Backup saved to: {write_backup(backup_file, input_file=input_file)}")
+        print()
+
+        metrics.phase('transform')
+        print(f"{message} (streaming)" + (f" ({workers} workers)" if workers > 1 else ""))
+        if workers > 1:
+            stats['total_countries'] = stream_transform(input_file, output_file, should_write=should_write,
+                                                        map_records=migrate_records)
+        else:
+            stats['total_countries'] = stream_transform(input_file, output_file, migrate, should_write)
+        print()
+        print("💾 Migrated data written" if should_write() else "✅ No country changed, data file left untouched")
+        if manifest is not None:
+            manifest.save()
+        return stats
+
+    # Read input file
+    metrics.phase('read')
+    print("📖 Reading input file...")
+    with open(input_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    stats['total_countries'] = len(data['countries'])
+    if up_to_date(data['countries']):
+        print("✅ Nothing changed since the last run, data file left untouched")
+        return stats
+
+    # Create backup
+    metrics.phase('backup')
+    print("💾 Creating backup...")
+    print(f"✅ Backup saved to: {write_backup(backup_file, data=data)}")
+    print()
+
+    # Migrate each country
+    metrics.phase('transform')
+    if workers > 1:
+        print(f"{message} ({workers} workers)")
+        data['countries'] = list(migrate_records(data['countries']))
+    else:
+        print(message)
+        for country in data['countries']:
+            migrate(country)
+
+    # Write output file
+    print()
+    metrics.phase('write')
+    if should_write():
+        print("💾 Writing migrated data...")
+        write_json(output_file, data)
+    else:
+        print("✅ No country changed, data file left untouched")
+
+    if manifest is not None:
+        manifest.save()
+
+    return stats
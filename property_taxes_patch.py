@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Property Taxes Patch Files
+==========================
+Declarative data fixes for property-taxes.json, applied in one batched pass.
+
+A patch file is a JSON document listing patches. Each patch selects
+countries and lists JSON Patch operations (RFC 6902) whose paths are
+relative to the country record:
+
+    {
+      "description": "Barbados foreign access notes",
+      "patches": [
+        {"countryCode": "BB", "ops": [
+          {"op": "replace", "path": "/foreignAccessNotes/fr", "value": "..."}
+        ]},
+        {"foreignerRestrictionLevel": "medium", "ops": [
+          {"op": "replace", "path": "/foreignerRestrictionLevel", "value": "high"},
+          {"op": "replace", "path": "/foreignerRestrictionValue", "value": 2}
+        ]}
+      ]
+    }
+
+Selectors: countryCode, foreignerRestrictionLevel or region, resolved with
+the indexes of PropertyTaxesDataset against the data as loaded (before any
+patch is applied).
+
+Operations: add, replace, remove and test. Differences with RFC 6902:
+- add creates the missing parent objects (e.g. /transferTaxNotes/fr on a
+  country without transferTaxNotes)
+- a failing test skips the operations of that patch for that country
+  instead of failing the whole document, so that a fix can be guarded
+
+All the writes of all the patch files are collected first. Two writes to
+the same field (or to a field and one of its parents) with different values
+are a conflict: nothing is applied. Otherwise the patches are applied to
+the dataset and the file is written once.
+
+The patch files of the hard-coded fixes live in patches/ and are applied by
+apply-patches.py (all of them by default).
+"""
+
+import copy
+import json
+from pathlib import Path
+
+from pipeline_metrics import RunMetrics
+from property_taxes_dataset import PropertyTaxesDataset
+from property_taxes_io import write_backup
+
+SELECTORS = ['countryCode', 'foreignerRestrictionLevel', 'region']
+OPERATIONS = ['add', 'replace', 'remove', 'test']
+WRITE_OPERATIONS = {'add', 'replace', 'remove'}
+
+
+def parse_pointer(path):
+    """
+    Split a JSON pointer into its keys.
+
+    Args:
+        path: JSON pointer relative to the country record (e.g. '/notes/fr')
+
+    Returns:
+        tuple of keys
+
+    Raises:
+        ValueError: if the pointer is empty or does not start with '/'
+    """
+    if not path or not path.startswith('/'):
+        raise ValueError(f"Invalid path '{path}' (expected '/field' or '/field/lang')")
+    return tuple(key.replace('~1', '/').replace('~0', '~') for key in path[1:].split('/'))
+
+
+def load_patch_file(patch_file):
+    """
+    Read and validate a patch file.
+
+    Args:
+        patch_file: Path to the patch file
+
+    Returns:
+        list of patches, each with 'source' (file name), 'selector'
+        (field, value) and 'ops' (op dicts with a parsed 'keys' pointer)
+
+    Raises:
+        ValueError: if the file does not follow the patch format
+    """
+    with open(patch_file, 'r', encoding='utf-8') as f:
+        document = json.load(f)
+
+    source = Path(patch_file).name
+    patches = []
+    for number, patch in enumerate(document.get('patches', []), start=1):
+        selectors = [field for field in SELECTORS if field in patch]
+        if len(selectors) != 1:
+            raise ValueError(f"{source} patch {number}: expected one of {', '.join(SELECTORS)}")
+
+        ops = []
+        for op in patch.get('ops', []):
+            if op.get('op') not in OPERATIONS:
+                raise ValueError(f"{source} patch {number}: unknown op '{op.get('op')}'")
+            if op['op'] != 'remove' and 'value' not in op:
+                raise ValueError(f"{source} patch {number}: '{op['op']}' without value")
+            ops.append(dict(op, keys=parse_pointer(op.get('path'))))
+
+        patches.append({
+            'source': f"{source} patch {number}",
+            'selector': (selectors[0], patch[selectors[0]]),
+            'ops': ops,
+        })
+
+    return patches
+
+
+def select_countries(dataset, selector):
+    """Countries matched by a patch selector (uses the dataset indexes)."""
+    field, value = selector
+    if field == 'countryCode':
+        country = dataset.get(value)
+        return [country] if country else []
+    if field == 'foreignerRestrictionLevel':
+        return dataset.by_restriction_level(value)
+    return dataset.by_region(value)
+
+
+def resolve_patches(dataset, patches):
+    """
+    Match every patch with its countries and look for conflicting writes.
+
+    Args:
+        dataset: PropertyTaxesDataset
+        patches: Patches of load_patch_file()
+
+    Returns:
+        (targets, conflicts, errors): targets is a list of (countryCode, patch),
+        conflicts and errors are lists of messages
+    """
+    targets = []
+    errors = []
+    writes = {}
+
+    for patch in patches:
+        countries = select_countries(dataset, patch['selector'])
+        if not countries and patch['selector'][0] == 'countryCode':
+            errors.append(f"{patch['source']}: {patch['selector'][1]} not found in property-taxes.json")
+
+        for country in countries:
+            code = country['countryCode']
+            targets.append((code, patch))
+            for op in patch['ops']:
+                if op['op'] in WRITE_OPERATIONS:
+                    writes.setdefault(code, []).append((op['keys'], op['op'], op.get('value'), patch['source']))
+
+    conflicts = []
+    for code, country_writes in writes.items():
+        for i, (keys, op, value, source) in enumerate(country_writes):
+            for other_keys, other_op, other_value, other_source in country_writes[i + 1:]:
+                if other_source == source:
+                    continue
+                overlap = keys[:len(other_keys)] == other_keys or other_keys[:len(keys)] == keys
+                same = keys == other_keys and (op == 'remove') == (other_op == 'remove') and value == other_value
+                if overlap and not same:
+                    conflicts.append(f"{code} /{'/'.join(keys)}: {source} conflicts with "
+                                     f"{other_source} (/{'/'.join(other_keys)})")
+
+    return targets, conflicts, errors
+
+
+def apply_ops(record, ops):
+    """
+    Apply the operations of one patch to a copy of a country record.
+
+    Args:
+        record: Country record (not modified)
+        ops: Operations of the patch
+
+    Returns:
+        The patched copy, or None if a test operation failed
+
+    Raises:
+        ValueError: if a path cannot be replaced or removed
+    """
+    patched = copy.deepcopy(record)
+
+    for op in ops:
+        *parents, key = op['keys']
+        target = patched
+        for parent in parents:
+            if not isinstance(target.get(parent), dict):
+                if op['op'] == 'test':
+                    return None
+                if op['op'] != 'add':
+                    raise ValueError(f"path '{op['path']}' not found")
+                target[parent] = {}
+            target = target[parent]
+
+        if op['op'] == 'test':
+            if target.get(key) != op['value']:
+                return None
+        elif op['op'] == 'add':
+            target[key] = copy.deepcopy(op['value'])
+        elif key not in target:
+            raise ValueError(f"path '{op['path']}' not found")
+        elif op['op'] == 'replace':
+            target[key] = copy.deepcopy(op['value'])
+        else:
+            del target[key]
+
+    return patched
+
+
+def apply_patches(dataset, targets, stats):
+    """
+    Apply resolved patches to the dataset.
+
+    Each patch is applied to one country as a whole: if one of its
+    operations fails, none of them is applied to that country.
+
+    Args:
+        dataset: PropertyTaxesDataset
+        targets: (countryCode, patch) list of resolve_patches()
+        stats: Statistics dictionary ('applied', 'unchanged', 'skipped_test',
+            'errors')
+    """
+    for code, patch in targets:
+        try:
+            patched = apply_ops(dataset.get(code), patch['ops'])
+        except ValueError as e:
+            stats['errors'].append(f"{patch['source']} ({code}): {e}")
+            continue
+
+        if patched is None:
+            stats['skipped_test'] += 1
+        elif dataset.set_record(code, patched):
+            stats['applied'] += 1
+        else:
+            stats['unchanged'] += 1
+
+
+def apply_patch_files(patch_files, property_taxes_file, backup_file, script='apply-patches'):
+    """
+    Apply any number of patch files to property-taxes.json in one pass.
+
+    The data is read, backed up and written once whatever the number of
+    patches. Nothing is applied when two patches conflict.
+
+    Args:
+        patch_files: Paths to the patch files (applied in this order)
+        property_taxes_file: Path to property-taxes.json
+        backup_file: Path to backup file (or a BackupStore)
+        script: Name of the run in the pipeline metrics
+
+    Returns:
+        dict: Statistics
+    """
+    print("=" * 70)
+    print("APPLYING PATCH FILES")
+    print("=" * 70)
+    for patch_file in patch_files:
+        print(f"Patch file:          {patch_file}")
+    print(f"Property taxes file: {property_taxes_file}")
+    print(f"Backup file:         {backup_file}")
+    print()
+
+    stats = {
+        'patch_files': len(patch_files),
+        'patches': 0,
+        'targets': 0,
+        'applied': 0,
+        'unchanged': 0,
+        'skipped_test': 0,
+        'conflicts': [],
+        'errors': []
+    }
+
+    metrics = RunMetrics(script)
+    metrics.phase('read')
+    print("📖 Reading patch files...")
+    patches = []
+    for patch_file in patch_files:
+        try:
+            patches.extend(load_patch_file(patch_file))
+        except (OSError, ValueError) as e:
+            stats['errors'].append(f"{patch_file}: {e}")
+    stats['patches'] = len(patches)
+
+    if stats['errors']:
+        print(f"❌ Invalid patch files, nothing applied: {'; '.join(stats['errors'])}")
+        stats['metrics'] = metrics.finish(patches=len(patches))
+        return stats
+
+    print("📖 Reading property-taxes.json...")
+    dataset = PropertyTaxesDataset.load(property_taxes_file)
+
+    metrics.phase('transform')
+    print("🔎 Resolving patches...")
+    targets, stats['conflicts'], stats['errors'] = resolve_patches(dataset, patches)
+    stats['targets'] = len(targets)
+
+    if stats['conflicts']:
+        print(f"❌ {len(stats['conflicts'])} conflicting write(s), nothing applied:")
+        for conflict in stats['conflicts']:
+            print(f"  - {conflict}")
+        stats['metrics'] = metrics.finish(countries=len(dataset), patches=len(patches))
+        return stats
+
+    if targets:
+        metrics.phase('backup')
+        print("💾 Creating backup...")
+        print(f"✅ Backup saved to: {write_backup(backup_file, data=dataset.data)}")
+        print()
+
+        metrics.phase('transform')
+        print("🔄 Applying patches...")
+        apply_patches(dataset, targets, stats)
+
+    metrics.phase('write')
+    if dataset.save():
+        print("💾 Updated property-taxes.json written")
+    else:
+        print("✅ No country changed, property-taxes.json left untouched")
+    stats['metrics'] = metrics.finish(countries=len(dataset), patches=len(patches))
+
+    print()
+    print("=" * 70)
+    print("PATCH STATISTICS")
+    print("=" * 70)
+    print(f"Patch files:                  {stats['patch_files']}")
+    print(f"Patches:                      {stats['patches']}")
+    print(f"Country matches:              {stats['targets']}")
+    print(f"Applied:                      {stats['applied']}")
+    print(f"Unchanged (already applied):  {stats['unchanged']}")
+    print(f"Skipped (test failed):        {stats['skipped_test']}")
+    print(f"Errors:                       {len(stats['errors'])}")
+
+    if stats['errors']:
+        print()
+        print("Error details:")
+        for error in stats['errors']:
+            print(f"  - {error}")
+
+    print()
+    print("=" * 70)
+    print("✅ PATCHES APPLIED")
+    print("=" * 70)
+    print()
+
+    return stats
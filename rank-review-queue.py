@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Rank Review Queue
+=================
+This script scores the items of the review file (generate-review-file.py)
+by categorization confidence, auto-accepts the confident ones and writes
+only the uncertain tail as a paged review queue.
+
+Confidence of an item:
+- keyword rules: lowest confidence of its sentences (RULE_CONFIDENCE in
+  auto-fill-review.py: one clear topic 1.0, ... both topics unsplit 0.0)
+- with --classifier[=model]: for the texts the classifier of
+  notes_classifier.py is used for (trusted language, confident), the
+  lowest of both confidences if it splits the text like the rules,
+  otherwise 0; the other texts keep the confidence of the rules. On the
+  current reviewed file the classifier beats the rules in no language, so
+  --classifier changes nothing (see notes_classifier.py)
+
+RULE_CONFIDENCE only ranks the cases of the rules, it is not a measured
+accuracy: the reviewed file holds no human correction of the rules yet,
+so there is nothing to calibrate it on. The default threshold (1.0)
+therefore only auto-accepts the items whose every sentence has a single
+clear topic; a general sentence or a split on a transfer tax header goes
+to the queue. Lower it once corrected reviews show those cases are safe.
+
+Outputs:
+- accepted file: items at or above the threshold, filled with the rules
+  categorization (apply it with apply-manual-review.py)
+- queue directory: items below the threshold, least confident first, in
+  pages of --page-size items (page-001.json, ...). Their fields are left
+  as in the review file (empty) and the split of the rules is only given
+  as suggestedSplit: apply-manual-review.py skips an item nobody filled
+  in. With --queue-size=N only the N least confident items are queued,
+  the others are deferred to the next run.
+
+Usage: python rank-review-queue.py [review_file] [accepted_file] [queue_dir]
+       [--threshold=1.0] [--page-size=25] [--queue-size=N] [--classifier[=model]]
+"""
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+from pipeline_metrics import RunMetrics, DEFAULT_METRICS_FILENAME, enable_from_argv
+from review_io import iter_review
+
+script_dir = Path(__file__).parent
+
+DEFAULT_THRESHOLD = 1.0
+DEFAULT_PAGE_SIZE = 25
+FIELDS = ['propertyTaxNotes', 'transferTaxNotes', 'countryGeneralNotes']
+
+
+def load_script(filename):
+    """Import a hyphenated script as a module."""
+    spec = importlib.util.spec_from_file_location(filename.replace('-', '_')[:-3], script_dir / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def score_items(review_data, auto_fill, classifier=None):
+    """
+    Categorize the review items and score the confidence of each categorization.
+
+    Args:
+        review_data: Review items (generate-review-file.py)
+        auto_fill: auto-fill-review.py module (keyword rules)
+        classifier: Optional LanguageClassifiers
+
+    Returns:
+        list of the review items with the split of the rules
+        ('suggestedSplit') and its 'confidence', in review file order
+    """
+    texts = [item['currentNotes'] for item in review_data]
+    langs = [item['lang'] for item in review_data]
+    predictions = classifier.categorize_batch(texts, langs) if classifier else [None] * len(texts)
+
+    scored = []
+    for item, predicted in zip(review_data, predictions):
+        categorized = auto_fill.smart_categorize(item['currentNotes'], item['lang'])
+        confidence = auto_fill.categorize_confidence(item['currentNotes'], item['lang'])
+
+        if predicted is not None:
+            agree = all(predicted[field] == categorized[field] for field in FIELDS)
+            confidence = min(confidence, predicted['confidence'] or 0) if agree else 0.0
+
+        scored.append({**item, 'suggestedSplit': {field: categorized[field] for field in FIELDS},
+                       'confidence': round(confidence, 4)})
+    return scored
+
+
+def accept(item):
+    """Scored item filled with its suggested split."""
+    accepted = {key: value for key, value in item.items() if key != 'suggestedSplit'}
+    accepted.update(item['suggestedSplit'])
+    return accepted
+
+
+def write_json(path, value):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(value, f, ensure_ascii=False, indent=2)
+
+
+def rank_review_queue(review_file, accepted_file, queue_dir, threshold=DEFAULT_THRESHOLD,
+                      page_size=DEFAULT_PAGE_SIZE, queue_size=None, classifier=None):
+    """
+    Split the review file into auto-accepted items and a paged review queue.
+
+    Args:
+        review_file: Review file of generate-review-file.py (.json or .jsonl)
+        accepted_file: Output file of the auto-accepted items
+        queue_dir: Output directory of the review queue pages
+        threshold: Lowest confidence auto-accepted
+        page_size: Items per review queue page
+        queue_size: Maximum number of queued items (None = all uncertain items)
+        classifier: Optional LanguageClassifiers
+
+    Returns:
+        dict: Statistics
+    """
+    print("=" * 70)
+    print("RANKING REVIEW QUEUE")
+    print("=" * 70)
+    print(f"Review file:   {review_file}")
+    print(f"Accepted file: {accepted_file}")
+    print(f"Queue dir:     {queue_dir}")
+    print(f"Threshold:     {threshold}" + (" (rules + classifier)" if classifier else " (rules)"))
+    print()
+
+    metrics = RunMetrics(Path(__file__).stem)
+    metrics.phase('read')
+    print("📖 Reading review file...")
+    review_data = list(iter_review(review_file))
+
+    metrics.phase('transform')
+    print(f"🔎 Scoring {len(review_data)} items...")
+    scored = score_items(review_data, load_script('auto-fill-review.py'), classifier)
+
+    accepted = [accept(item) for item in scored if item['confidence'] >= threshold]
+    # Least confident first; review file order among equal confidences
+    uncertain = sorted((item for item in scored if item['confidence'] < threshold), key=lambda item: item['confidence'])
+    queue = uncertain[:queue_size] if queue_size is not None else uncertain
+
+    metrics.phase('write')
+    print("💾 Writing accepted items and review queue...")
+    write_json(accepted_file, accepted)
+
+    queue_dir = Path(queue_dir)
+    queue_dir.mkdir(parents=True, exist_ok=True)
+    # Pages of a previous run would mix with this queue
+    for old_page in queue_dir.glob('page-*.json'):
+        old_page.unlink()
+
+    pages = []
+    for start in range(0, len(queue), page_size):
+        page_file = queue_dir / f"page-{len(pages) + 1:03d}.json"
+        write_json(page_file, [dict(item, rank=start + i + 1) for i, item in enumerate(queue[start:start + page_size])])
+        pages.append(page_file)
+
+    stats = {
+        'total': len(scored),
+        'accepted': len(accepted),
+        'queued': len(queue),
+        'deferred': len(uncertain) - len(queue),
+        'pages': len(pages),
+    }
+    stats['metrics'] = metrics.finish(items=len(scored), queued=len(queue))
+
+    print()
+    print("=" * 70)
+    print("REVIEW QUEUE STATISTICS")
+    print("=" * 70)
+    print(f"Total items:              {stats['total']}")
+    print(f"Auto-accepted:            {stats['accepted']}")
+    print(f"Queued for review:        {stats['queued']} ({stats['pages']} pages of up to {page_size})")
+    print(f"Deferred (queue full):    {stats['deferred']}")
+
+    if queue:
+        print()
+        print("Least confident items:")
+        for item in queue[:5]:
+            print(f"  {item['confidence']:.2f}  {item['countryCode']} ({item['lang']}): {item['currentNotes'][:60]}...")
+
+    print()
+    print("=" * 70)
+    print("✅ REVIEW QUEUE READY")
+    print("=" * 70)
+    print()
+    print("Next steps:")
+    print(f"1. Apply the accepted items: python3 apply-manual-review.py {accepted_file}")
+    print(f"2. Fill in each page of {queue_dir} (the rules' split is in suggestedSplit)")
+    print("3. Apply each page: python3 apply-manual-review.py <page>")
+    print()
+
+    return stats
+
+
+if __name__ == '__main__':
+    review_file = script_dir / 'property-taxes-manual-review.json'
+    accepted_file = script_dir / 'property-taxes-manual-review-accepted.json'
+    queue_dir = script_dir / 'review-queue'
+
+    # Allow override via command line
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = dict(arg[2:].split('=', 1) for arg in sys.argv[1:] if arg.startswith('--') and '=' in arg)
+    if len(args) > 0:
+        review_file = Path(args[0])
+    if len(args) > 1:
+        accepted_file = Path(args[1])
+    if len(args) > 2:
+        queue_dir = Path(args[2])
+
+    if not review_file.exists():
+        print(f"❌ Error: Review file not found: {review_file}")
+        sys.exit(1)
+
+    classifier = None
+    if '--classifier' in sys.argv or 'classifier' in options:
+        # NumPy is only needed for the classifier
+        from notes_classifier import LanguageClassifiers, MODEL_FILENAME
+
+        model_file = Path(options.get('classifier', script_dir / MODEL_FILENAME))
+        if not model_file.exists():
+            print(f"❌ Error: Classifier model not found: {model_file}")
+            print("Train it first: python3 notes_classifier.py")
+            sys.exit(1)
+        classifier = LanguageClassifiers.load(model_file)
+        if not classifier.languages:
+            print("⚠️  The classifier did not beat the keyword rules in any language: --classifier is inactive,"
+                  " the output is the one of the rules")
+
+    enable_from_argv(sys.argv, script_dir / DEFAULT_METRICS_FILENAME)
+
+    rank_review_queue(review_file, accepted_file, queue_dir,
+                      threshold=float(options.get('threshold', DEFAULT_THRESHOLD)),
+                      page_size=int(options.get('page-size', DEFAULT_PAGE_SIZE)),
+                      queue_size=int(options['queue-size']) if 'queue-size' in options else None,
+                      classifier=classifier)
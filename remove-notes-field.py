@@ -7,8 +7,12 @@ after all content has been migrated to dedicated fields.
 """
 
 import json
+import sys
 from pathlib import Path
-from datetime import datetime
+
+from backup_store import BackupStore
+from pipeline_metrics import RunMetrics, DEFAULT_METRICS_FILENAME, enable_from_argv
+from property_taxes_io import write_backup
 
 def remove_notes_field(property_taxes_file, backup_file):
     """
@@ -26,18 +30,20 @@ def remove_notes_field(property_taxes_file, backup_file):
     print()
 
     # Read property taxes file
+    metrics = RunMetrics(Path(__file__).stem)
+    metrics.phase('read')
     print("📖 Reading property-taxes.json...")
     with open(property_taxes_file, 'r', encoding='utf-8') as f:
         data = json.load(f)
 
     # Create backup
+    metrics.phase('backup')
     print("💾 Creating backup...")
-    with open(backup_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"✅ Backup saved")
+    print(f"✅ Backup saved to: {write_backup(backup_file, data=data)}")
     print()
 
     # Statistics
+    metrics.phase('transform')
     stats = {
         'total_countries': len(data['countries']),
         'removed': 0,
@@ -48,6 +54,7 @@ def remove_notes_field(property_taxes_file, backup_file):
     print("🗑️  Removing notes field from all countries...")
 
     for country in data['countries']:
+        metrics.lap()
         if 'notes' in country:
             # Check if notes were empty
             notes_fr = country['notes'].get('fr', '').strip()
@@ -70,10 +77,12 @@ def remove_notes_field(property_taxes_file, backup_file):
             stats['removed'] += 1
 
     # Write updated file
+    metrics.phase('write')
     print()
     print("💾 Writing updated property-taxes.json...")
     with open(property_taxes_file, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+    stats['metrics'] = metrics.finish(countries=len(data['countries']))
 
     print()
     print("=" * 70)
@@ -110,10 +119,12 @@ if __name__ == '__main__':
     script_dir = Path(__file__).parent
 
     property_taxes_file = script_dir / '../pickandtip-api/data/topics/property-taxes.json'
-    backup_file = script_dir / f'../pickandtip-api/data/topics/property-taxes.backup-remove-notes-{datetime.now().strftime("%Y%m%d-%H%M%S")}.json'
+    backup_file = BackupStore(script_dir / '../pickandtip-api/data/topics/backups', label='remove-notes')
 
     if not property_taxes_file.exists():
         print(f"❌ Error: Property taxes file not found: {property_taxes_file}")
         exit(1)
 
+    enable_from_argv(sys.argv, property_taxes_file.parent / DEFAULT_METRICS_FILENAME)
+
     remove_notes_field(property_taxes_file, backup_file)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Review File I/O
+===============
+Read and write the review files of generate-review-file.py,
+auto-fill-review.py and apply-manual-review.py in either format, chosen by
+the file extension:
+
+- .json:  one JSON array (json.dump with indent=2, ensure_ascii=False)
+- .jsonl: newline-delimited JSON, one review item per line
+
+Both formats are written one item at a time (ReviewWriter), so the review
+never has to be held in memory, to a temporary file that only replaces the
+output once complete. JSONL files are also read one line at a
+time: a review of any size is then processed with constant memory, and
+every complete line is committed as soon as it is written. After a crash,
+auto-fill-review.py --resume drops the partial last line of its JSONL
+output (committed_items()) and appends after the items already there.
+
+Every review item carries the fingerprint of the notes it was generated
+from (baseNotesHash, see notes_fingerprint()), so apply-manual-review.py
+can tell when the notes changed since.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+from pathlib import Path
+
+JSONL_SUFFIXES = ('.jsonl', '.ndjson')
+
+
+def is_jsonl(review_file):
+    """True if the review file is newline-delimited JSON (by extension)."""
+    return Path(review_file).suffix.lower() in JSONL_SUFFIXES
+
+
+def notes_fingerprint(notes):
+    """Short hash of the notes of one language (baseNotesHash of the review items)."""
+    return hashlib.sha256(notes.encode('utf-8')).hexdigest()[:16]
+
+
+def iter_review(review_file, skip=0):
+    """
+    Read the review items one at a time.
+
+    Args:
+        review_file: .json or .jsonl review file
+        skip: Number of leading items to skip (already processed)
+
+    Yields:
+        Review items, in file order. Blank lines of a JSONL file are
+        ignored, and so is a last line cut short by a crash.
+    """
+    if not is_jsonl(review_file):
+        with open(review_file, 'r', encoding='utf-8') as f:
+            review_data = json.load(f)
+        yield from itertools.islice(review_data, skip, None)
+        return
+
+    with open(review_file, 'r', encoding='utf-8') as f:
+        items = (line for line in f if line.strip())
+        for line in itertools.islice(items, skip, None):
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                if line.endswith('\n'):
+                    raise
+                # Partial last line of an interrupted write
+                return
+
+
+def committed_items(review_file):
+    """
+    Count the complete items of a JSONL file, dropping a partial last line.
+
+    Args:
+        review_file: .jsonl file (may not exist yet)
+
+    Returns:
+        int: Number of items committed to the file
+
+    Raises:
+        ValueError: If the file is not a JSONL file
+    """
+    if not is_jsonl(review_file):
+        raise ValueError(f"Only JSONL review files can be resumed: {review_file}")
+    if not Path(review_file).exists():
+        return 0
+
+    count = 0
+    complete = 0
+    with open(review_file, 'rb+') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            complete += len(line)
+            if line.strip():
+                count += 1
+        if f.seek(0, os.SEEK_END) > complete:
+            f.truncate(complete)
+
+    return count
+
+
+class ReviewWriter:
+    """
+    Write review items one at a time.
+
+    JSON files get the exact layout of json.dump(items, indent=2), JSONL
+    files one line per item, flushed as soon as it is written.
+
+    By default the items go to a temporary file next to the output, renamed
+    over it by close(): an interrupted run (exception inside the with
+    block, see abort()) leaves the previous file as it was, never a
+    truncated review. With atomic=False (and when appending) the items are
+    written in place instead: each complete JSONL line is then committed
+    as soon as it is written, which is what auto-fill-review.py --resume
+    continues from.
+
+    Args:
+        review_file: .json or .jsonl output file
+        append: Append to an existing JSONL file instead of replacing it
+        atomic: Replace the output only once every item is written
+
+    Raises:
+        ValueError: if appending to or writing in place a .json file
+    """
+
+    def __init__(self, review_file, append=False, atomic=True):
+        self.jsonl = is_jsonl(review_file)
+        self.review_file = Path(review_file)
+        self.atomic = atomic and not append
+        if not self.jsonl and not self.atomic:
+            raise ValueError(f"Only JSONL review files can be written in place: {review_file}")
+
+        if self.atomic:
+            fd, self.temp_path = tempfile.mkstemp(prefix=f'.{self.review_file.name}.', suffix='.tmp',
+                                                  dir=self.review_file.resolve().parent)
+            # Keep the permissions of the file it replaces (mkstemp creates it 0600)
+            os.chmod(self.temp_path, self.review_file.stat().st_mode & 0o777 if self.review_file.exists() else 0o644)
+            self.f = os.fdopen(fd, 'w', encoding='utf-8')
+        else:
+            self.temp_path = None
+            self.f = open(review_file, 'a' if append else 'w', encoding='utf-8')
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, item):
+        if self.jsonl:
+            self.f.write(json.dumps(item, ensure_ascii=False) + '\n')
+            self.f.flush()
+        else:
+            self.f.write(',\n  ' if self.count else '[\n  ')
+            self.f.write(json.dumps(item, ensure_ascii=False, indent=2).replace('\n', '\n  '))
+        self.count += 1
+
+    def close(self):
+        """Finish the file and put it in place of the output."""
+        if self.f.closed:
+            return
+        if not self.jsonl:
+            self.f.write('\n]' if self.count else '[]')
+        self.f.close()
+        if self.temp_path:
+            os.replace(self.temp_path, self.review_file)
+
+    def abort(self):
+        """Stop without finishing: the output file is left untouched (the
+        committed lines of an in-place JSONL file are kept)."""
+        if self.f.closed:
+            return
+        self.f.close()
+        if self.temp_path:
+            os.unlink(self.temp_path)
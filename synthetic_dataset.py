@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Synthetic property-taxes.json Generator
+=======================================
+Generates property-taxes.json files of any size (1k, 100k, 1M countries) with
+realistic FR/EN notes, to measure how the pipeline scripts scale.
+
+The notes are assembled the way the real ones are written: a general
+preamble, warnings ("ATTENTION:", "WARNING:", "⚠️", ...), the section headers
+the migrations look for, and standalone text before "Foreign access:" for
+the review scripts. The sentences are sampled from the manually reviewed
+file (property-taxes-manual-review-filled.json), so the keyword mix seen by
+smart_categorize is the real one.
+
+Records are written one at a time, so memory does not grow with the size of
+the generated file. The same seed always gives the same file.
+
+Usage: python synthetic_dataset.py <count> <output_file> [--seed=N]
+"""
+
+import json
+import random
+import re
+import sys
+from pathlib import Path
+
+from property_taxes_io import StreamWriter
+
+DEFAULT_SEED = 42
+
+SECTION_HEADERS = {
+    'fr': {
+        'propertyTaxNotes': 'Taxe foncière annuelle:',
+        'transferTaxNotes': 'Taxe de transfert:',
+        'foreignAccessNotes': 'Accès étrangers:',
+    },
+    'en': {
+        'propertyTaxNotes': 'Annual property tax:',
+        'transferTaxNotes': 'Transfer tax:',
+        'foreignAccessNotes': 'Foreign access:',
+    }
+}
+
+WARNING_MARKERS = {
+    'fr': ['ATTENTION:', 'IMPORTANT:', 'Note:', '⚠️'],
+    'en': ['WARNING:', 'IMPORTANT:', 'Note:', '⚠️'],
+}
+
+WARNINGS = {
+    'fr': ['Données pré-2021.', 'Législation locale distincte.', 'Réforme en cours.', 'Taux non officiels.'],
+    'en': ['Data pre-2021.', 'Local legislation distinct.', 'Reform in progress.', 'Unofficial rates.'],
+}
+
+FOREIGN_ACCESS = {
+    'unrestricted': {'fr': 'Pleine propriété sans restriction.', 'en': 'Full ownership without restriction.'},
+    'low': {'fr': 'Approbation requise.', 'en': 'Approval required.'},
+    'high': {'fr': 'Permis requis pour non-résidents.', 'en': 'Permit required for non-residents.'},
+    'nationalsOnly': {'fr': 'INTERDIT aux étrangers.', 'en': 'PROHIBITED for foreigners.'},
+}
+
+RESTRICTION_VALUES = {'unrestricted': 0, 'low': 1, 'high': 2, 'nationalsOnly': 3}
+
+# The reviewed file only holds FR items: EN sentences written in the same
+# style, with the keywords of the EN rules of smart_categorize
+FALLBACK_SAMPLES = {
+    'en': {
+        'propertyTaxNotes': [
+            'Annual property tax of 0.1-0.5% of cadastral value, set by the municipality.',
+            'Council tax applies to residential property (bands A-H).',
+            'Rates charged by local councils on the unimproved land value.',
+            'Land tax above the tax-free threshold, progressive rates.',
+            'Municipal tax reformed in 2024, assessment every 5 years.',
+            'Real property tax of 1-2% in Metro Manila.',
+        ],
+        'transferTaxNotes': [
+            'Stamp duty of 1-4% depending on the purchase price.',
+            'Transfer tax of 6% plus notary fees (~1%).',
+            'Registration fee of 2% and capital gains tax on resale.',
+            'Transfer duty progressive from 0% to 13%.',
+            'Acquisition tax of 4% for second homes.',
+            'Transaction fees around 3% of the price.',
+        ],
+        'countryGeneralNotes': [
+            'Rates vary by state and municipality.',
+            'Tax haven with no annual property tax.',
+            'Autonomous territory with its own legislation.',
+            'Depending on the province, local surcharges apply.',
+            'Recent reform harmonized the national rates.',
+            'New residents are exempt for the first 10 years.',
+        ],
+        'standalone': [
+            'Rates vary by municipality. Stamp duty 2% for residents.',
+            'Annual property tax around 0.3%. Transfer tax 4% of price.',
+            'No tax on property holding, registration fee 1%.',
+            'Council tax bands. Stamp duty progressive up to 12%.',
+        ],
+    },
+}
+
+# Share of records carrying each part of the notes
+PROBABILITIES = {
+    'general': 0.7,
+    'warning': 0.25,
+    'propertyTaxNotes': 0.6,
+    'transferTaxNotes': 0.5,
+    'foreignAccessNotes': 0.95,
+    'standalone': 0.15,
+}
+
+
+def _sentences(text):
+    return [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if len(s.strip()) > 5]
+
+
+def load_samples(review_file):
+    """
+    Collect the sentences of the manually reviewed notes, per language and field.
+
+    Args:
+        review_file: Path to property-taxes-manual-review-filled.json
+
+    Returns:
+        dict: {lang: {'propertyTaxNotes': [...], 'transferTaxNotes': [...],
+        'countryGeneralNotes': [...], 'standalone': [...]}}, completed by
+        FALLBACK_SAMPLES for a language missing from the review file
+    """
+    with open(review_file, 'r', encoding='utf-8') as f:
+        review_data = json.load(f)
+
+    samples = {}
+    for item in review_data:
+        lang = item['lang'].lower()
+        pools = samples.setdefault(lang, {'propertyTaxNotes': [], 'transferTaxNotes': [],
+                                          'countryGeneralNotes': [], 'standalone': []})
+        for field in ['propertyTaxNotes', 'transferTaxNotes', 'countryGeneralNotes']:
+            pools[field].extend(_sentences(item.get(field, '')))
+        pools['standalone'].append(item['currentNotes'])
+
+    for lang, pools in FALLBACK_SAMPLES.items():
+        samples.setdefault(lang, {field: list(sentences) for field, sentences in pools.items()})
+
+    # A language without reviewed general notes falls back on standalone notes
+    for pools in samples.values():
+        if not pools['countryGeneralNotes']:
+            pools['countryGeneralNotes'] = list(pools['standalone'])
+
+    return samples
+
+
+def generate_notes(rng, samples, lang, level):
+    """
+    Build the notes string of one language.
+
+    Args:
+        rng: random.Random instance
+        samples: Result of load_samples()
+        lang: 'fr' or 'en'
+        level: foreignerRestrictionLevel of the record
+
+    Returns:
+        str: Notes text
+    """
+    pools = samples[lang]
+    headers = SECTION_HEADERS[lang]
+    parts = []
+
+    if rng.random() < PROBABILITIES['standalone']:
+        # Text straight before the foreign access section (review file input)
+        parts.append(rng.choice(pools['standalone']))
+    else:
+        if rng.random() < PROBABILITIES['general']:
+            parts.append(' '.join(rng.sample(pools['countryGeneralNotes'], min(2, len(pools['countryGeneralNotes'])))))
+        if rng.random() < PROBABILITIES['warning']:
+            parts.append(f"{rng.choice(WARNING_MARKERS[lang])} {rng.choice(WARNINGS[lang])}")
+        for field in ['propertyTaxNotes', 'transferTaxNotes']:
+            if pools[field] and rng.random() < PROBABILITIES[field]:
+                count = min(rng.randint(1, 3), len(pools[field]))
+                parts.append(f"{headers[field]} {' '.join(rng.sample(pools[field], count))}")
+
+    if rng.random() < PROBABILITIES['foreignAccessNotes']:
+        parts.append(f"{headers['foreignAccessNotes']} {FOREIGN_ACCESS[level][lang]}")
+
+    return ' '.join(parts)
+
+
+def generate_country(rng, samples, index):
+    """
+    Generate one country record with the fields of property-taxes.json.
+
+    Args:
+        rng: random.Random instance
+        samples: Result of load_samples()
+        index: Position of the record (used for a unique countryCode)
+
+    Returns:
+        dict: Country record
+    """
+    property_tax_value = round(rng.uniform(0, 3), 2) if rng.random() < 0.85 else 0
+    transfer_tax_value = round(rng.uniform(0, 12), 1)
+    level = rng.choice(list(RESTRICTION_VALUES))
+
+    return {
+        'countryCode': f'X{index}',
+        'propertyTax': f'{property_tax_value}%' if property_tax_value else 'N/A',
+        'propertyTaxValue': property_tax_value,
+        'transferTax': f'{transfer_tax_value}%',
+        'transferTaxValue': transfer_tax_value,
+        'foreignerRestrictionLevel': level,
+        'foreignerRestrictionValue': RESTRICTION_VALUES[level],
+        'notes': {lang: generate_notes(rng, samples, lang, level) for lang in ['fr', 'en']},
+    }
+
+
+def iter_countries(count, samples, seed=DEFAULT_SEED):
+    """Yield count generated country records (deterministic for a given seed)."""
+    rng = random.Random(seed)
+    for index in range(count):
+        yield generate_country(rng, samples, index)
+
+
+def write_dataset(output_file, count, samples, seed=DEFAULT_SEED):
+    """
+    Write a synthetic property-taxes.json, one record at a time.
+
+    Args:
+        output_file: Path of the generated file
+        count: Number of country records
+        samples: Result of load_samples()
+        seed: Random seed
+
+    Returns:
+        Number of records written
+    """
+    with open(output_file, 'w', encoding='utf-8') as f:
+        writer = StreamWriter(f)
+        writer.field('topic', 'property-taxes')
+        writer.begin_countries()
+        for country in iter_countries(count, samples, seed):
+            writer.country(country)
+        writer.field('lastUpdated', '2025-01-01')
+        writer.close()
+    return count
+
+
+if __name__ == '__main__':
+    script_dir = Path(__file__).parent
+    review_file = script_dir / 'property-taxes-manual-review-filled.json'
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    seed = next((int(arg.split('=', 1)[1]) for arg in sys.argv if arg.startswith('--seed=')), DEFAULT_SEED)
+
+    if len(args) < 2:
+        print("Usage: python synthetic_dataset.py <count> <output_file> [--seed=N]")
+        sys.exit(1)
+
+    count = int(args[0])
+    output_file = Path(args[1])
+
+    print(f"🔄 Generating {count} countries (seed {seed})...")
+    write_dataset(output_file, count, load_samples(review_file), seed)
+    print(f"✅ Synthetic dataset saved to: {output_file}")
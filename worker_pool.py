@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Worker Pool
+===========
+Process-pool execution of the per-country work of the pipeline scripts.
+
+Records are sent to the workers in contiguous batches and the results are
+yielded back in the original order. At most two batches per worker are in
+flight, so a streamed input stays streamed.
+
+Each batch is given an empty copy of the caller's stats dict and the copies
+are merged back in order (numbers added, lists concatenated, dicts merged
+key by key), which gives the same stats as a sequential run.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_BATCH_SIZE = 32
+
+
+def empty_stats(stats):
+    """Copy of a stats dict with every counter at 0 and every list empty."""
+    empty = {}
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            empty[key] = empty_stats(value)
+        elif isinstance(value, list):
+            empty[key] = []
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            empty[key] = 0
+        else:
+            empty[key] = value
+    return empty
+
+
+def merge_stats(total, part):
+    """Add the stats collected by one batch to the totals (in place)."""
+    for key, value in part.items():
+        if key not in total:
+            total[key] = value
+        elif isinstance(value, dict):
+            merge_stats(total[key], value)
+        elif isinstance(value, list):
+            total[key].extend(value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            total[key] += value
+    return total
+
+
+def _batches(records, batch_size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def map_batches(function, records, stats, workers, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Run function(batch, batch_stats) over a process pool.
+
+    Args:
+        function: Picklable function returning (result, batch_stats)
+        records: Iterable of records (consumed lazily)
+        stats: Stats dict the batch stats are merged into
+        workers: Number of worker processes
+        batch_size: Number of records per batch
+
+    Yields:
+        The result of every batch, in the order of the records
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        for batch in _batches(records, batch_size):
+            in_flight.append(executor.submit(function, batch, empty_stats(stats)))
+            if len(in_flight) >= 2 * workers:
+                result, batch_stats = in_flight.popleft().result()
+                merge_stats(stats, batch_stats)
+                yield result
+
+        while in_flight:
+            result, batch_stats = in_flight.popleft().result()
+            merge_stats(stats, batch_stats)
+            yield result
+
+
+def parse_workers(argv, default=1):
+    """Value of a --workers=N command line flag."""
+    for arg in argv:
+        if arg.startswith('--workers='):
+            return max(1, int(arg.split('=', 1)[1]))
+    return default